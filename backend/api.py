@@ -1,10 +1,243 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response, WebSocket
+from . import config
 from .sme_simulator import SmeSimulator
-from .models import SmeInputs, SmeOutputs
+from .models import (DeltaOutputs, DeltaRequest, FootprintOutputs, FootprintRequest, GoalSeekOutputs, GoalSeekRequest, JobRequest, JobResults, JobStatus, MonteCarloOutputs, MonteCarloRequest, OptimizeOutputs, OptimizeRequest,
+                     ParetoOutputs, ParetoRequest, PeriodOutputs, PeriodRequest, ScenarioQuery, ScenarioQueryOutputs, ScenarioSaveOutputs, ScenarioSaveRequest,
+                     SensitivityOutputs, SensitivityRequest, SmeInputs, SmeOutputs, StoredScenario, SweepOutputs, SweepRequest)
+from .batch_stream import NDJSONStreamingResponse, stream_batch
+from .monte_carlo import MonteCarloSimulator
+from .cache import build_cache
+from .sensitivity import SensitivityAnalyzer
+from .solver import SmeSolver
+from .pareto import ParetoExplorer
+from .sweep import run_sweep
+from .periods import run_periods
+from .jobs import JobNotCancellable, QueueFull, build_job_manager
+from .delta import build_delta_calculator
+from .live import LiveConnection, live_stats
+from .parallel import build_parallel_engine
+from .metrics import instrumented, registry
+from .scenario_store import build_scenario_store
+from .footprint import FootprintCalculator
+from .serialization import JSON, available_media_types, encode_outputs, negotiate
 
 router = APIRouter()
+result_cache = build_cache()
+delta_calculator = build_delta_calculator()
+# Large sampling workloads fan out to worker processes when PARALLEL_WORKERS > 0
+parallel_engine = build_parallel_engine()
+# SQLite file at config.SCENARIO_STORE_PATH, created on first use
+scenario_store = build_scenario_store()
+footprint_calculator = FootprintCalculator()
+# Long-running analyses: bounded priority queue drained by background threads
+job_manager = build_job_manager(parallel_engine)
 
-@router.post("/sme/calculate", response_model=SmeOutputs)
-def calculate_sme_impact(inputs: SmeInputs):
+def _metric_samples():
+    # Counters owned by the cache and the live channel, read at scrape time
+    if result_cache is not None:
+        stats = result_cache.stats()
+        for key in ('hits', 'misses', 'evictions', 'expirations'):
+            yield f"sme_cache_{key}_total", 'counter', f"Result cache {key}", {}, stats[key]
+        yield 'sme_cache_entries', 'gauge', 'Entries in the result cache', {}, stats['entries']
+        yield 'sme_cache_bytes', 'gauge', 'Bytes held by the result cache', {}, stats['bytes']
+    for key, value in live_stats.snapshot().items():
+        if key == 'connections':
+            yield 'sme_live_connections', 'gauge', 'Open live channel connections', {}, value
+        else:
+            name = key if key.endswith('_total') else f"{key}_total"
+            yield f"sme_live_{name}", 'counter', f"Live channel {key.replace('_', ' ')}", {}, value
+
+    stats = job_manager.stats()
+    yield 'sme_jobs_queued', 'gauge', 'Background jobs waiting to run', {}, stats['queued']
+    yield 'sme_jobs_queued_scenarios', 'gauge', 'Scenarios in background jobs waiting to run', {}, stats['queued_rows']
+    yield 'sme_jobs_running', 'gauge', 'Background jobs running', {}, stats['running']
+
+registry.add_collector(_metric_samples)
+
+def _calculate(inputs: SmeInputs) -> SmeOutputs:
     simulator = SmeSimulator()
-    return simulator.calculate(inputs)
+    if result_cache is None:
+        return simulator.calculate(inputs)
+    return result_cache.calculate(inputs, simulator)
+
+def _calculate_json(inputs: SmeInputs) -> bytes:
+    if result_cache is None:
+        return encode_outputs(SmeSimulator().calculate(inputs))
+    return result_cache.calculate_json(inputs, SmeSimulator())
+
+@router.post("/sme/calculate", response_model=SmeOutputs)
+@instrumented('calculate')
+def calculate_sme_impact(inputs: SmeInputs, accept: Optional[str] = Header(None)):
+    # Accept: application/json (default), application/vnd.sme.columnar+json or application/msgpack.
+    # The body is encoded here, so FastAPI skips re-validating it through response_model
+    media_type = negotiate(accept)
+    if media_type is None:
+        raise HTTPException(status_code=406, detail=f"Supported media types: {', '.join(available_media_types())}")
+    if media_type == JSON:
+        body = _calculate_json(inputs)
+    else:
+        body = encode_outputs(_calculate(inputs), media_type)
+    return Response(body, media_type=media_type, headers={'Vary': 'Accept'})
+
+@router.websocket("/sme/live")
+async def sme_live(websocket: WebSocket, patch: bool = False):
+    # Frames: {"id": .., "inputs": {changed fields}}; bursts coalesce to the latest state.
+    # ?patch=true answers with JSON patches against the previous result instead of full outputs
+    await LiveConnection(websocket, _calculate, patch=patch).run()
+
+@router.get("/sme/live/stats")
+def get_live_stats():
+    return live_stats.snapshot()
+
+@router.post("/sme/calculate-delta", response_model=DeltaOutputs)
+@instrumented('calculate_delta')
+def calculate_sme_delta(request: DeltaRequest):
+    # Interactive mode: send full inputs once, then only the changed fields;
+    # the response patches the previous SmeOutputs of the session
+    try:
+        return delta_calculator.apply(request)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or expired session; resend the full inputs")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/sme/cache/stats")
+def get_cache_stats():
+    return result_cache.stats() if result_cache is not None else {'backend': None}
+
+@router.post("/sme/calculate-batch")
+async def calculate_sme_batch(request: Request):
+    # Body: JSON array or NDJSON of SmeInputs, each optionally carrying a "scenario_id".
+    # Response: one NDJSON line per scenario, {"index", "scenario_id", "result" | "error"}.
+    return NDJSONStreamingResponse(stream_batch(request.stream()))
+
+@router.post("/sme/monte-carlo", response_model=MonteCarloOutputs)
+@instrumented('monte_carlo')
+def run_sme_monte_carlo(request: MonteCarloRequest):
+    try:
+        return MonteCarloSimulator(parallel_engine).run(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/sensitivity", response_model=SensitivityOutputs)
+@instrumented('sensitivity')
+def run_sme_sensitivity(request: SensitivityRequest):
+    try:
+        return SensitivityAnalyzer().run(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/goal-seek", response_model=GoalSeekOutputs)
+@instrumented('goal_seek')
+def run_sme_goal_seek(request: GoalSeekRequest):
+    try:
+        return SmeSolver().goal_seek(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/optimize", response_model=OptimizeOutputs)
+@instrumented('optimize')
+def run_sme_optimize(request: OptimizeRequest):
+    try:
+        return SmeSolver().optimize(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/pareto", response_model=ParetoOutputs)
+@instrumented('pareto')
+def run_sme_pareto(request: ParetoRequest):
+    try:
+        return ParetoExplorer(parallel_engine).run(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/sweep", response_model=SweepOutputs)
+@instrumented('sweep')
+def run_sme_sweep(request: SweepRequest):
+    try:
+        return run_sweep(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/projections/periodic", response_model=PeriodOutputs)
+@instrumented('periodic_projections')
+def run_sme_periodic_projections(request: PeriodRequest):
+    # Quarterly / monthly cash flows over up to PERIOD_MAX_YEARS, with annual roll-ups
+    try:
+        return run_periods(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/scenarios", response_model=ScenarioSaveOutputs)
+@instrumented('scenarios_save')
+def save_sme_scenarios(request: ScenarioSaveRequest):
+    # Scores and stores each scenario; ones already stored for this formula version are not recomputed
+    if len(request.scenarios) > config.SCENARIO_STORE_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {config.SCENARIO_STORE_MAX_BATCH} scenarios per request")
+    keys, reused = scenario_store.calculate_many(request.scenarios)
+    return ScenarioSaveOutputs(keys=keys, computed=len(keys) - reused, reused=reused)
+
+@router.post("/sme/scenarios/query", response_model=ScenarioQueryOutputs)
+@instrumented('scenarios_query')
+def query_sme_scenarios(query: ScenarioQuery):
+    try:
+        return ScenarioQueryOutputs(scenarios=scenario_store.query(query))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/sme/scenarios/{key}", response_model=StoredScenario)
+def get_sme_scenario(key: str):
+    scenario = scenario_store.get(key)
+    if scenario is None:
+        raise HTTPException(status_code=404, detail="Unknown scenario")
+    return scenario
+
+@router.post("/sme/footprint", response_model=FootprintOutputs)
+@instrumented('footprint')
+def calculate_footprint(request: FootprintRequest):
+    # Per-entity Scope 1/2/3 totals of an activity log; larger logs go through `python -m backend.footprint`
+    try:
+        return footprint_calculator.run(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/sme/jobs", response_model=JobStatus, status_code=202)
+@instrumented('jobs_submit')
+def submit_sme_job(request: JobRequest):
+    # Returns at once; poll GET /sme/jobs/{id} and /sme/jobs/{id}/results
+    try:
+        return job_manager.submit(request.kind, request.params, request.priority).status()
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/sme/jobs/{job_id}", response_model=JobStatus)
+def get_sme_job(job_id: str):
+    try:
+        return job_manager.get(job_id).status()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+@router.get("/sme/jobs/{job_id}/results", response_model=JobResults)
+def get_sme_job_results(job_id: str, offset: int = 0, limit: int = 1000):
+    # Partial while the job runs: scored scenarios become available chunk by chunk
+    if offset < 0 or not 0 < limit <= config.JOBS_CHUNK_SIZE * 10:
+        raise HTTPException(status_code=400, detail=f"offset must be >= 0 and limit between 1 and {config.JOBS_CHUNK_SIZE * 10}")
+    try:
+        job = job_manager.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    state = job.status().state
+    available, results = job.results(offset, limit)
+    return JobResults(id=job.id, state=state, offset=offset, available=available, results=results)
+
+@router.delete("/sme/jobs/{job_id}", response_model=JobStatus)
+def cancel_sme_job(job_id: str):
+    try:
+        return job_manager.cancel(job_id).status()
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    except JobNotCancellable as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,206 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from .models import SmeInputs, SmeOutputs
+from .sme_simulator import SmeSimulator
+
+# Streaming batch scoring: parse an upload item by item (JSON array or NDJSON),
+# score valid items in chunks through the vectorized engine and emit one NDJSON
+# line per item, in upload order. Nothing holds more than one chunk at a time.
+
+# Chunks start small so the first lines go out quickly, then grow for throughput
+FIRST_CHUNK_SIZE = 16
+MAX_CHUNK_SIZE = 1024
+
+ID_KEYS = ('scenario_id', 'id')
+# Longest token prefix that may still become valid JSON (-Infinit)
+MAX_PARTIAL_TOKEN = 8
+# Rest of the buffer that may still continue a number decoded just before it
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*$')
+
+# (index, scenario id, parsed item or None, error or None)
+Entry = Tuple[int, Any, Optional[Dict[str, Any]], Optional[Any]]
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[Any], Optional[str]]]:
+    """Yield (item, error) per non-blank line; a bad line does not stop the stream."""
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[Any], Optional[str]]]:
+    """
+    Yield (item, error) per element of a top-level JSON array without loading
+    the whole body. A malformed element ends the stream with an error as soon
+    as enough of the body is buffered to tell it from an incomplete one.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    text = ''
+    pos = 0
+    started = False
+    exhausted = False
+    chunks = chunks.__aiter__()
+    while True:
+        # Skip separators, then try to decode the next element from what is buffered
+        while pos < len(text) and (text[pos].isspace() or (started and text[pos] == ',')):
+            pos += 1
+        if pos < len(text):
+            if not started:
+                if text[pos] != '[':
+                    yield None, "expected a JSON array or NDJSON body"
+                    return
+                started = True
+                pos += 1
+                continue
+            if text[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if exhausted or _malformed(text, e):
+                    yield None, f"invalid JSON: {e.msg}"
+                    return
+            else:
+                # A number at the end of the buffer may still be incomplete ("1" of "1.5")
+                if exhausted or not (isinstance(item, (int, float)) and NUMBER_TAIL.match(text, end)):
+                    yield item, None
+                    pos = end
+                    continue
+        if exhausted:
+            if started:
+                yield None, "invalid JSON: unterminated array"
+            return
+        try:
+            chunk = utf8.decode(await chunks.__anext__())
+        except StopAsyncIteration:
+            chunk = utf8.decode(b'', final=True)
+            exhausted = True
+        # Drop the decoded elements once per chunk, not once per element
+        text, pos = text[pos:] + chunk, 0
+
+
+def _malformed(text: str, error: json.JSONDecodeError) -> bool:
+    # An element cut off by the end of the buffer fails within its last token
+    # (a number, literal or escape), or at the start of an unclosed string;
+    # anything further from the end can no longer be fixed by more input.
+    if error.msg.startswith('Unterminated string'):
+        return False
+    return len(text) - error.pos > MAX_PARTIAL_TOKEN
+
+
+async def iter_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[Optional[Any], Optional[str]]]:
+    """Sniff the body: a leading '[' means a JSON array, anything else is read as NDJSON."""
+    chunks = chunks.__aiter__()
+    head = b''
+    async for chunk in chunks:
+        head += chunk
+        if head.strip():
+            break
+
+    async def replay() -> AsyncIterator[bytes]:
+        yield head
+        async for chunk in chunks:
+            yield chunk
+
+    parser = iter_json_array if head.lstrip().startswith(b'[') else iter_ndjson
+    async for item, error in parser(replay()):
+        yield item, error
+
+
+def _parse_line(line: bytes) -> Tuple[Optional[Any], Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"invalid JSON: {e}"
+
+
+def _entry(index: int, item: Optional[Any], error: Optional[str]) -> Entry:
+    if error is not None:
+        return index, None, None, error
+    if not isinstance(item, dict):
+        return index, None, None, "each scenario must be a JSON object"
+    scenario_id = next((item.pop(k) for k in ID_KEYS if k in item), None)
+    return index, scenario_id, item, None
+
+
+def _score_chunk(simulator: SmeSimulator, entries: List[Entry]) -> List[str]:
+    valid = []
+    rows = []
+    lines = [''] * len(entries)
+    for k, (index, scenario_id, item, error) in enumerate(entries):
+        if error is None:
+            try:
+                valid.append(SmeInputs(**item))
+                rows.append(k)
+                continue
+            except ValidationError as e:
+                error = json.loads(e.json(include_url=False))
+        lines[k] = json.dumps({'index': index, 'scenario_id': scenario_id, 'error': error}, separators=(',', ':'))
+    if valid:
+        try:
+            result = simulator.calculate_batch(valid)
+            outputs = [result.to_outputs(j) for j in range(len(valid))]
+        except Exception:
+            # One bad row must not take the chunk down: score it row by row to find it
+            outputs = [_score_one(simulator, inputs) for inputs in valid]
+        for k, out in zip(rows, outputs):
+            index, scenario_id = entries[k][:2]
+            if isinstance(out, str):
+                lines[k] = json.dumps({'index': index, 'scenario_id': scenario_id, 'error': out}, separators=(',', ':'))
+            else:
+                lines[k] = ('{"index":%d,"scenario_id":%s,"result":%s}'
+                            % (index, json.dumps(scenario_id), out.model_dump_json()))
+    return [line + '\n' for line in lines]
+
+
+def _score_one(simulator: SmeSimulator, inputs: SmeInputs) -> Union[SmeOutputs, str]:
+    try:
+        return simulator.calculate_batch([inputs]).to_outputs(0)
+    except Exception:
+        return "calculation failed for these inputs"
+
+
+async def stream_batch(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """NDJSON output lines for an uploaded JSON array / NDJSON body of SmeInputs."""
+    simulator = SmeSimulator()
+    chunk_size = FIRST_CHUNK_SIZE
+    entries: List[Entry] = []
+    index = 0
+    async for item, error in iter_items(chunks):
+        entries.append(_entry(index, item, error))
+        index += 1
+        if len(entries) >= chunk_size:
+            # Score off the event loop so other requests keep being served
+            for line in await run_in_threadpool(_score_chunk, simulator, entries):
+                yield line
+            entries = []
+            chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+    if entries:
+        for line in await run_in_threadpool(_score_chunk, simulator, entries):
+            yield line
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator reads the upload while writing.
+    The stock class runs a disconnect watcher on `receive` for ASGI < 2.4, which
+    would swallow the request body chunks the generator is still waiting for;
+    here a disconnect surfaces as ClientDisconnect from request.stream() instead.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
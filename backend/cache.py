@@ -0,0 +1,221 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from . import config
+from .models import SmeInputs, SmeOutputs
+from .serialization import encode_outputs
+from .sme_simulator import SmeSimulator
+
+# Content-addressed cache of SmeOutputs JSON, keyed by a hash of the normalized
+# inputs and SmeSimulator.FORMULA_VERSION, so a formula change never serves stale
+# results. Backends store opaque bytes; ResultCache owns keys, TTL and counters.
+
+
+def canonical_key(inputs: SmeInputs, version: str = SmeSimulator.FORMULA_VERSION) -> str:
+    fields = inputs.model_dump()
+    for name, value in fields.items():
+        if isinstance(value, float) and value == 0:
+            fields[name] = 0.0  # -0.0 and 0.0 are the same scenario
+    payload = json.dumps(fields, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{version}\n{payload}".encode()).hexdigest()
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU bounded by entry count and total bytes.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, Tuple[bytes, Optional[float]]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def size(self) -> Tuple[int, int]:
+        return len(self._entries), self._bytes
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+class SqliteCacheBackend:
+    """
+    LRU in a local SQLite file, shared by every worker process on the host.
+    Counters are per process; entries and bytes are those of the shared file.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024,
+                 version: str = SmeSimulator.FORMULA_VERSION):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = version
+        self._local = threading.local()
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, version TEXT NOT NULL, "
+                       "value BLOB NOT NULL, size INTEGER NOT NULL, expires_at REAL, used_at REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)")
+            # Results of other formula versions can never be hit again
+            db.execute("DELETE FROM cache WHERE version != ?", (version,))
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[bytes]:
+        db = self._connect()
+        row = db.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] is not None and row[1] <= now:
+            db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.expirations += 1
+            return None
+        db.execute("UPDATE cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("INSERT OR REPLACE INTO cache (key, version, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                       (key, self.version, value, len(value), now + ttl if ttl else None, now))
+            count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            while count > self.max_entries or total > self.max_bytes:
+                # Evict least recently used rows in small batches
+                victims = db.execute("SELECT key, size FROM cache ORDER BY used_at LIMIT ?",
+                                     (max(1, count - self.max_entries),)).fetchall()
+                db.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k, _ in victims])
+                self.evictions += len(victims)
+                count -= len(victims)
+                total -= sum(size for _, size in victims)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache")
+
+    def size(self) -> Tuple[int, int]:
+        count, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return count, total
+
+
+class ResultCache:
+    """
+    Cache in front of SmeSimulator.calculate, holding SmeOutputs as JSON bytes.
+    """
+
+    def __init__(self, backend=None, ttl: Optional[float] = None, version: str = SmeSimulator.FORMULA_VERSION):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, inputs: SmeInputs) -> str:
+        return canonical_key(inputs, self.version)
+
+    def get(self, inputs: SmeInputs) -> Optional[bytes]:
+        value = self.backend.get(self.key(inputs))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, inputs: SmeInputs, payload: bytes) -> None:
+        self.backend.set(self.key(inputs), payload, self.ttl)
+
+    def calculate(self, inputs: SmeInputs, simulator: Optional[SmeSimulator] = None) -> SmeOutputs:
+        cached = self.get(inputs)
+        if cached is not None:
+            return SmeOutputs.model_validate_json(cached)
+        outputs = (simulator or SmeSimulator()).calculate(inputs)
+        self.put(inputs, encode_outputs(outputs))
+        return outputs
+
+    def calculate_json(self, inputs: SmeInputs, simulator: Optional[SmeSimulator] = None) -> bytes:
+        """calculate() as SmeOutputs JSON bytes; a hit is returned as stored, without parsing."""
+        cached = self.get(inputs)
+        if cached is not None:
+            return cached
+        payload = encode_outputs((simulator or SmeSimulator()).calculate(inputs))
+        self.put(inputs, payload)
+        return payload
+
+    def stats(self) -> Dict[str, object]:
+        entries, size = self.backend.size()
+        return {
+            'backend': type(self.backend).__name__,
+            'formula_version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'expirations': self.backend.expirations,
+            'entries': entries,
+            'bytes': size,
+        }
+
+
+def build_cache() -> Optional[ResultCache]:
+    """ResultCache as configured in config.py (CACHE_BACKEND = memory | sqlite | off)."""
+    if config.CACHE_BACKEND == 'off':
+        return None
+    if config.CACHE_BACKEND == 'sqlite':
+        backend = SqliteCacheBackend(config.CACHE_PATH, config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES)
+    elif config.CACHE_BACKEND == 'memory':
+        backend = MemoryCacheBackend(config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES)
+    else:
+        raise ValueError(f"unknown CACHE_BACKEND: {config.CACHE_BACKEND}")
+    return ResultCache(backend, ttl=config.CACHE_TTL_SECONDS)
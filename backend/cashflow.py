@@ -0,0 +1,391 @@
+import math
+from typing import Any, Callable, List, Sequence, Tuple, Union
+import numpy as np
+
+# Cash-flow analytics shared by SmeSimulator (one flow vector, plain floats) and the
+# batch engine (an N x T matrix, NumPy). Both kernels run the same floating-point
+# operations in the same order, so a matrix row gives exactly the 1-D answer.
+#
+# IRR works on the NPV polynomial in x = 1 / (1 + r):
+#     NPV(r) = c0 + c1 x + c2 x^2 + ... + cT x^T,   r in (-1, inf)  <=>  x in (0, inf)
+# Descartes' rule on the flows' sign changes tells us how many positive roots are
+# possible: none (no IRR), exactly one (conventional flows) or several. With no
+# sign change NPV keeps the sign of its first non-zero flow at every rate: always
+# negative means no IRR, always positive (nothing invested, only gains) means the
+# IRR is unbounded. With several, the positive real roots are located as
+# eigenvalues of the polynomial's companion matrix (as np.roots does), and NPV is
+# sampled between consecutive roots, so two roots close together still get a
+# bracket each. Past ROOTS_MAX_DEGREE a fine fixed grid of x stands in for the roots.
+
+IRR_OK = 0
+IRR_NO_ROOT = 1
+IRR_MULTIPLE_ROOTS = 2
+IRR_UNBOUNDED = 3
+
+MAX_ITERATIONS = 100
+MAX_DOUBLINGS = 60          # bracket search reaches x = 2^60, i.e. r ~ -100%
+NEWTON_TOLERANCE = 1e-7     # relative Newton step after which x is converged (error ~ step^2)
+BRACKET_TOLERANCE = 1e-12   # relative bracket width at which bisection stops
+ROOT_IMAG_TOLERANCE = 1e-6  # eigenvalues with |imag| up to this share of |root| count as real
+ROOTS_MAX_DEGREE = 120      # longer flows (monthly periods) sample SCAN_GRID instead: eigvals is O(T^3)
+SCAN_GRID = 2.0 ** (np.arange(-160, 161) / 8)  # r from ~+1e6 down to ~-99.9999%, 9% steps in x
+IRR_MAX_PERCENT = 1e6       # irr_percent() ceiling; unbounded IRRs are reported at it
+
+Flows = Union[Sequence[float], np.ndarray]
+
+
+def irr(flows: Flows, long_horizon: bool = False) -> Tuple[Any, Any]:
+    """
+    Internal rate of return of flows[..., 0..T] (flows[..., 0] at t = 0).
+    Returns (rate, status): status is IRR_OK, IRR_NO_ROOT (rate is NaN),
+    IRR_MULTIPLE_ROOTS (the root nearest 0% is returned) or IRR_UNBOUNDED
+    (NPV is positive at every rate; rate is inf). 1-D input gives floats, an
+    N x (T + 1) matrix gives arrays.
+
+    long_horizon=True (matrix input only) evaluates the polynomial from a power
+    table instead of Horner's rule, so the cost no longer grows with T; the
+    result then agrees with the 1-D kernel to rounding, not bit for bit.
+    """
+    if isinstance(flows, np.ndarray) and flows.ndim == 2:
+        return _irr_matrix(np.asarray(flows, dtype=float), _power_matrix if long_horizon else _horner_matrix)
+    return _irr_vector(list(map(float, flows)))
+
+
+def irr_percent(rate: Any, status: Any) -> Any:
+    """irr() as reported in outputs: percent, 0 when there is no IRR, capped at IRR_MAX_PERCENT."""
+    if isinstance(rate, np.ndarray):
+        return np.where(status == IRR_NO_ROOT, 0.0, np.minimum(rate * 100, IRR_MAX_PERCENT))
+    return 0.0 if status == IRR_NO_ROOT else min(rate * 100, IRR_MAX_PERCENT)
+
+
+def payback_period(investment: Any, flows: Flows, fractional: bool = False) -> Any:
+    """
+    First period (1-based) in which cumulative flows[..., 0..T-1] reach `investment`;
+    NaN if they never do. fractional=True interpolates within that period.
+    """
+    if isinstance(flows, np.ndarray) and flows.ndim == 2:
+        return _payback_matrix(np.asarray(investment, dtype=float), flows, fractional)
+    return _payback_vector(float(investment), [float(v) for v in flows], fractional)
+
+
+def discounted_payback(investment: Any, flows: Flows, rate: Any, fractional: bool = False) -> Any:
+    """payback_period() on flows discounted at `rate` (flows[..., t - 1] / (1 + rate)^t)."""
+    if isinstance(flows, np.ndarray) and flows.ndim == 2:
+        periods = np.arange(1, flows.shape[1] + 1, dtype=float)
+        # float_power goes through libm pow(), same as the scalar ** below
+        discounted = flows / np.float_power((1 + np.asarray(rate, dtype=float))[:, None], periods[None, :])
+        return _payback_matrix(np.asarray(investment, dtype=float), discounted, fractional)
+    rate = float(rate)
+    discounted = [float(v) / ((1 + rate) ** (t + 1)) for t, v in enumerate(flows)]
+    return _payback_vector(float(investment), discounted, fractional)
+
+
+# --- 1-D kernels -----------------------------------------------------------------
+
+def _horner(c: List[float], x: float) -> Tuple[float, float]:
+    # P(x) and P'(x); c is highest coefficient first
+    p = c[0]
+    d = 0.0
+    for v in c[1:]:
+        d = d * x + p
+        p = p * x + v
+    return p, d
+
+
+def _irr_vector(c: List[float]) -> Tuple[float, int]:
+    changes = 0
+    positive = None  # sign of NPV as x -> 0 (r -> inf): the first non-zero flow
+    last = None
+    for v in c:
+        if v != 0:
+            if last is None:
+                positive = v > 0
+            elif (v > 0) != last:
+                changes += 1
+            last = v > 0
+    if changes == 0:
+        return (math.inf, IRR_UNBOUNDED) if positive else (math.nan, IRR_NO_ROOT)
+    status = IRR_OK
+    roots = _positive_roots(np.array([c]))[0] if changes > 1 else None
+    c = c[::-1]
+
+    if changes == 1:
+        # Exactly one root: walk x = 1, 2, 4, ... (r = 0%, -50%, -75%, ...) to bracket it
+        a, b = 0.0, 1.0
+        fa, da = c[-1], (c[-2] if len(c) > 1 else 0.0)  # P(0), P'(0)
+        fb, db = _horner(c, b)
+        for _ in range(MAX_DOUBLINGS):
+            if fb == 0 or (fb > 0) != positive or not math.isfinite(fb):
+                break
+            a, fa, da = b, fb, db
+            b = b * 2.0
+            fb, db = _horner(c, b)
+        if not math.isfinite(fb) or (fb != 0 and (fb > 0) == positive):
+            return math.nan, IRR_NO_ROOT
+    else:
+        # Several roots possible: sample NPV past each root and keep the bracket of the root nearest r = 0%
+        brackets = []
+        prev_x, prev_positive = 0.0, positive
+        for root, x in zip(roots.tolist(), _scan_points(roots).tolist()):
+            f = _horner(c, x)[0]
+            if not math.isfinite(f):
+                break
+            if f != 0 and (f > 0) != prev_positive:
+                brackets.append((prev_x, x, abs(1.0 / root - 1.0)))
+                prev_positive = f > 0
+            if f != 0:
+                prev_x = x
+        if not brackets:
+            # No sign change after all (e.g. only double roots): NPV keeps its sign at x -> 0
+            return (math.inf, IRR_UNBOUNDED) if positive else (math.nan, IRR_NO_ROOT)
+        if len(brackets) > 1:
+            status = IRR_MULTIPLE_ROOTS
+        a, b, _ = min(brackets, key=lambda abd: abd[2])
+        (fa, da), (fb, db) = _horner(c, a), _horner(c, b)
+        # Orient so that NPV has the sign `positive` at a
+        positive = fa > 0 if a > 0 else positive
+
+    x = b if fb == 0 else _newton_vector(c, a, b, fa, da, fb, db, positive)
+    return 1.0 / x - 1.0, status
+
+
+def _newton_vector(c: List[float], a: float, b: float, fa: float, da: float, fb: float, db: float,
+                   positive: bool) -> float:
+    # Newton in x, kept inside [a, b]: a step that would leave the bracket becomes a
+    # bisection. The first step is a Newton step from a, else from b, else false position.
+    x = a - fa / da if da != 0 else a
+    if not a < x < b:
+        x = b - fb / db if db != 0 else a
+    if not a < x < b:
+        x = a - fa * (b - a) / (fb - fa) if fb != fa else a
+    if not a < x < b:
+        x = (a + b) * 0.5
+    top, rest = c[0], c[1:]
+    for _ in range(MAX_ITERATIONS):
+        p, d = top, 0.0  # _horner(c, x), inlined: this loop is the hot path
+        for v in rest:
+            d = d * x + p
+            p = p * x + v
+        if p == 0:
+            break
+        if (p > 0) == positive:
+            a = x
+        else:
+            b = x
+        step = x - p / d if d != 0 else a
+        if a < step < b:
+            done = abs(step - x) <= NEWTON_TOLERANCE * step
+        else:
+            step = (a + b) * 0.5
+            done = b - a <= BRACKET_TOLERANCE * b
+        x = step
+        if done:
+            break
+    return x
+
+
+def _payback_vector(investment: float, flows: List[float], fractional: bool) -> float:
+    cum = 0.0
+    for t, v in enumerate(flows):
+        prev = cum
+        cum += v
+        if cum >= investment:
+            return t + (investment - prev) / v if fractional and v != 0 else float(t + 1)
+    return math.nan
+
+
+# --- Root location (both kernels) -------------------------------------------------
+
+def _positive_roots(c: np.ndarray) -> List[np.ndarray]:
+    """
+    Positive real roots, ascending, of each row's polynomial c[k, 0] + c[k, 1] x + ...
+    (SCAN_GRID above ROOTS_MAX_DEGREE). Rows of one degree share a stacked
+    eigvals call; a single row (the 1-D kernel) goes through the same code, so
+    both kernels see the same roots.
+    """
+    roots = [np.empty(0)] * len(c)
+    nonzero = c != 0
+    # Zero flows at either end only add roots at x = 0 (r = inf) or lower the degree
+    lo = nonzero.argmax(axis=1)
+    hi = c.shape[1] - 1 - nonzero[:, ::-1].argmax(axis=1)
+    degree = np.where(np.isfinite(c).all(axis=1), hi - lo, 0)
+    for row in np.flatnonzero(degree > ROOTS_MAX_DEGREE).tolist():
+        roots[row] = SCAN_GRID
+    for d in np.unique(degree[(degree > 0) & (degree <= ROOTS_MAX_DEGREE)]).tolist():
+        rows = np.flatnonzero(degree == d)
+        p = np.take_along_axis(c[rows], hi[rows, None] - np.arange(d + 1)[None, :], axis=1)  # highest first
+        companion = np.zeros((len(rows), d, d))
+        with np.errstate(over='ignore'):
+            companion[:, 0, :] = -p[:, 1:] / p[:, :1]
+        companion[:, np.arange(1, d), np.arange(d - 1)] = 1.0
+        ok = np.isfinite(companion[:, 0, :]).all(axis=1)
+        values = np.linalg.eigvals(companion[ok])
+        for row, v in zip(rows[ok].tolist(), values):
+            roots[row] = np.sort(v.real[(v.real > 0) & (np.abs(v.imag) <= ROOT_IMAG_TOLERANCE * np.abs(v))])
+    return roots
+
+
+def _scan_points(roots: np.ndarray) -> np.ndarray:
+    # One point past each root: the geometric midpoint to the next root, twice the last root
+    points = np.empty(len(roots))
+    points[:-1] = np.sqrt(roots[:-1] * roots[1:])
+    points[-1:] = roots[-1:] * 2.0
+    return points
+
+
+# --- N x T kernels ---------------------------------------------------------------
+
+def _horner_matrix(c: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # c[:, 0] is the t = 0 flow here
+    p = c[:, -1].copy()
+    d = np.zeros(len(c))
+    for k in range(c.shape[1] - 2, -1, -1):
+        d = d * x + p
+        p = p * x + c[:, k]
+    return p, d
+
+
+def _power_matrix(c: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # P(x) and P'(x) like _horner_matrix, from x^0..x^T: a few N x T operations for any T
+    k = np.arange(c.shape[1], dtype=float)
+    powers = np.float_power(x[:, None], k[None, :])
+    p = (c * powers).sum(axis=1)
+    d = (c[:, 1:] * k[1:] * powers[:, :-1]).sum(axis=1)
+    return p, d
+
+
+def _irr_matrix(c: np.ndarray, polynomial: Callable = _horner_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(c)
+    rate = np.full(n, np.nan)
+    status = np.full(n, IRR_NO_ROOT)
+    nonzero = c != 0
+    # Sign changes between consecutive non-zero flows (zeros carry the previous sign)
+    idx = np.where(nonzero, np.arange(c.shape[1])[None, :], 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    carried = np.take_along_axis(c > 0, idx, axis=1)
+    seen = np.logical_or.accumulate(nonzero, axis=1)
+    changes = ((carried[:, 1:] != carried[:, :-1]) & seen[:, :-1]).sum(axis=1)
+    first = np.take_along_axis(c, nonzero.argmax(axis=1)[:, None], axis=1)[:, 0]
+    unbounded = (changes == 0) & (first > 0)
+
+    a = np.zeros(n)
+    b = np.ones(n)
+    fa = c[:, 0].copy()
+    da = c[:, 1].copy() if c.shape[1] > 1 else np.zeros(n)
+    fb = np.zeros(n)
+    db = np.zeros(n)
+    positive = first > 0
+    found = np.zeros(n, dtype=bool)
+    multiple = np.zeros(n, dtype=bool)
+
+    rows = np.flatnonzero(changes == 1)
+    if len(rows):
+        cr, pos = c[rows], positive[rows]
+        ar, br = np.zeros(len(rows)), np.ones(len(rows))
+        far, dar = fa[rows], da[rows]
+        fbr, dbr = polynomial(cr, br)
+        with np.errstate(over='ignore', invalid='ignore'):
+            for _ in range(MAX_DOUBLINGS):
+                walk = (fbr != 0) & ((fbr > 0) == pos) & np.isfinite(fbr)
+                if not walk.any():
+                    break
+                ar = np.where(walk, br, ar)
+                br = np.where(walk, br * 2.0, br)
+                far = np.where(walk, fbr, far)
+                dar = np.where(walk, dbr, dar)
+                f, d = polynomial(cr, br)
+                fbr = np.where(walk, f, fbr)
+                dbr = np.where(walk, d, dbr)
+        ok = np.isfinite(fbr) & ((fbr == 0) | ((fbr > 0) != pos))
+        a[rows], b[rows], fa[rows], da[rows], fb[rows], db[rows], found[rows] = ar, br, far, dar, fbr, dbr, ok
+
+    rows = np.flatnonzero(changes > 1)
+    if len(rows):
+        cr = c[rows]
+        m = len(rows)
+        roots = _positive_roots(cr)
+        counts = np.array([len(r) for r in roots])
+        width = int(counts.max())
+        # Per-row roots and scan points, padded past each row's count
+        root_grid, point_grid = np.ones((m, width)), np.ones((m, width))
+        for k, r in enumerate(roots):
+            root_grid[k, :len(r)] = r
+            point_grid[k, :len(r)] = _scan_points(r)
+        prev_x, prev_pos = np.zeros(m), positive[rows].copy()
+        alive = np.ones(m, dtype=bool)
+        count = np.zeros(m, dtype=int)
+        best_a, best_b = np.zeros(m), np.zeros(m)
+        best_dist = np.full(m, np.inf)
+        with np.errstate(over='ignore', invalid='ignore'):
+            for j in range(width):
+                x = point_grid[:, j]
+                f = polynomial(cr, x)[0]
+                alive &= (j < counts) & np.isfinite(f)
+                flip = alive & (f != 0) & ((f > 0) != prev_pos)
+                dist = abs(1.0 / root_grid[:, j] - 1.0)
+                better = flip & (dist < best_dist)
+                best_a = np.where(better, prev_x, best_a)
+                best_b = np.where(better, x, best_b)
+                best_dist = np.where(better, dist, best_dist)
+                count += flip
+                prev_pos = np.where(flip, f > 0, prev_pos)
+                prev_x = np.where(alive & (f != 0), x, prev_x)
+        a[rows], b[rows] = best_a, best_b
+        found[rows] = count > 0
+        multiple[rows] = count > 1
+        unbounded[rows] = (count == 0) & positive[rows]
+        with np.errstate(over='ignore', invalid='ignore'):
+            fa[rows], da[rows] = polynomial(cr, best_a)
+            fb[rows], db[rows] = polynomial(cr, best_b)
+        positive[rows] = np.where(best_a > 0, fa[rows] > 0, positive[rows])
+
+    rows = np.flatnonzero(found)
+    if len(rows):
+        x = np.where(fb[rows] == 0, b[rows], _newton_matrix(c[rows], a[rows], b[rows], fa[rows], da[rows], fb[rows], db[rows], positive[rows], polynomial))
+        rate[rows] = 1.0 / x - 1.0
+        status[rows] = np.where(multiple[rows], IRR_MULTIPLE_ROOTS, IRR_OK)
+    rate[unbounded] = np.inf
+    status[unbounded] = IRR_UNBOUNDED
+    return rate, status
+
+
+def _newton_matrix(c: np.ndarray, a: np.ndarray, b: np.ndarray, fa: np.ndarray, da: np.ndarray,
+                   fb: np.ndarray, db: np.ndarray, positive: np.ndarray, polynomial: Callable = _horner_matrix) -> np.ndarray:
+    active = np.arange(len(c))
+    a, b = a.copy(), b.copy()
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        x = np.where(da != 0, a - fa / da, a)
+        x = np.where((a < x) & (x < b), x, np.where(db != 0, b - fb / db, a))
+        x = np.where((a < x) & (x < b), x, np.where(fb != fa, a - fa * (b - a) / (fb - fa), a))
+        x = np.where((a < x) & (x < b), x, (a + b) * 0.5)
+        for _ in range(MAX_ITERATIONS):
+            if not len(active):
+                break
+            xa = x[active]
+            p, d = polynomial(c[active], xa)
+            root = p == 0
+            up = (p > 0) == positive[active]
+            aa = np.where(up, xa, a[active])
+            bb = np.where(up, b[active], xa)
+            step = np.where(d != 0, xa - p / d, aa)
+            newton = (aa < step) & (step < bb)
+            step = np.where(newton, step, (aa + bb) * 0.5)
+            done = np.where(newton, abs(step - xa) <= NEWTON_TOLERANCE * step, bb - aa <= BRACKET_TOLERANCE * bb)
+            x[active] = np.where(root, xa, step)
+            a[active], b[active] = aa, bb
+            active = active[~(root | done)]
+    return x
+
+
+def _payback_matrix(investment: np.ndarray, flows: np.ndarray, fractional: bool) -> np.ndarray:
+    cum = np.add.accumulate(flows, axis=1)
+    hit = cum >= investment[:, None]
+    found = hit.any(axis=1)
+    k = hit.argmax(axis=1)
+    period = np.where(found, k + 1.0, np.nan)
+    if fractional:
+        prev = np.where(k > 0, np.take_along_axis(cum, np.maximum(k - 1, 0)[:, None], axis=1)[:, 0], 0.0)
+        v = np.take_along_axis(flows, k[:, None], axis=1)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            period = np.where(found & (v != 0), k + (investment - prev) / v, period)
+    return period
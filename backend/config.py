@@ -1,4 +1,8 @@
 # Configuration and Constants for Sustainability Tracker
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Carbon Emission Factors (kg CO2 per unit)
 EMISSION_FACTORS = {
@@ -45,6 +49,15 @@ EMISSION_FACTORS = {
     }
 }
 
+# GHG Protocol scope of each activity (see backend/footprint.py): category default, then subtype overrides.
+# Fuel burnt on site or in own vehicles is Scope 1, purchased electricity Scope 2, the rest of the value chain Scope 3.
+EMISSION_SCOPES = {
+    'transportation': {'default': 3, 'car_petrol': 1, 'car_diesel': 1, 'motorcycle': 1, 'car_electric': 2},
+    'energy': {'default': 1, 'electricity': 2, 'solar': 2, 'wind': 2},
+    'food': {'default': 3},
+    'waste': {'default': 3},
+}
+
 # Average daily carbon footprint (kg CO2)
 AVERAGE_DAILY_FOOTPRINT = {
     'global': 11.0,
@@ -81,3 +94,53 @@ RECOMMENDATION_THRESHOLDS = {
     'high_carbon_day': 15.0,    # kg CO2
     'low_carbon_day': 5.0,      # kg CO2
 }
+
+# SME simulator inputs (see backend/models.py)
+MAX_FORECAST_HORIZON = int(os.getenv('MAX_FORECAST_HORIZON', '100'))  # years; longer horizons are rejected per scenario
+
+# SME result cache (see backend/cache.py)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')  # memory, sqlite, off
+CACHE_PATH = os.getenv('CACHE_PATH', 'sme_result_cache.db')  # sqlite backend, shared by workers
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', '0')) or None  # 0 = no expiry
+
+# SME delta-mode sessions (see backend/delta.py)
+DELTA_MAX_SESSIONS = int(os.getenv('DELTA_MAX_SESSIONS', '1000'))
+DELTA_SESSION_TTL_SECONDS = float(os.getenv('DELTA_SESSION_TTL_SECONDS', '1800'))  # idle sessions expire
+
+# Multi-process scoring for large batch workloads (see backend/parallel.py)
+PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', '0'))  # 0 = score in-process
+PARALLEL_CHUNK_SIZE = int(os.getenv('PARALLEL_CHUNK_SIZE', '10000'))  # rows per worker task
+PARALLEL_START_METHOD = os.getenv('PARALLEL_START_METHOD', 'spawn')  # spawn, forkserver, fork
+
+# Hot-path instrumentation and /metrics (see backend/metrics.py); read at import
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '0').lower() in ('1', 'true', 'yes')
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS', 'off')  # off, header (X-Profile: 1), all; needs METRICS_ENABLED
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')  # cProfile dumps, one .prof per profiled request
+
+# Persistent scenario store (see backend/scenario_store.py)
+SCENARIO_STORE_PATH = os.getenv('SCENARIO_STORE_PATH', DATABASE_NAME)
+SCENARIO_STORE_POOL_SIZE = int(os.getenv('SCENARIO_STORE_POOL_SIZE', '4'))  # SQLite connections per worker
+SCENARIO_STORE_MAX_BATCH = int(os.getenv('SCENARIO_STORE_MAX_BATCH', '100000'))  # scenarios per save request
+
+# Carbon footprint engine (see backend/footprint.py)
+FOOTPRINT_CHUNK_ROWS = int(os.getenv('FOOTPRINT_CHUNK_ROWS', '1000000'))  # activity rows per chunk in streaming mode
+FOOTPRINT_MAX_RECORDS = int(os.getenv('FOOTPRINT_MAX_RECORDS', '1000000'))  # per API request
+
+# Parameter-grid sweeps (see backend/sweep.py)
+SWEEP_MAX_CELLS = int(os.getenv('SWEEP_MAX_CELLS', '1000000'))  # combinations per sweep
+
+# Background jobs (see backend/jobs.py)
+JOBS_BACKEND = os.getenv('JOBS_BACKEND', 'local')  # local: worker threads in each API process
+JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', '1'))  # jobs running at once per process
+JOBS_MAX_QUEUED = int(os.getenv('JOBS_MAX_QUEUED', '100'))  # waiting jobs; submissions beyond get 429
+JOBS_MAX_QUEUED_SCENARIOS = int(os.getenv('JOBS_MAX_QUEUED_SCENARIOS', '2000000'))  # across waiting jobs; beyond get 429
+JOBS_CHUNK_SIZE = int(os.getenv('JOBS_CHUNK_SIZE', '2000'))  # scenarios per progress step of a scoring job
+JOBS_MAX_SCENARIOS = int(os.getenv('JOBS_MAX_SCENARIOS', '1000000'))  # per scoring job
+JOBS_MAX_FINISHED = int(os.getenv('JOBS_MAX_FINISHED', '1000'))  # finished jobs kept for polling
+JOBS_MAX_RESULT_BYTES = int(os.getenv('JOBS_MAX_RESULT_BYTES', str(2 * 1024 ** 3)))  # results held by jobs; oldest finished evicted first
+JOBS_RESULT_TTL_SECONDS = float(os.getenv('JOBS_RESULT_TTL_SECONDS', '3600'))  # finished jobs expire
+
+# Quarterly / monthly projections (see backend/periods.py)
+PERIOD_MAX_YEARS = int(os.getenv('PERIOD_MAX_YEARS', '50'))  # longest horizon for period projections
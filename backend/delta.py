@@ -0,0 +1,216 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from . import config
+from .models import DeltaOutputs, DeltaRequest, SmeDeepIndicators, SmeInputs
+from .sme_simulator import SmeSimulator
+
+# Delta mode for interactive sessions: keep the intermediate state of the last
+# calculation per session, recompute only the stages downstream of the changed
+# fields and answer with an RFC 6902 patch against the previous SmeOutputs.
+
+# (stage, input fields it reads or None for "any field", upstream stages), in
+# evaluation order. Field sets mirror the SmeSimulator stage methods.
+STAGES: List[Tuple[str, Optional[FrozenSet[str]], Tuple[str, ...]]] = [
+    ('revenue', frozenset({'initial_revenue', 'forecast_horizon', 'revenue_growth_rate', 'inflation_rate',
+                           'reputation_uplift_pct', 'green_market_access_pct'}), ()),
+    ('scenario_a', frozenset({'variable_costs_pct', 'fixed_costs', 'tax_rate'}), ('revenue',)),
+    ('scenario_b', frozenset({'variable_costs_pct', 'fixed_costs', 'tax_rate', 'initial_capex', 'sustainability_capex',
+                              'depreciation_years', 'reinvest_pct', 'energy_efficiency_pct', 'resource_efficiency_pct',
+                              'waste_reduction_pct', 'circular_economy_pct'}), ('revenue',)),
+    ('projections', frozenset(), ('revenue', 'scenario_a', 'scenario_b')),
+    ('scores', frozenset({'initial_capex', 'sustainability_capex', 'reinvest_pct', 'energy_efficiency_pct',
+                          'resource_efficiency_pct', 'waste_reduction_pct', 'circular_economy_pct', 'scope_1_reduction',
+                          'scope_2_reduction', 'scope_3_reduction', 'carbon_reduction_potential', 'reputation_uplift_pct',
+                          'productivity_gain_pct', 'turnover_reduction_pct', 'green_market_access_pct',
+                          'disruption_impact'}), ('projections',)),
+    # NPV: financial_viability and discounted_payback_years, the only outputs reading discount_rate
+    ('discounting', frozenset({'discount_rate', 'sustainability_capex', 'forecast_horizon'}), ('projections',)),
+    ('cash_flow', frozenset({'sustainability_capex', 'forecast_horizon'}), ('projections',)),
+    ('indicators', frozenset({'initial_capex', 'sustainability_capex', 'reinvest_pct', 'initial_revenue',
+                              'carbon_reduction_potential', 'energy_efficiency_pct', 'resource_efficiency_pct',
+                              'waste_reduction_pct', 'circular_economy_pct', 'reputation_uplift_pct',
+                              'productivity_gain_pct', 'turnover_reduction_pct'}), ('projections', 'scores')),
+    ('heatmap', frozenset({'sustainability_capex', 'initial_revenue', 'disruption_impact', 'carbon_reduction_potential',
+                           'scope_3_reduction'}), ('scores',)),
+    ('alerts', frozenset({'sustainability_capex', 'initial_revenue'}), ('projections', 'scores')),
+]
+# Stages that build the yearly projections; the rest turn them into outputs
+PROJECTION_STAGES = ('revenue', 'scenario_a', 'scenario_b', 'projections')
+DETAIL_STAGES = ('discounting', 'cash_flow', 'indicators')
+
+
+def stages_to_recompute(changed: Optional[Set[str]]) -> List[str]:
+    """Stages affected by a change of `changed` fields (None: everything), in evaluation order."""
+    dirty: List[str] = []
+    for name, fields, upstream in STAGES:
+        if (changed is None or (changed if fields is None else changed & fields)
+                or any(stage in dirty for stage in upstream)):
+            dirty.append(name)
+    return dirty
+
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def diff(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """RFC 6902 operations turning `old` into `new`; lists are diffed per item only when their length is unchanged."""
+    ops: List[Dict[str, Any]] = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        pairs = []
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': _pointer(path, key), 'value': value})
+            else:
+                pairs.append((key, old[key], value))
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        pairs = zip(range(len(new)), old, new)
+    else:
+        return [] if old == new else [{'op': 'replace', 'path': path, 'value': new}]
+    for key, a, b in pairs:
+        # Equal subtrees are compared in C and never walked
+        if a != b:
+            if isinstance(a, (dict, list)):
+                ops.extend(diff(a, b, _pointer(path, key)))
+            else:
+                ops.append({'op': 'replace', 'path': _pointer(path, key), 'value': b})
+    return ops
+
+
+class DeltaSession:
+    """
+    Last inputs, stage results and output document of one interactive session.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.inputs: Optional[SmeInputs] = None
+        self.state: Dict[str, Any] = {}
+        self.document: Optional[Dict[str, Any]] = None
+        self.revision = 0
+        self.lock = threading.Lock()
+
+    def update(self, simulator: SmeSimulator, inputs: SmeInputs, reset: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+        if reset or self.inputs is None:
+            changed = None
+        else:
+            changed = {name for name in SmeInputs.model_fields if getattr(self.inputs, name) != getattr(inputs, name)}
+        stages = stages_to_recompute(changed)
+        for stage in stages:
+            self.state[stage] = self._run(simulator, stage, inputs)
+        self.inputs = inputs
+
+        # A first or reset update runs every stage; otherwise parts whose stages did not
+        # run are the same objects as before, which the diff skips without walking them
+        state, previous = self.state, self.document
+        document = {
+            'scores': state['scores'].model_dump() if 'scores' in stages else previous['scores'],
+            'heatmap': state['heatmap'] if 'heatmap' in stages else previous['heatmap'],
+            'alerts': state['alerts'] if 'alerts' in stages else previous['alerts'],
+            'details': (SmeDeepIndicators(**state['discounting'], **state['cash_flow'], **state['indicators']).model_dump()
+                        if any(stage in stages for stage in DETAIL_STAGES) else previous['details']),
+            'projections': state['projections'].to_rows() if 'projections' in stages else previous['projections'],
+        }
+        if self.document is None or changed is None:
+            patch = [{'op': 'replace', 'path': '', 'value': document}]
+        else:
+            patch = diff(self.document, document)
+        self.document = document
+        self.revision += 1
+        return patch, stages
+
+    def _run(self, simulator: SmeSimulator, stage: str, i: SmeInputs) -> Any:
+        state = self.state
+        if stage == 'revenue':
+            return simulator._revenue_paths(i)
+        if stage == 'scenario_a':
+            return simulator._scenario_a(i, state['revenue'][0])
+        if stage == 'scenario_b':
+            return simulator._scenario_b(i, state['revenue'][1])
+        if stage == 'projections':
+            rev_a, rev_b = state['revenue']
+            frame = simulator._assemble_projections(rev_a, rev_b, state['scenario_a'], state['scenario_b'])
+            state['incremental_cfs'] = frame.incremental_cash_flows().tolist()
+            return frame
+        frame = state['projections']
+        if stage == 'scores':
+            return simulator._scores(i, frame)
+        if stage == 'discounting':
+            return simulator._discounted_indicators(i, state['incremental_cfs'])
+        if stage == 'cash_flow':
+            return simulator._cash_flow_indicators(i, frame, state['incremental_cfs'])
+        scores = state['scores']
+        if stage == 'indicators':
+            return simulator._indicators(i, frame, scores.environmental, scores.strategic)
+        if stage == 'heatmap':
+            cells = simulator._calculate_heatmap(i, scores.economic, scores.environmental, scores.strategic)
+            return [cell.model_dump() for cell in cells]
+        alerts = simulator._generate_alerts(i, frame, scores.economic, scores.environmental, scores.strategic)
+        return [alert.model_dump() for alert in alerts]
+
+
+class DeltaSessionStore:
+    """
+    In-process sessions, least recently used evicted first and expired after
+    `ttl` seconds idle. Sessions live in the worker that created them.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl: Optional[float] = 1800.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: 'OrderedDict[str, Tuple[DeltaSession, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self) -> DeltaSession:
+        session = DeltaSession(uuid.uuid4().hex)
+        with self._lock:
+            self._sessions[session.id] = (session, time.time())
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> DeltaSession:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or (self.ttl and entry[1] + self.ttl <= now):
+                self._sessions.pop(session_id, None)
+                raise KeyError(session_id)
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class DeltaCalculator:
+    """
+    Applies a DeltaRequest to its session and returns the output patch.
+    """
+
+    def __init__(self, store: Optional[DeltaSessionStore] = None, simulator: Optional[SmeSimulator] = None):
+        self.store = store if store is not None else DeltaSessionStore()
+        self.simulator = simulator or SmeSimulator()
+
+    def apply(self, request: DeltaRequest) -> DeltaOutputs:
+        unknown = set(request.changes) - set(SmeInputs.model_fields)
+        if unknown:
+            raise ValueError(f"unknown input fields: {', '.join(sorted(unknown))}")
+        # Raises KeyError for unknown or expired sessions: the client restarts with full inputs
+        session = self.store.create() if request.session_id is None else self.store.get(request.session_id)
+        with session.lock:
+            base = request.inputs or session.inputs or SmeInputs()
+            inputs = SmeInputs(**{**base.model_dump(), **request.changes}) if request.changes else base
+            patch, stages = session.update(self.simulator, inputs, reset=request.inputs is not None)
+            return DeltaOutputs(session_id=session.id, revision=session.revision, patch=patch, recomputed=stages)
+
+
+def build_delta_calculator() -> DeltaCalculator:
+    return DeltaCalculator(DeltaSessionStore(config.DELTA_MAX_SESSIONS, config.DELTA_SESSION_TTL_SECONDS or None))
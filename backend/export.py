@@ -0,0 +1,269 @@
+import argparse
+import csv
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from .models import SmeInputs
+from .sme_batch import (DETAIL_FIELDS, EXECUTION_RISK_LEVELS, INT_FIELDS, NUMERIC_FIELDS, PROJECTION_FIELDS, SCORE_FIELDS,
+                        BatchInputs, BatchResult, SmeBatchEngine)
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # optional: Parquet / Arrow IPC export needs it, CSV does not
+    pa = None
+
+# Export of multi-scenario runs for pandas & co. Scenarios are scored one chunk
+# (row group) at a time and each chunk is written before the next is scored, so
+# memory is bounded by the row group size, not by the number of scenarios.
+#
+#   scenarios table   one row per scenario: `scenario`, `scenario_id` (empty
+#                     unless the input is labeled), every SmeInputs field,
+#                     scores.<name>, details.<name>
+#   projections table long format: `scenario`, `year`, one column per
+#                     YearlyProjection field, only the years of each horizon
+
+TEXT_FIELDS = [name for name, f in SmeInputs.model_fields.items() if f.annotation is str]
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+DEFAULT_ROW_GROUP_SIZE = 50_000
+# Typed up front for Arrow: a chunk of only None ids would otherwise infer `null`
+# and the next chunk's schema would no longer match the file's
+STRING_COLUMNS = frozenset(['scenario_id', 'details.execution_risk_factor'] + TEXT_FIELDS)
+
+
+class LabeledBatch:
+    """
+    BatchInputs together with the text fields of its rows (industry, region,
+    ...) and optionally a scenario id per row, as produced by ingest.py.
+    """
+    __slots__ = ('inputs', 'text', 'ids')
+
+    def __init__(self, inputs: BatchInputs, text: Dict[str, List[str]], ids: Optional[List[Optional[str]]] = None):
+        self.inputs = inputs
+        self.text = text
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+    def take(self, index: slice) -> 'LabeledBatch':
+        return LabeledBatch(self.inputs.take(index), {name: values[index] for name, values in self.text.items()},
+                            self.ids[index] if self.ids is not None else None)
+
+
+# A chunk of scenarios: SmeInputs models, LabeledBatch, or plain BatchInputs (text fields then take their defaults)
+Chunk = Union[Sequence[SmeInputs], LabeledBatch, BatchInputs]
+
+
+class CsvTableWriter:
+    def __init__(self, path: str):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.header = False
+
+    def write(self, columns: Dict[str, Any]) -> None:
+        if not self.header:
+            self.writer.writerow(list(columns))
+            self.header = True
+        values = [col.tolist() if isinstance(col, np.ndarray) else col for col in columns.values()]
+        self.writer.writerows(zip(*values))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def arrow_table(columns: Dict[str, Any], schema: Optional['pa.Schema'] = None) -> 'pa.Table':
+    """Columns as an Arrow table; later chunks are cast to the schema of the first."""
+    if schema is not None:
+        return pa.table(columns, schema=schema)
+    return pa.table({name: pa.array(values, type=pa.string()) if name in STRING_COLUMNS else values
+                     for name, values in columns.items()})
+
+
+class ParquetTableWriter:
+    """One Parquet row group per chunk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, columns: Dict[str, Any]) -> None:
+        table = arrow_table(columns, self.schema)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table, row_group_size=max(1, table.num_rows))
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ArrowTableWriter:
+    """Arrow IPC file format (random access, memory-mappable), one record batch per chunk."""
+
+    def __init__(self, path: str):
+        self.sink = pa.OSFile(path, 'wb')
+        self.writer = None
+        self.schema = None
+
+    def write(self, columns: Dict[str, Any]) -> None:
+        table = arrow_table(columns, self.schema)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pa.ipc.new_file(self.sink, table.schema)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.sink.close()
+
+
+WRITERS = {'csv': CsvTableWriter, 'parquet': ParquetTableWriter, 'arrow': ArrowTableWriter}
+
+
+def export_format(path: str, fmt: Optional[str] = None) -> str:
+    if fmt is None:
+        fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt is None:
+            raise ValueError(f"cannot tell the format of {path}; use one of {', '.join(sorted(FORMATS))} or pass it")
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format: {fmt}")
+    if fmt != 'csv' and pa is None:
+        raise ValueError(f"{fmt} export needs pyarrow; install it or export to CSV")
+    return fmt
+
+
+def chunked(inputs: Union[BatchInputs, Iterable[Union[SmeInputs, Chunk]]], size: int) -> Iterator[Chunk]:
+    """
+    Split `inputs` into chunks of at most `size` scenarios. Accepts BatchInputs,
+    LabeledBatch, an iterable of SmeInputs, or an iterable of chunks (e.g. from
+    a reader that already batches).
+    """
+    if isinstance(inputs, (BatchInputs, LabeledBatch)):
+        for start in range(0, len(inputs), size):
+            yield inputs.take(slice(start, start + size))
+        return
+    pending: List[SmeInputs] = []
+    for item in inputs:
+        if isinstance(item, SmeInputs):
+            pending.append(item)
+            if len(pending) >= size:
+                yield pending
+                pending = []
+        else:
+            if pending:
+                yield pending
+                pending = []
+            yield from chunked(item, size)
+    if pending:
+        yield pending
+
+
+def scenario_columns(offset: int, chunk: Chunk, b: BatchInputs, result: BatchResult) -> Dict[str, Any]:
+    n = len(b)
+    columns: Dict[str, Any] = {'scenario': np.arange(offset, offset + n, dtype=np.int64)}
+    # Always present, so every chunk has the same columns
+    columns['scenario_id'] = chunk.ids if isinstance(chunk, LabeledBatch) and chunk.ids is not None else [None] * n
+    for name in TEXT_FIELDS:
+        if isinstance(chunk, LabeledBatch):
+            columns[name] = chunk.text[name]
+        elif isinstance(chunk, BatchInputs):
+            columns[name] = [SmeInputs.model_fields[name].default] * n
+        else:
+            columns[name] = [getattr(i, name) for i in chunk]
+    for name in NUMERIC_FIELDS:
+        columns[name] = b[name].astype(np.int64) if name in INT_FIELDS else b[name]
+    for name in SCORE_FIELDS:
+        columns[f"scores.{name}"] = result.scores[name]
+    for name in DETAIL_FIELDS:
+        columns[f"details.{name}"] = result.details[name]
+    columns['details.execution_risk_factor'] = [EXECUTION_RISK_LEVELS[k] for k in result.execution_risk.tolist()]
+    return columns
+
+
+def projection_columns(offset: int, result: BatchResult) -> Dict[str, Any]:
+    # Row-major over (scenario, year): each scenario's years stay together and in order
+    rows, years = np.nonzero(result.valid)
+    columns: Dict[str, Any] = {
+        'scenario': rows.astype(np.int64) + offset,
+        'year': years.astype(np.int64) + 1,
+    }
+    for name in PROJECTION_FIELDS:
+        columns[name] = result.projections[name][result.valid]
+    return columns
+
+
+class ScenarioExporter:
+    """
+    Scores scenarios chunk by chunk and writes the scenarios table (and
+    optionally the projections table) as CSV, Parquet or Arrow IPC; the format
+    follows the file extension unless given.
+    """
+
+    def __init__(self, engine: Optional[SmeBatchEngine] = None, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        self.engine = engine or SmeBatchEngine()
+        self.row_group_size = row_group_size
+
+    def export(self, inputs: Union[BatchInputs, Iterable[Union[SmeInputs, Chunk]]], scenarios_path: str,
+               projections_path: Optional[str] = None, fmt: Optional[str] = None) -> Dict[str, int]:
+        tables: List[Tuple[str, Any]] = [('scenarios', WRITERS[export_format(scenarios_path, fmt)](scenarios_path))]
+        try:
+            if projections_path is not None:
+                tables.append(('projections', WRITERS[export_format(projections_path, fmt)](projections_path)))
+            writers = dict(tables)
+            scenarios = row_groups = projection_rows = 0
+            for chunk in chunked(inputs, self.row_group_size):
+                b = chunk.inputs if isinstance(chunk, LabeledBatch) else BatchInputs.coerce(chunk)
+                if not len(b):
+                    continue
+                result = self.engine.calculate(b)
+                writers['scenarios'].write(scenario_columns(scenarios, chunk, b, result))
+                if 'projections' in writers:
+                    columns = projection_columns(scenarios, result)
+                    writers['projections'].write(columns)
+                    projection_rows += len(columns['year'])
+                scenarios += len(b)
+                row_groups += 1
+        finally:
+            for _, writer in tables:
+                writer.close()
+        return {'scenarios': scenarios, 'row_groups': row_groups, 'projection_rows': projection_rows}
+
+
+def read_ndjson(path: str) -> Iterator[SmeInputs]:
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield SmeInputs.model_validate_json(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_no}: {e}") from None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m backend.export',
+                                     description='Score an NDJSON file of SmeInputs and export the results.')
+    parser.add_argument('inputs', help='NDJSON file, one SmeInputs object per line')
+    parser.add_argument('scenarios', help='scenarios table: .csv, .parquet or .arrow')
+    parser.add_argument('--projections', help='long-format projections table: .csv, .parquet or .arrow')
+    parser.add_argument('--format', choices=sorted(WRITERS), help='override the format implied by the extensions')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    args = parser.parse_args(argv)
+    try:
+        summary = ScenarioExporter(row_group_size=args.row_group_size).export(
+            read_ndjson(args.inputs), args.scenarios, args.projections, args.format)
+    except ValueError as e:
+        parser.exit(2, f"error: {e}\n")
+    print(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import argparse
+import csv
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from . import config
+from .models import ActivityLog, EntityFootprint, FootprintOutputs, FootprintRequest
+
+# Carbon footprint from activity records (entity, category, subtype, quantity)
+# with config.EMISSION_FACTORS. The factor table is compiled once into dense
+# arrays; a batch of records is then encoded to factor codes, multiplied and
+# summed per (entity, scope) with one bincount. FootprintAccumulator applies
+# the same step chunk by chunk for logs that do not fit in memory.
+
+SCOPE_FIELDS = ['scope_1', 'scope_2', 'scope_3']
+# SmeInputs fields fed from a footprint compared against a baseline footprint
+REDUCTION_FIELDS = ['scope_1_reduction', 'scope_2_reduction', 'scope_3_reduction']
+
+
+def factorize(values: Sequence[Any]) -> Tuple[List[Any], np.ndarray]:
+    """
+    Distinct values in first-seen order and the code of every element. A dict
+    pass rather than np.unique: sorting millions of strings costs several
+    times more than hashing them.
+    """
+    items = values.tolist() if isinstance(values, np.ndarray) else values
+    seen: Dict[Any, int] = {}
+    codes = np.fromiter((seen.setdefault(v, len(seen)) for v in items), dtype=np.int64, count=len(items))
+    return list(seen), codes
+
+
+class FactorTable:
+    """
+    EMISSION_FACTORS flattened to one code per (category, subtype), with the
+    factor (kg CO2 per unit) and the 0-based scope of every code.
+    """
+
+    def __init__(self, factors: Mapping[str, Mapping[str, float]] = config.EMISSION_FACTORS,
+                 scopes: Mapping[str, Mapping[str, int]] = config.EMISSION_SCOPES):
+        self.keys: List[Tuple[str, str]] = []
+        values, scope = [], []
+        for category, subtypes in factors.items():
+            rules = scopes.get(category, {})
+            for subtype, factor in subtypes.items():
+                self.keys.append((category, subtype))
+                values.append(factor)
+                scope.append(rules.get(subtype, rules.get('default', 3)))
+        if any(s not in (1, 2, 3) for s in scope):
+            raise ValueError("emission scopes must be 1, 2 or 3")
+        self.factors = np.array(values, dtype=float)
+        self.scopes = np.array(scope, dtype=np.int64) - 1
+        self.codes = {key: code for code, key in enumerate(self.keys)}
+
+    def encode(self, category: Sequence[str], subtype: Sequence[str]) -> np.ndarray:
+        """Factor code per record, -1 for activities missing from the table."""
+        categories, cat_index = factorize(category)
+        subtypes, sub_index = factorize(subtype)
+        # Few distinct labels per batch: resolve them once, then gather per record
+        lookup = np.array([[self.codes.get((c, s), -1) for s in subtypes] for c in categories],
+                          dtype=np.int64).reshape(len(categories), len(subtypes))
+        return lookup[cat_index, sub_index]
+
+
+class FootprintTotals:
+    """
+    Per-entity emissions in kg CO2: `scopes` is (entities x 3), Scope 1/2/3.
+    """
+
+    def __init__(self, entities: List[Any], scopes: np.ndarray):
+        self.entities = entities
+        self.scopes = scopes
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.scopes.sum(axis=1)
+
+    def daily(self, days: float, headcount: Optional[Mapping[Any, float]] = None) -> np.ndarray:
+        """Average kg CO2 per day, per head when a headcount is given for the entity."""
+        heads = np.array([float((headcount or {}).get(e, 1.0)) for e in self.entities])
+        return self.total / days / np.maximum(heads, 1e-9)
+
+    def bands(self, daily: np.ndarray) -> np.ndarray:
+        """'high' / 'medium' / 'low' against RECOMMENDATION_THRESHOLDS (kg CO2 per day)."""
+        thresholds = config.RECOMMENDATION_THRESHOLDS
+        return np.select([daily > thresholds['high_carbon_day'], daily < thresholds['low_carbon_day']],
+                         ['high', 'low'], 'medium')
+
+    def reductions(self, baseline: 'FootprintTotals') -> np.ndarray:
+        """
+        Percent reduction against `baseline` per entity, as (entities x 4):
+        Scope 1, 2, 3 and total, clipped to 0-100 like the SmeInputs fields.
+        Entities or scopes without baseline emissions get 0.
+        """
+        index = {e: k for k, e in enumerate(baseline.entities)}
+        rows = np.array([index.get(e, -1) for e in self.entities], dtype=np.int64)
+        base = np.zeros((len(self), 4))
+        found = rows >= 0
+        base[found, :3] = baseline.scopes[rows[found]]
+        base[:, 3] = base[:, :3].sum(axis=1)
+        current = np.column_stack([self.scopes, self.total]) if len(self) else np.zeros((0, 4))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.where(base > 0, (base - current) / base * 100, 0.0)
+        return np.clip(pct, 0.0, 100.0)
+
+
+class FootprintAccumulator:
+    """
+    Streaming per-entity totals: add() one batch of records at a time; memory
+    grows with the number of entities, not of records.
+    """
+
+    def __init__(self, table: Optional[FactorTable] = None):
+        self.table = table or FactorTable()
+        self.index: Dict[Any, int] = {}
+        self.entities: List[Any] = []
+        self.scopes = np.zeros((0, 3))
+        self.records = 0
+        self.skipped = 0
+        self.unknown: Dict[str, int] = {}
+
+    def add(self, entity: Sequence[Any], category: Sequence[str], subtype: Sequence[str], quantity: Sequence[float]) -> None:
+        n = len(quantity)
+        if not (len(entity) == len(category) == len(subtype) == n):
+            raise ValueError("entity, category, subtype and quantity must have the same length")
+        self.records += n
+        if not n:
+            return
+        codes = self.table.encode(category, subtype)
+        qty = np.asarray(quantity, dtype=float)
+        names, local = factorize(entity)
+        ok = (codes >= 0) & np.isfinite(qty) & (qty >= 0)
+        if not ok.all():
+            self.skipped += int((~ok).sum())
+            for k in np.flatnonzero(codes < 0).tolist():
+                label = f"{category[k]}/{subtype[k]}"
+                self.unknown[label] = self.unknown.get(label, 0) + 1
+            codes, qty, local = codes[ok], qty[ok], local[ok]
+        slots = np.array([self._slot(e) for e in names], dtype=np.int64)
+        if len(self.entities) > len(self.scopes):
+            self.scopes = np.vstack([self.scopes, np.zeros((len(self.entities) - len(self.scopes), 3))])
+        emissions = self.table.factors[codes] * qty
+        cells = slots[local] * 3 + self.table.scopes[codes]
+        self.scopes += np.bincount(cells, weights=emissions, minlength=len(self.entities) * 3).reshape(-1, 3)
+
+    def _slot(self, entity: Any) -> int:
+        slot = self.index.get(entity)
+        if slot is None:
+            slot = self.index[entity] = len(self.entities)
+            self.entities.append(entity)
+        return slot
+
+    def result(self) -> FootprintTotals:
+        return FootprintTotals(list(self.entities), self.scopes.copy())
+
+
+def footprint(entity: Sequence[Any], category: Sequence[str], subtype: Sequence[str], quantity: Sequence[float],
+              table: Optional[FactorTable] = None) -> FootprintTotals:
+    accumulator = FootprintAccumulator(table)
+    accumulator.add(entity, category, subtype, quantity)
+    return accumulator.result()
+
+
+def iter_activity_csv(path: str, chunk_rows: int = config.FOOTPRINT_CHUNK_ROWS) -> Iterator[Tuple[List[str], List[str], List[str], List[str]]]:
+    """Columns of an entity,category,subtype,quantity CSV (header required), `chunk_rows` records at a time."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader, [])]
+        try:
+            columns = [header.index(name) for name in ('entity', 'category', 'subtype', 'quantity')]
+        except ValueError:
+            raise ValueError(f"{path}: header must name entity, category, subtype and quantity") from None
+        chunk: List[List[str]] = [[], [], [], []]
+        for row in reader:
+            if not row:
+                continue
+            for values, k in zip(chunk, columns):
+                values.append(row[k] if k < len(row) else '')
+            if len(chunk[0]) >= chunk_rows:
+                yield tuple(chunk)
+                chunk = [[], [], [], []]
+        if chunk[0]:
+            yield tuple(chunk)
+
+
+def footprint_csv(path: str, table: Optional[FactorTable] = None, chunk_rows: int = config.FOOTPRINT_CHUNK_ROWS) -> FootprintAccumulator:
+    """Streaming mode: totals of an activity log of any length."""
+    accumulator = FootprintAccumulator(table)
+    for entity, category, subtype, quantity in iter_activity_csv(path, chunk_rows):
+        # Unparseable quantities become NaN and are skipped like unknown activities
+        accumulator.add(entity, category, subtype, _floats(quantity))
+    return accumulator
+
+
+def _floats(values: List[str]) -> np.ndarray:
+    try:
+        return np.array(values, dtype=float)
+    except ValueError:
+        out = np.empty(len(values))
+        for k, v in enumerate(values):
+            try:
+                out[k] = float(v)
+            except ValueError:
+                out[k] = np.nan
+        return out
+
+
+class FootprintCalculator:
+    """
+    Answers a FootprintRequest: per-entity Scope 1/2/3 totals, daily average
+    against AVERAGE_DAILY_FOOTPRINT, and the SmeInputs carbon fields when a
+    baseline log is given.
+    """
+
+    def __init__(self, table: Optional[FactorTable] = None):
+        self.table = table or FactorTable()
+
+    def run(self, request: FootprintRequest) -> FootprintOutputs:
+        if request.days <= 0:
+            raise ValueError("days must be positive")
+        if request.benchmark not in config.AVERAGE_DAILY_FOOTPRINT:
+            raise ValueError(f"unknown benchmark: {request.benchmark}; use one of {', '.join(config.AVERAGE_DAILY_FOOTPRINT)}")
+        current = self._accumulate(request.activities)
+        totals = current.result()
+        daily = totals.daily(request.days, request.headcount)
+        bands = totals.bands(daily)
+        average = config.AVERAGE_DAILY_FOOTPRINT[request.benchmark]
+        reductions = None
+        if request.baseline is not None:
+            reductions = totals.reductions(self._accumulate(request.baseline).result())
+        entities = []
+        for k, name in enumerate(totals.entities):
+            scopes = totals.scopes[k].tolist()
+            entities.append(EntityFootprint(
+                entity=name,
+                scope_1=round(scopes[0], 3), scope_2=round(scopes[1], 3), scope_3=round(scopes[2], 3),
+                total=round(sum(scopes), 3),
+                daily_kg=round(float(daily[k]), 3),
+                vs_average=round(float(daily[k]) / average, 3),
+                band=str(bands[k]),
+                inputs=None if reductions is None else {
+                    **{field: round(float(v), 1) for field, v in zip(REDUCTION_FIELDS, reductions[k, :3])},
+                    'carbon_reduction_potential': round(float(reductions[k, 3]), 1),
+                },
+            ))
+        return FootprintOutputs(entities=entities, records=current.records, skipped=current.skipped,
+                                unknown_activities=current.unknown)
+
+    def _accumulate(self, log: ActivityLog) -> FootprintAccumulator:
+        n = len(log.quantity)
+        if n > config.FOOTPRINT_MAX_RECORDS:
+            raise ValueError(f"at most {config.FOOTPRINT_MAX_RECORDS} activity records per request")
+        accumulator = FootprintAccumulator(self.table)
+        accumulator.add(log.entity if log.entity is not None else ['all'] * n, log.category, log.subtype, log.quantity)
+        return accumulator
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m backend.footprint',
+                                     description='Per-entity Scope 1/2/3 totals of an activity log CSV.')
+    parser.add_argument('activities', help='CSV with entity, category, subtype, quantity columns')
+    parser.add_argument('--baseline', help='earlier activity log: adds the SmeInputs scope reduction fields')
+    parser.add_argument('--chunk-rows', type=int, default=config.FOOTPRINT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    try:
+        current = footprint_csv(args.activities, chunk_rows=args.chunk_rows)
+        baseline = footprint_csv(args.baseline, current.table, args.chunk_rows).result() if args.baseline else None
+    except (OSError, ValueError) as e:
+        parser.exit(2, f"error: {e}\n")
+    totals = current.result()
+    reductions = totals.reductions(baseline) if baseline is not None else None
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['entity'] + SCOPE_FIELDS + ['total'] + (REDUCTION_FIELDS + ['carbon_reduction_potential'] if reductions is not None else []))
+    for k, name in enumerate(totals.entities):
+        row = [name] + totals.scopes[k].tolist() + [float(totals.scopes[k].sum())]
+        writer.writerow(row + (reductions[k].round(1).tolist() if reductions is not None else []))
+    print(json.dumps({'records': current.records, 'skipped': current.skipped, 'unknown_activities': current.unknown}),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
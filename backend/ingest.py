@@ -0,0 +1,371 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from . import config
+from .export import TEXT_FIELDS, LabeledBatch, ScenarioExporter
+from .models import SmeInputs
+from .sme_batch import INT_FIELDS, NUMERIC_FIELDS, BatchInputs, BatchResult, SmeBatchEngine
+
+try:
+    import openpyxl
+except ImportError:  # optional: only .xlsx / .xlsm ingestion needs it
+    openpyxl = None
+
+# Bulk ingestion of SME portfolios: rows are streamed from CSV or from a
+# read-only workbook, mapped to SmeInputs fields by header, converted and
+# validated a chunk at a time with array operations, and handed on as
+# LabeledBatch chunks (scoring, export). Rows that fail validation go to a
+# reject file with the reason; memory depends on the chunk size only.
+
+DEFAULT_CHUNK_SIZE = 5_000
+HEADER_SCAN_ROWS = 20
+
+# Field bounds checked on top of "is a finite number" (inclusive; None = open)
+FIELD_BOUNDS: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    'forecast_horizon': (1, config.MAX_FORECAST_HORIZON),
+    'depreciation_years': (0, None),
+    'num_employees': (0, None),
+}
+
+# Input labels of the Simulatorv2 workbook (see METRICS_DOCUMENTATION.md)
+SIMULATOR_V2_LABELS = {
+    'Industry': 'industry',
+    'Company Size': 'company_size',
+    'Region': 'region',
+    'Horizon': 'forecast_horizon',
+    'Initial Revenue': 'initial_revenue',
+    'Fixed Costs': 'fixed_costs',
+    'Variable Costs %': 'variable_costs_pct',
+    'Revenue Growth %': 'revenue_growth_rate',
+    'Sustainability CAPEX': 'sustainability_capex',
+    'Energy Efficiency %': 'energy_efficiency_pct',
+    'Waste Reduction %': 'waste_reduction_pct',
+    'Resource Efficiency %': 'resource_efficiency_pct',
+    'Circular Economy %': 'circular_economy_pct',
+    'Reputation Uplift %': 'reputation_uplift_pct',
+    'Green Market Access %': 'green_market_access_pct',
+    'Employees': 'num_employees',
+    'Employee Growth %': 'employee_growth_rate',
+    'Productivity Gain %': 'productivity_gain_pct',
+    'Turnover Reduction %': 'turnover_reduction_pct',
+    'Initial CAPEX': 'initial_capex',
+    'Reinvest %': 'reinvest_pct',
+    'Government Subsidies': 'gov_subsidies',
+    'WACC': 'wacc',
+    'Disruption Impact': 'disruption_impact',
+    'Carbon Reduction %': 'carbon_reduction_potential',
+    'Scope 1 Reduction %': 'scope_1_reduction',
+    'Scope 2 Reduction %': 'scope_2_reduction',
+    'Scope 3 Reduction %': 'scope_3_reduction',
+    'Tax Rate': 'tax_rate',
+    'Discount Rate': 'discount_rate',
+    'Depreciation Years': 'depreciation_years',
+    'Inflation Rate': 'inflation_rate',
+}
+ID_LABELS = ['scenario_id', 'id', 'SME ID', 'Company', 'Company Name']
+
+
+def normalize_header(value: Any) -> str:
+    return re.sub(r'\s+', ' ', str(value)).strip().lower() if value is not None else ''
+
+
+class IngestSchema:
+    """
+    Source column header -> SmeInputs field, with an optional scale per column
+    (e.g. 0.01 when a sheet holds 15 for 15%). Headers match case- and
+    whitespace-insensitively; every SmeInputs field name matches itself.
+    """
+
+    def __init__(self, columns: Dict[str, Any], id_columns: Sequence[str] = ID_LABELS):
+        self.columns: Dict[str, Tuple[str, float]] = {}
+        for name in SmeInputs.model_fields:
+            self.columns[normalize_header(name)] = (name, 1.0)
+        for header, target in columns.items():
+            field, scale = (target['field'], float(target.get('scale', 1.0))) if isinstance(target, dict) else (target, 1.0)
+            if field not in SmeInputs.model_fields:
+                raise ValueError(f"schema maps {header!r} to unknown field {field!r}")
+            self.columns[normalize_header(header)] = (field, scale)
+        self.id_columns = {normalize_header(h) for h in id_columns}
+
+    @classmethod
+    def default(cls) -> 'IngestSchema':
+        return cls(SIMULATOR_V2_LABELS)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'IngestSchema':
+        """JSON: {"columns": {header: field | {"field": .., "scale": ..}}, "id_columns": [..]}; adds to the defaults."""
+        with open(path) as f:
+            spec = json.load(f)
+        return cls({**SIMULATOR_V2_LABELS, **spec.get('columns', {})}, spec.get('id_columns', ID_LABELS))
+
+    def bind(self, header: Sequence[Any]) -> Tuple[Dict[str, Tuple[int, float]], Optional[int], List[str]]:
+        """Field -> (column index, scale), id column index and the unmapped headers of a header row."""
+        fields: Dict[str, Tuple[int, float]] = {}
+        id_index = None
+        unmapped = []
+        for k, cell in enumerate(header):
+            key = normalize_header(cell)
+            if not key:
+                continue
+            if key in self.columns:
+                field, scale = self.columns[key]
+                if field in fields:
+                    raise ValueError(f"columns {header[fields[field][0]]!r} and {cell!r} both map to {field}")
+                fields[field] = (k, scale)
+            elif key in self.id_columns and id_index is None:
+                id_index = k
+            else:
+                unmapped.append(str(cell))
+        return fields, id_index, unmapped
+
+
+def iter_csv_rows(path: str) -> Iterator[Sequence[Any]]:
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+
+def iter_workbook_rows(path: str, sheet: Optional[str] = None) -> Iterator[Sequence[Any]]:
+    if openpyxl is None:
+        raise ValueError("reading .xlsx / .xlsm needs openpyxl; install it or export the sheet to CSV")
+    # read_only streams rows from the sheet XML instead of building the whole workbook
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        yield from worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(path: str, sheet: Optional[str] = None) -> Iterator[Sequence[Any]]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return iter_workbook_rows(path, sheet)
+    if ext in ('.csv', '.txt'):
+        return iter_csv_rows(path)
+    raise ValueError(f"unsupported file type: {ext or path}")
+
+
+def parse_number(value: Any) -> float:
+    """One cell as a number: NaN when empty; '15%' is 0.15; currency signs and thousands separators are dropped."""
+    if value is None:
+        return float('nan')
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace('\u00a0', '').replace(' ', '')
+    if not text:
+        return float('nan')
+    percent = text.endswith('%')
+    text = text.rstrip('%').lstrip('€$£').replace(',', '')
+    number = float(text)  # ValueError for anything else
+    return number / 100 if percent else number
+
+
+def to_numbers(cells: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Column of cells -> (float values, unparseable mask)."""
+    try:
+        # Plain numbers (and None, as NaN) convert in one pass
+        return np.array(cells, dtype=float), np.zeros(len(cells), dtype=bool)
+    except (TypeError, ValueError):
+        pass
+    values = np.empty(len(cells))
+    bad = np.zeros(len(cells), dtype=bool)
+    for k, cell in enumerate(cells):
+        try:
+            values[k] = parse_number(cell)
+        except (TypeError, ValueError):
+            values[k] = np.nan
+            bad[k] = True
+    return values, bad
+
+
+class IngestReport:
+    """
+    Row counts of an ingestion run and the source columns left unmapped.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.unmapped_columns: List[str] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class RejectWriter:
+    """CSV of rejected rows: source row number, reason, then the original cells."""
+
+    def __init__(self, path: Optional[str], header: Sequence[Any]):
+        self.path = path
+        self.header = header
+        self.file = None
+        self.writer = None
+
+    def write(self, row_no: int, reason: str, cells: Sequence[Any]) -> None:
+        if self.path is None:
+            return
+        if self.writer is None:
+            self.file = open(self.path, 'w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(['row', 'error'] + ['' if h is None else str(h) for h in self.header])
+        self.writer.writerow([row_no, reason] + ['' if c is None else c for c in cells])
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+class PortfolioIngestor:
+    """
+    Streams a CSV / xlsx / xlsm portfolio as validated LabeledBatch chunks of
+    at most `chunk_size` rows.
+    """
+
+    def __init__(self, schema: Optional[IngestSchema] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.schema = schema or IngestSchema.default()
+        self.chunk_size = chunk_size
+
+    def chunks(self, path: str, rejects_path: Optional[str] = None, sheet: Optional[str] = None,
+               report: Optional[IngestReport] = None) -> Iterator[LabeledBatch]:
+        report = report if report is not None else IngestReport()
+        rows = iter_rows(path, sheet)
+        header, header_no, fields, id_index = self._find_header(rows)
+        report.unmapped_columns = self.schema.bind(header)[2]
+        rejects = RejectWriter(rejects_path, header)
+        try:
+            pending: List[Tuple[int, Sequence[Any]]] = []
+            for row_no, cells in enumerate(rows, header_no + 1):
+                if not any(c is not None and str(c).strip() for c in cells):
+                    continue  # blank rows between blocks
+                pending.append((row_no, cells))
+                if len(pending) >= self.chunk_size:
+                    batch = self._validate(pending, fields, id_index, rejects, report)
+                    pending = []
+                    if batch is not None:
+                        yield batch
+            if pending:
+                batch = self._validate(pending, fields, id_index, rejects, report)
+                if batch is not None:
+                    yield batch
+        finally:
+            rejects.close()
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
+
+    def score(self, path: str, rejects_path: Optional[str] = None, sheet: Optional[str] = None,
+              report: Optional[IngestReport] = None,
+              engine: Optional[SmeBatchEngine] = None) -> Iterator[Tuple[LabeledBatch, BatchResult]]:
+        """chunks() scored one chunk at a time as they are read."""
+        engine = engine or SmeBatchEngine()
+        for batch in self.chunks(path, rejects_path, sheet, report):
+            yield batch, engine.calculate(batch.inputs)
+
+    def _find_header(self, rows: Iterator[Sequence[Any]]) -> Tuple[Sequence[Any], int, Dict[str, Tuple[int, float]], Optional[int]]:
+        # Title and note rows may precede the table: the header is the first row naming two or more fields
+        for row_no, cells in enumerate(rows, 1):
+            if row_no > HEADER_SCAN_ROWS:
+                break
+            fields, id_index, _ = self.schema.bind(cells or ())
+            if len(fields) >= 2:
+                return cells, row_no, fields, id_index
+        raise ValueError(f"no header row naming at least two SmeInputs fields in the first {HEADER_SCAN_ROWS} rows")
+
+    def _validate(self, pending: List[Tuple[int, Sequence[Any]]], fields: Dict[str, Tuple[int, float]],
+                  id_index: Optional[int], rejects: RejectWriter, report: IngestReport) -> Optional[LabeledBatch]:
+        n = len(pending)
+        report.rows += n
+        report.chunks += 1
+        errors: List[Optional[str]] = [None] * n
+
+        def cell(cells: Sequence[Any], k: int) -> Any:
+            return cells[k] if k < len(cells) else None
+
+        def flag(mask: np.ndarray, message: str) -> None:
+            for r in np.flatnonzero(mask).tolist():
+                if errors[r] is None:
+                    errors[r] = message
+
+        defaults = SmeInputs.model_fields
+        columns: Dict[str, np.ndarray] = {}
+        for name in NUMERIC_FIELDS:
+            if name not in fields:
+                continue
+            k, scale = fields[name]
+            values, bad = to_numbers([cell(cells, k) for _, cells in pending])
+            flag(bad, f"{name}: not a number")
+            flag(np.isinf(values), f"{name}: not finite")
+            # Empty cells take the SmeInputs default, like an omitted JSON field
+            values = np.where(np.isnan(values), defaults[name].default, values * scale)
+            if name in INT_FIELDS:
+                flag(values != np.round(values), f"{name}: must be a whole number")
+            low, high = FIELD_BOUNDS.get(name, (None, None))
+            if low is not None:
+                flag(values < low, f"{name}: must be at least {low}")
+            if high is not None:
+                flag(values > high, f"{name}: must be at most {high}")
+            columns[name] = values
+        text: Dict[str, List[str]] = {}
+        for name in TEXT_FIELDS:
+            if name in fields:
+                k = fields[name][0]
+                raw = [cell(cells, k) for _, cells in pending]
+                text[name] = [str(v).strip() if v is not None and str(v).strip() else defaults[name].default for v in raw]
+            else:
+                text[name] = [defaults[name].default] * n
+        ids = None
+        if id_index is not None:
+            ids = [None if cell(cells, id_index) is None else str(cell(cells, id_index)) for _, cells in pending]
+
+        keep = np.array([e is None for e in errors], dtype=bool)
+        for r in np.flatnonzero(~keep).tolist():
+            rejects.write(pending[r][0], errors[r], pending[r][1])
+        report.rejected += int((~keep).sum())
+        report.accepted += int(keep.sum())
+        if not keep.any():
+            return None
+        rows = np.flatnonzero(keep)
+        inputs = BatchInputs.from_columns({name: values[rows] for name, values in columns.items()}, size=len(rows))
+        index = rows.tolist()
+        return LabeledBatch(inputs, {name: [values[r] for r in index] for name, values in text.items()},
+                            [ids[r] for r in index] if ids is not None else None)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m backend.ingest',
+                                     description='Validate and score an SME portfolio from CSV / xlsx / xlsm.')
+    parser.add_argument('portfolio', help='.csv, .xlsx or .xlsm file')
+    parser.add_argument('--sheet', help='worksheet name (default: the active sheet)')
+    parser.add_argument('--schema', help='JSON column schema, merged over the Simulatorv2 labels')
+    parser.add_argument('--rejects', help='CSV file for rows that fail validation')
+    parser.add_argument('--output', help='scenarios table to export (.csv, .parquet, .arrow)')
+    parser.add_argument('--projections', help='long-format projections table to export')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    report = IngestReport()
+    try:
+        ingestor = PortfolioIngestor(IngestSchema.from_file(args.schema) if args.schema else None, args.chunk_size)
+        if args.output:
+            chunks = ingestor.chunks(args.portfolio, args.rejects, args.sheet, report)
+            summary = ScenarioExporter(row_group_size=args.chunk_size).export(chunks, args.output, args.projections)
+        else:
+            scored = ingestor.score(args.portfolio, args.rejects, args.sheet, report)
+            summary = {'scenarios': sum(len(result) for _, result in scored)}
+    except ValueError as e:
+        parser.exit(2, f"error: {e}\n")
+    # Rejected rows are reported (and written to --rejects), not fatal
+    print(json.dumps({**report.as_dict(), **summary}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
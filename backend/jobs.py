@@ -0,0 +1,360 @@
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from . import config
+from .metrics import registry
+from .models import (GoalSeekRequest, JobStatus, MonteCarloRequest, OptimizeRequest, ParetoRequest, ScoreJobRequest,
+                     SensitivityRequest, SweepRequest)
+from .monte_carlo import MonteCarloSimulator
+from .pareto import ParetoExplorer
+from .sensitivity import SensitivityAnalyzer
+from .sme_batch import BatchResult, SmeBatchEngine
+from .solver import SmeSolver
+from .sweep import run_sweep
+
+# Background jobs for analyses that take longer than a request should: submit
+# returns a job id at once, the job waits in a bounded priority queue and runs
+# on a small pool of worker threads, clients poll for progress and partial
+# results and may cancel. Bulk scoring runs in chunks so it reports progress,
+# can stop between chunks and never holds the interpreter for long, which keeps
+# interactive /sme/calculate latency low while it runs.
+#
+# JobManager owns the job records; the backend only decides when and where a
+# job runs (submit / cancel / stats / close). LocalJobBackend runs jobs in this
+# process, so jobs live in the worker that accepted them.
+#
+# Memory is bounded by size, not only by count: the queue admits at most
+# JOBS_MAX_QUEUED_SCENARIOS waiting scenarios, a score job whose results could
+# not fit in JOBS_MAX_RESULT_BYTES is refused, and finished jobs are evicted
+# oldest first while the results held by all jobs exceed that budget.
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+registry.describe('sme_jobs_total', 'Background jobs by kind and final state')
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the client should retry later."""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobNotCancellable(Exception):
+    """The job is running and its kind cannot stop part way."""
+
+
+class Job:
+    """
+    One submitted analysis. Chunked kinds append BatchResult chunks as they
+    finish; the others set `result` once.
+    """
+
+    def __init__(self, kind: str, request: BaseModel, priority: int = 0, rows: int = 1):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.request: Optional[BaseModel] = request  # dropped once the job finishes
+        self.priority = priority
+        self.rows = rows  # scenarios the job scores, for queue admission
+        self.nbytes = 0  # result bytes held
+        self.state = QUEUED
+        self.completed = 0
+        self.total = 0
+        self.chunks: List[BatchResult] = []
+        self.result: Optional[BaseModel] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = threading.Event()
+        self.lock = threading.Lock()
+
+    # Called from the running job
+
+    def progress(self, completed: int, total: int) -> None:
+        with self.lock:
+            self.completed, self.total = completed, total
+
+    def emit(self, chunk: BatchResult) -> None:
+        with self.lock:
+            self.chunks.append(chunk)
+            self.nbytes += chunk.nbytes
+
+    def check(self) -> None:
+        """Raise JobCancelled once cancel() was requested; chunked jobs call it between chunks."""
+        if self.cancel_requested.is_set():
+            raise JobCancelled()
+
+    # Read by pollers
+
+    def status(self) -> JobStatus:
+        with self.lock:
+            return JobStatus(
+                id=self.id, kind=self.kind, state=self.state, priority=self.priority,
+                progress=round(self.completed / self.total, 4) if self.total else (1.0 if self.state == SUCCEEDED else 0.0),
+                completed=self.completed, total=self.total, error=self.error,
+                created_at=self.created_at, started_at=self.started_at, finished_at=self.finished_at,
+            )
+
+    def results(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[Any]]:
+        """(available, items[offset:offset + limit]); scored chunks are materialized only for the requested slice."""
+        with self.lock:
+            chunks = list(self.chunks)
+            result = self.result
+        if result is not None:
+            items: List[Any] = [result]
+            return 1, items[offset:offset + limit if limit is not None else None]
+        available = sum(len(c) for c in chunks)
+        stop = available if limit is None else min(available, offset + limit)
+        items = []
+        start = 0
+        for chunk in chunks:
+            for k in range(max(offset - start, 0), min(stop - start, len(chunk))):
+                items.append(chunk.to_outputs(k))
+            start += len(chunk)
+        return available, items
+
+
+def _score(job: Job, request: ScoreJobRequest, engine: Any) -> None:
+    scenarios = request.scenarios
+    size = config.JOBS_CHUNK_SIZE
+    job.progress(0, len(scenarios))
+    for start in range(0, len(scenarios), size):
+        job.check()
+        chunk = scenarios[start:start + size]
+        job.emit(engine.calculate(chunk))
+        job.progress(start + len(chunk), len(scenarios))
+
+
+def _single(run: Callable[[Any, Any], BaseModel]) -> Callable[[Job, Any, Any], None]:
+    # Analyses that run as one call: no partial results, cancellable only while queued
+    def handler(job: Job, request: Any, engine: Any) -> None:
+        job.progress(0, 1)
+        result = run(request, engine)
+        # Size of what a poller receives; the model itself is of the same order
+        nbytes = len(result.model_dump_json())
+        with job.lock:
+            job.result, job.nbytes = result, nbytes
+        job.progress(1, 1)
+    return handler
+
+
+# kind -> (request model of `params`, handler(job, request, engine))
+JOB_KINDS: Dict[str, Tuple[Type[BaseModel], Callable[[Job, Any, Any], None]]] = {
+    'score': (ScoreJobRequest, _score),
+    'monte_carlo': (MonteCarloRequest, _single(lambda r, e: MonteCarloSimulator(e).run(r))),
+    'sensitivity': (SensitivityRequest, _single(lambda r, e: SensitivityAnalyzer().run(r))),
+    'goal_seek': (GoalSeekRequest, _single(lambda r, e: SmeSolver().goal_seek(r))),
+    'optimize': (OptimizeRequest, _single(lambda r, e: SmeSolver().optimize(r))),
+    'pareto': (ParetoRequest, _single(lambda r, e: ParetoExplorer(e).run(r))),
+    'sweep': (SweepRequest, _single(lambda r, e: run_sweep(r, e))),
+}
+# Kinds that call job.check() while running; the others can only be cancelled while queued
+CHUNKED_KINDS = frozenset({'score'})
+
+
+class LocalJobBackend:
+    """
+    Priority queue (higher priority first, FIFO within a priority) drained by
+    `workers` daemon threads in this process. Holds at most `max_queued`
+    waiting jobs and `max_queued_rows` waiting scenarios; a job is always
+    admitted to an empty queue.
+    """
+
+    def __init__(self, workers: int = 1, max_queued: int = 100, max_queued_rows: Optional[int] = None):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_queued_rows = max_queued_rows
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._queued_rows = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = 0
+        self._closed = False
+        self.run_job: Callable[[Job], None] = lambda job: None
+
+    def submit(self, job: Job) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("job backend is closed")
+            if len(self._heap) >= self.max_queued:
+                raise QueueFull(f"job queue is full ({self.max_queued} waiting)")
+            if self._heap and self.max_queued_rows is not None and self._queued_rows + job.rows > self.max_queued_rows:
+                raise QueueFull(f"job queue is full ({self._queued_rows} scenarios waiting)")
+            heapq.heappush(self._heap, (-job.priority, next(self._seq), job))
+            self._queued_rows += job.rows
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"sme-job-{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+
+    def cancel(self, job: Job) -> bool:
+        """Drop a queued job; False when it is not waiting here (running or finished)."""
+        with self._cond:
+            for k, (_, _, queued) in enumerate(self._heap):
+                if queued is job:
+                    self._heap[k] = self._heap[-1]
+                    self._heap.pop()
+                    heapq.heapify(self._heap)
+                    self._queued_rows -= job.rows
+                    return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'queued': len(self._heap), 'queued_rows': self._queued_rows, 'running': self._running,
+                    'workers': len(self._threads)}
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                self._queued_rows -= job.rows
+                self._running += 1
+            try:
+                self.run_job(job)
+            finally:
+                with self._cond:
+                    self._running -= 1
+
+
+class JobManager:
+    """
+    Job records by id, finished ones evicted oldest first beyond
+    `max_finished`, after `ttl` seconds, or while the results held by all
+    jobs exceed `max_result_bytes`.
+    """
+
+    def __init__(self, backend: Any, engine: Any = None, max_finished: int = 1000, ttl: Optional[float] = 3600.0,
+                 max_result_bytes: Optional[int] = None):
+        self.backend = backend
+        self.engine = engine or SmeBatchEngine()
+        self.max_finished = max_finished
+        self.ttl = ttl
+        self.max_result_bytes = max_result_bytes
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        backend.run_job = self._run
+
+    def submit(self, kind: str, params: Dict[str, Any], priority: int = 0) -> Job:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind: {kind}; use one of {', '.join(JOB_KINDS)}")
+        model, _ = JOB_KINDS[kind]
+        request = model.model_validate(params)  # pydantic's ValidationError is a ValueError
+        rows = 1
+        if isinstance(request, ScoreJobRequest):
+            rows = len(request.scenarios)
+            if rows > config.JOBS_MAX_SCENARIOS:
+                raise ValueError(f"At most {config.JOBS_MAX_SCENARIOS} scenarios per job")
+            width = max((i.forecast_horizon for i in request.scenarios), default=0)
+            if self.max_result_bytes is not None and BatchResult.estimate_nbytes(rows, width) > self.max_result_bytes:
+                raise ValueError(f"results of this job would exceed {self.max_result_bytes} bytes; split it into smaller jobs")
+        job = Job(kind, request, priority, rows)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        try:
+            self.backend.submit(job)
+        except BaseException:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            self._expire()
+            return self._jobs[job_id]
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Cancel a queued job at once; a running chunked job stops at its next
+        check(). Finished jobs are left as they are. Raises JobNotCancellable
+        for a running job of any other kind.
+        """
+        job = self.get(job_id)
+        with job.lock:
+            # Under job.lock so _run cannot start it in between: it then sees the request in its first check()
+            if job.state == RUNNING and job.kind not in CHUNKED_KINDS:
+                raise JobNotCancellable(f"a running {job.kind} job cannot be cancelled")
+            job.cancel_requested.set()
+        if self.backend.cancel(job):
+            self._finish(job, CANCELLED)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+    def _run(self, job: Job) -> None:
+        with job.lock:
+            if job.state != QUEUED:
+                return
+            job.state = RUNNING
+            job.started_at = time.time()
+        _, handler = JOB_KINDS[job.kind]
+        try:
+            job.check()
+            handler(job, job.request, self.engine)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self._finish(job, FAILED, str(e) or type(e).__name__)
+        else:
+            self._finish(job, SUCCEEDED)
+
+    def _finish(self, job: Job, state: str, error: Optional[str] = None) -> None:
+        with job.lock:
+            if job.state in FINISHED:
+                return
+            job.state = state
+            job.error = error
+            job.finished_at = time.time()
+            job.request = None
+        registry.inc('sme_jobs_total', kind=job.kind, state=state)
+        with self._lock:
+            self._expire()
+
+    def _expire(self) -> None:
+        # Caller holds self._lock; only finished jobs are ever dropped
+        now = time.time()
+        finished = []
+        held = 0
+        for job in self._jobs.values():
+            with job.lock:
+                held += job.nbytes
+                if job.state in FINISHED:
+                    finished.append((job, job.finished_at, job.nbytes))
+        drop = len(finished) - self.max_finished
+        over = held - self.max_result_bytes if self.max_result_bytes is not None else 0
+        for job, finished_at, nbytes in finished:
+            if drop > 0 or over > 0 or (self.ttl and finished_at + self.ttl <= now):
+                del self._jobs[job.id]
+                drop -= 1
+                over -= nbytes
+
+
+def build_job_manager(engine: Any = None) -> JobManager:
+    """JobManager with the backend configured in config.py (JOBS_BACKEND = local)."""
+    if config.JOBS_BACKEND != 'local':
+        raise ValueError(f"unknown JOBS_BACKEND: {config.JOBS_BACKEND}")
+    backend = LocalJobBackend(config.JOBS_WORKERS, config.JOBS_MAX_QUEUED, config.JOBS_MAX_QUEUED_SCENARIOS)
+    return JobManager(backend, engine, config.JOBS_MAX_FINISHED, config.JOBS_RESULT_TTL_SECONDS,
+                      config.JOBS_MAX_RESULT_BYTES)
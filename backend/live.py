@@ -0,0 +1,164 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.websockets import WebSocket, WebSocketDisconnect
+from .delta import DeltaSession
+from .models import SmeInputs, SmeOutputs
+from .sme_simulator import SmeSimulator
+
+# Live channel: a client streams input frames over a WebSocket and gets results
+# back tagged with sequence numbers. At most one calculation per connection runs
+# at a time; frames arriving meanwhile are merged into a single pending frame,
+# so a burst of slider events costs one calculation for the latest state.
+#
+# Client frame:  {"id": <optional client tag>, "inputs": {<changed SmeInputs fields>}}
+# Server frame:  {"seq": n, "frame": k, "id": .., "superseded": s, "result" | "patch" | "error": ..}
+# where the result reflects every client frame up to the k-th, s of which were
+# folded into a later frame without being computed on their own.
+
+
+class LiveStats:
+    """
+    Process-wide counters for the live channel.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.connections_total = 0
+        self.frames_received = 0
+        self.frames_computed = 0
+        self.frames_superseded = 0
+        self.errors = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+live_stats = LiveStats()
+
+
+class LiveConnection:
+    """
+    One WebSocket client. The receive loop never waits for a calculation, and
+    the compute loop never holds more than the latest pending frame: when the
+    client reads slowly, sends block and further frames coalesce instead of
+    queueing.
+    """
+
+    def __init__(self, websocket: WebSocket, calculate: Callable[[SmeInputs], SmeOutputs],
+                 patch: bool = False, stats: LiveStats = live_stats):
+        self.websocket = websocket
+        self.calculate = calculate
+        self.stats = stats
+        # Patch mode answers with RFC 6902 patches against the previous result (see delta.py)
+        self.session: Optional[DeltaSession] = DeltaSession('live') if patch else None
+        self.simulator = SmeSimulator()
+        self.inputs = SmeInputs()
+        self.seq = 0
+        self.received = 0
+        self.pending: Optional[Dict[str, Any]] = None
+        self.pending_id: Any = None
+        self.pending_frames = 0
+        self.wakeup = asyncio.Event()
+        self.send_lock = asyncio.Lock()
+
+    async def run(self) -> None:
+        await self.websocket.accept()
+        self.stats.connections += 1
+        self.stats.connections_total += 1
+        worker = asyncio.ensure_future(self._compute_loop())
+        receive: Optional[asyncio.Future] = None
+        try:
+            while True:
+                # Wait on the compute loop too: if it dies, nothing would answer further frames
+                receive = asyncio.ensure_future(self.websocket.receive_text())
+                await asyncio.wait((receive, worker), return_when=asyncio.FIRST_COMPLETED)
+                if worker.done():
+                    await self._abort(worker)
+                    return
+                await self._offer(receive.result())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.stats.connections -= 1
+            for task in (receive, worker):
+                if task is not None and not task.done():
+                    task.cancel()
+            try:
+                await worker
+            except (asyncio.CancelledError, Exception):
+                pass  # already reported by _abort, or the client is gone
+
+    async def _abort(self, worker: asyncio.Future) -> None:
+        # The compute loop only ends by raising; a disconnect mid-send needs no answer
+        if isinstance(worker.exception(), WebSocketDisconnect):
+            return
+        try:
+            await self._send_error(None, "live channel failed; reconnect to continue")
+            await self.websocket.close(code=1011)
+        except Exception:
+            pass
+
+    async def _offer(self, text: str) -> None:
+        self.received += 1
+        self.stats.frames_received += 1
+        try:
+            frame = json.loads(text)
+        except ValueError as e:
+            await self._send_error(None, f"invalid JSON: {e}")
+            return
+        changes = frame.get('inputs') if isinstance(frame, dict) else None
+        if not isinstance(changes, dict):
+            await self._send_error(frame.get('id') if isinstance(frame, dict) else None,
+                                   "each frame must be an object with an 'inputs' object")
+            return
+        if self.pending is None:
+            self.pending = dict(changes)
+        else:
+            # The frame waiting to be computed is stale: fold this one into it
+            self.pending.update(changes)
+            self.stats.frames_superseded += 1
+        self.pending_id = frame.get('id')
+        self.pending_frames += 1
+        self.wakeup.set()
+
+    async def _compute_loop(self) -> None:
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            changes, frame_id, frames, frame_no = self.pending, self.pending_id, self.pending_frames, self.received
+            self.pending, self.pending_frames = None, 0
+            if changes is None:
+                continue
+            try:
+                inputs = SmeInputs(**{**self.inputs.model_dump(), **changes})
+            except ValidationError as e:
+                await self._send_error(frame_id, json.loads(e.json(include_url=False)))
+                continue
+            try:
+                body = await run_in_threadpool(self._evaluate, inputs)
+            except Exception:
+                await self._send_error(frame_id, "calculation failed for these inputs")
+                continue
+            self.inputs = inputs
+            self.stats.frames_computed += 1
+            await self._send('"frame":%d,"id":%s,"superseded":%d,%s' % (frame_no, json.dumps(frame_id), frames - 1, body))
+
+    def _evaluate(self, inputs: SmeInputs) -> str:
+        if self.session is None:
+            return '"result":' + self.calculate(inputs).model_dump_json()
+        patch, _ = self.session.update(self.simulator, inputs)
+        return '"patch":' + json.dumps(patch, separators=(',', ':'))
+
+    async def _send_error(self, frame_id: Any, error: Any) -> None:
+        self.stats.errors += 1
+        await self._send('"frame":%d,"id":%s,"error":%s' % (self.received, json.dumps(frame_id),
+                                                             json.dumps(error, separators=(',', ':'))))
+
+    async def _send(self, fields: str) -> None:
+        # `fields` is the rest of a JSON object; numbering under the lock keeps seq in send order
+        async with self.send_lock:
+            self.seq += 1
+            await self.websocket.send_text('{"seq":%d,%s}' % (self.seq, fields))
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from backend.api import router
+from backend import config
+from backend.metrics import MetricsMiddleware, registry
 import os
 from dotenv import load_dotenv
 
@@ -19,8 +22,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if config.METRICS_ENABLED:
+    # Request counts/latency per route, optional per-request cProfile dumps
+    app.add_middleware(MetricsMiddleware, profile=config.PROFILE_REQUESTS)
+
 app.include_router(router, prefix="/api")
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    # Prometheus text format; stage histograms are only filled when METRICS_ENABLED is set
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to SME Resilience Simulator API"}
@@ -0,0 +1,264 @@
+import cProfile
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from . import config
+
+# Hot-path instrumentation: per-stage timing histograms, request and batch
+# counters, rendered as Prometheus text on /metrics. Everything is switched by
+# METRICS_ENABLED at import time: when it is off the stage decorators return the
+# undecorated functions and no middleware is installed, so the hot path is
+# exactly the uninstrumented code.
+
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus sense (upper bounds, +Inf implied).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # bisect_left: a value equal to a bound falls in that bucket (le)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms keyed by name and labels. Collectors
+    add values owned elsewhere (cache, live channel) at scrape time.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]) -> None:
+        """`collector()` yields (name, type, help, labels, value) samples, type being 'counter' or 'gauge'."""
+        self.collectors.append(collector)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {name: {k: (list(h.counts), h.sum, h.count, h.buckets) for k, h in series.items()}
+                          for name, series in self.histograms.items()}
+        for name in sorted(counters):
+            self._header(lines, name, 'counter')
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        for name in sorted(histograms):
+            self._header(lines, name, 'histogram')
+            for labels, (counts, total, count, buckets) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, n in zip(buckets + (float('inf'),), counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        samples: Dict[str, List[Tuple[str, str, Dict[str, str], float]]] = {}
+        for collector in self.collectors:
+            for name, kind, text, labels, value in collector():
+                samples.setdefault(name, []).append((kind, text, labels, value))
+        for name in sorted(samples):
+            kind, text = samples[name][0][:2]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for _, _, labels, value in samples[name]:
+                lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        if name in self.help:
+            lines.append(f"# HELP {name} {self.help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = ('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry(config.METRICS_ENABLED)
+registry.describe('sme_stage_seconds', 'Time spent in each SmeSimulator stage')
+registry.describe('sme_handler_seconds', 'Time spent in route handlers, excluding request validation (and response encoding unless the handler encodes)')
+registry.describe('sme_request_phase_seconds', 'Time before an instrumented handler (validate: body read, JSON decoding, input validation) and after it (encode: response serialization)')
+registry.describe('sme_http_requests_total', 'HTTP requests by method, route and status')
+registry.describe('sme_http_request_seconds', 'End-to-end HTTP request time, including validation and encoding')
+registry.describe('sme_batch_calls_total', 'Vectorized batch evaluations')
+registry.describe('sme_batch_rows_total', 'Scenarios scored by vectorized batch evaluations')
+
+
+def timed(stage: str) -> Callable[[Callable], Callable]:
+    """Record calls of the decorated function in sme_stage_seconds{stage=...}; a no-op when metrics are off."""
+    def decorate(fn: Callable) -> Callable:
+        if not registry.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.observe('sme_stage_seconds', time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorate
+
+
+# Current HTTP request, set by MetricsMiddleware: {'start', 'profile', and from the
+# @instrumented handler 'route', 'handler_end', 'path' (profile dump, once written)}
+_request_state: ContextVar[Optional[Dict[str, Any]]] = ContextVar('request_state', default=None)
+
+
+def instrumented(route: str) -> Callable[[Callable], Callable]:
+    """
+    Route handler decorator: times the handler and the request phases around it,
+    and runs it under cProfile when the request asked for a profile. Sync
+    handlers keep running in the thread pool (the wrapper stays a plain
+    function), so the profile covers the thread that does the work.
+    """
+    def decorate(fn: Callable) -> Callable:
+        if not registry.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            state = _request_state.get()
+            start = time.perf_counter()
+            if state is not None:
+                # FastAPI has read and validated the body by the time the handler runs
+                registry.observe('sme_request_phase_seconds', start - state['start'], route=route, phase='validate')
+            profiler = cProfile.Profile() if state is not None and state['profile'] else None
+            try:
+                if profiler is None:
+                    result = fn(*args, **kwargs)
+                else:
+                    result = profiler.runcall(fn, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                registry.observe('sme_handler_seconds', end - start, route=route)
+                if profiler is not None:
+                    state['path'] = _dump_profile(profiler, route)
+            if state is not None:
+                state['route'], state['handler_end'] = route, end
+            return result
+        return wrapper
+    return decorate
+
+
+def _dump_profile(profiler: cProfile.Profile, route: str) -> Optional[str]:
+    # A profile that cannot be written must not fail the request it describes
+    path = os.path.join(config.PROFILE_DIR, f"{route}-{time.strftime('%Y%m%dT%H%M%S')}-{time.perf_counter_ns() % 10**9:09d}.prof")
+    try:
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(path)
+    except OSError:
+        logger.exception("could not write profile %s", path)
+        return None
+    return path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them end to end per route
+    template. With PROFILE_REQUESTS = 'header', a request carrying
+    `X-Profile: 1` is profiled by its @instrumented handler ('all' profiles
+    every request); the dump file is returned in the X-Profile-Path header.
+    """
+
+    def __init__(self, app: ASGIApp, profile: str = 'off'):
+        self.app = app
+        self.profile = profile
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        profile = self.profile == 'all' or (self.profile == 'header' and (b'x-profile', b'1') in scope.get('headers', ()))
+        start = time.perf_counter()
+        state = {'start': start, 'profile': profile, 'route': None, 'handler_end': None, 'path': None}
+        token = _request_state.set(state)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if state['handler_end'] is not None:
+                    registry.observe('sme_request_phase_seconds', time.perf_counter() - state['handler_end'],
+                                     route=state['route'], phase='encode')
+                if state['path']:
+                    message['headers'] = list(message.get('headers', [])) + [(b'x-profile-path', state['path'].encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_state.reset(token)
+            route = scope.get('route')
+            # Unmatched paths share one series so scanners cannot blow up the label set
+            path = getattr(route, 'path', None) or 'unmatched'
+            method = scope.get('method', '')
+            registry.inc('sme_http_requests_total', method=method, route=path, status=str(status))
+            registry.observe('sme_http_request_seconds', time.perf_counter() - start, method=method, route=path)
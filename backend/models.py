@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from . import config
 
 # SME Simulator Models
 
@@ -8,7 +9,7 @@ class SmeInputs(BaseModel):
     industry: str = "Manufacturing"
     company_size: str = "SME"
     region: str = "EU"
-    forecast_horizon: int = 7 # 5, 7, 10
+    forecast_horizon: int = Field(7, ge=1, le=config.MAX_FORECAST_HORIZON) # 5, 7, 10
     
     # Financial Baseline
     initial_revenue: float = 1000000.0
@@ -105,3 +106,283 @@ class SmeOutputs(BaseModel):
     alerts: List[Alert]
     details: SmeDeepIndicators
     projections: List[YearlyProjection]
+
+# Monte Carlo Models
+
+class Distribution(BaseModel):
+    kind: str = "normal" # normal, triangular, uniform
+    mean: Optional[float] = None # normal
+    std: Optional[float] = None # normal
+    low: Optional[float] = None # uniform/triangular bounds; normal: draws outside are clipped to the bound (censored)
+    high: Optional[float] = None
+    mode: Optional[float] = None # triangular
+
+class MonteCarloRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs()
+    distributions: Dict[str, Distribution] = {}
+    # Optional correlation matrix over the distributed fields, in `distributions` order
+    correlation: Optional[List[List[float]]] = None
+    draws: int = 10000
+    seed: Optional[int] = None
+    percentiles: List[float] = [10.0, 50.0, 90.0]
+    bins: int = 20
+
+class Histogram(BaseModel):
+    edges: List[float]
+    counts: List[int]
+
+class MonteCarloOutputs(BaseModel):
+    draws: int
+    # metric -> {"p10": .., "p50": .., "p90": .., "mean": ..}; scores and deep indicators
+    bands: Dict[str, Dict[str, float]]
+    # "p10"/"p50"/"p90" -> per-year percentile of each YearlyProjection field
+    projection_bands: Dict[str, List[YearlyProjection]]
+    histograms: Dict[str, Histogram]
+
+# Sensitivity Models
+
+class SensitivityRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs()
+    delta: float = 0.10 # relative perturbation, +/- delta * value
+    fields: Optional[List[str]] = None # numeric SmeInputs fields; default all
+    indicators: List[str] = ["roi_percent", "irr_percent", "financial_viability", "esg_score"]
+
+class TornadoBar(BaseModel):
+    field: str
+    input_low: float
+    input_high: float
+    output_low: float
+    output_high: float
+    swing: float # |output_high - output_low|
+    elasticity: Optional[float] = None # (dOutput / Output) / (dInput / Input), central difference; None when undefined
+
+class SensitivityOutputs(BaseModel):
+    base: Dict[str, float]
+    # metric -> bars sorted by swing, largest first
+    tornado: Dict[str, List[TornadoBar]]
+
+# Solver Models
+
+class LeverBound(BaseModel):
+    field: str
+    low: float
+    high: float
+
+class Constraint(BaseModel):
+    metric: str # score, deep indicator or numeric input field
+    op: str = "<=" # <=, >=
+    value: float
+    relative_to: Optional[str] = None # numeric input field the limit is a fraction of
+
+class SolverStep(BaseModel):
+    iteration: int
+    evaluations: int # cumulative
+    best: Optional[float] = None # best lever value (goal-seek) or objective (optimizer)
+    width: float # remaining bracket (goal-seek) or mutation scale (optimizer)
+
+class GoalSeekRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs()
+    lever: LeverBound
+    metric: str
+    op: str = "<=" # <=, >= or == (first crossing of the target)
+    target: float
+    seek: str = "min" # min: smallest lever value meeting the target, max: largest
+    population: int = 32 # lever values scored per iteration
+    max_iterations: int = 20
+    tolerance: float = 1e-6 # stop once the bracket is this narrow, relative to the bounds
+
+class GoalSeekOutputs(BaseModel):
+    found: bool
+    value: Optional[float] = None
+    metric_value: Optional[float] = None
+    inputs: Optional[SmeInputs] = None
+    evaluations: int
+    trace: List[SolverStep]
+
+class OptimizeRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs()
+    levers: List[LeverBound]
+    objective: str = "overall"
+    maximize: bool = True
+    constraints: List[Constraint] = []
+    population: int = 64
+    generations: int = 40
+    seed: Optional[int] = None
+    tolerance: float = 1e-4 # stop once the mutation scale falls below this (fraction of each range)
+
+class OptimizeOutputs(BaseModel):
+    feasible: bool
+    objective: float
+    inputs: SmeInputs
+    violation: float # 0 when every constraint holds
+    evaluations: int
+    trace: List[SolverStep]
+
+# Pareto Models
+
+class ParetoRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs()
+    levers: Optional[List[LeverBound]] = None # default: the sustainability levers
+    sampling: str = "lhs" # lhs (Latin hypercube) or grid
+    samples: int = 100000 # lhs only
+    grid_points: int = 5 # grid only: values per lever
+    seed: Optional[int] = None
+
+class ParetoPoint(BaseModel):
+    scores: SmeScore
+    inputs: SmeInputs
+    alerts: List[Alert]
+
+class ParetoOutputs(BaseModel):
+    samples: int
+    # Non-dominated on economic, environmental and strategic score; one scenario per score triple
+    frontier: List[ParetoPoint]
+
+# Delta Models
+
+class DeltaRequest(BaseModel):
+    session_id: Optional[str] = None # omit to start a session
+    inputs: Optional[SmeInputs] = None # full inputs: starts or resets the session
+    changes: Dict[str, Any] = {} # field -> new value, applied on top of the session's inputs
+
+class PatchOperation(BaseModel):
+    op: str # RFC 6902: add, remove, replace
+    path: str # JSON pointer into SmeOutputs; "" replaces the whole document
+    value: Any = None
+
+class DeltaOutputs(BaseModel):
+    session_id: str
+    revision: int
+    patch: List[PatchOperation]
+    recomputed: List[str] # stages re-evaluated for this update
+
+# Scenario Store Models
+
+class ScenarioSaveRequest(BaseModel):
+    scenarios: List[SmeInputs]
+
+class ScenarioSaveOutputs(BaseModel):
+    keys: List[str] # in request order
+    computed: int
+    reused: int # already stored for this formula version
+
+class ScenarioQuery(BaseModel):
+    metric: str = "overall" # score or stored deep indicator, e.g. esg_score
+    limit: int = 100
+    ascending: bool = False # default: highest first
+    industry: Optional[str] = None
+    company_size: Optional[str] = None
+    region: Optional[str] = None
+    include_outputs: bool = False
+
+class StoredScenario(BaseModel):
+    key: str
+    industry: str
+    company_size: str
+    region: str
+    forecast_horizon: int
+    metrics: Dict[str, float]
+    inputs: SmeInputs
+    outputs: Optional[SmeOutputs] = None
+
+class ScenarioQueryOutputs(BaseModel):
+    scenarios: List[StoredScenario]
+
+# Carbon Footprint Models
+
+class ActivityLog(BaseModel):
+    # Columnar activity records; quantities in the units of config.EMISSION_FACTORS (km, kWh, kg, ...)
+    entity: Optional[List[str]] = None # one entity id per record; None: all records belong to "all"
+    category: List[str]
+    subtype: List[str]
+    quantity: List[float]
+
+class FootprintRequest(BaseModel):
+    activities: ActivityLog
+    baseline: Optional[ActivityLog] = None # earlier period: adds the SmeInputs reduction fields
+    days: float = 365 # period covered by the activities
+    benchmark: str = "global" # key of config.AVERAGE_DAILY_FOOTPRINT
+    headcount: Dict[str, float] = {} # people per entity, for per-capita daily figures
+
+class EntityFootprint(BaseModel):
+    entity: str
+    scope_1: float # kg CO2
+    scope_2: float # kg CO2
+    scope_3: float # kg CO2
+    total: float # kg CO2
+    daily_kg: float # per day, per head when a headcount is given
+    vs_average: float # daily_kg / benchmark average
+    band: str # high / medium / low against RECOMMENDATION_THRESHOLDS
+    inputs: Optional[Dict[str, float]] = None # scope_N_reduction and carbon_reduction_potential for SmeInputs
+
+class FootprintOutputs(BaseModel):
+    entities: List[EntityFootprint]
+    records: int
+    skipped: int # unknown activity or invalid quantity
+    unknown_activities: Dict[str, int] # "category/subtype": records
+
+# Sweep Models
+
+class SweepAxis(BaseModel):
+    field: str # numeric SmeInputs field
+    values: List[float]
+
+class SweepRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs() # fields not swept keep these values
+    axes: List[SweepAxis] # every combination is scored; cube dimensions follow this order
+    metrics: List[str] = ["economic", "environmental", "strategic", "overall"] # scores or deep indicators
+
+class SweepOutputs(BaseModel):
+    shape: List[int]
+    axes: List[SweepAxis]
+    metrics: Dict[str, Any] # metric -> nested lists, one level per axis
+    projection_paths: int # distinct projection paths computed for the grid
+
+# Job Models
+
+class JobRequest(BaseModel):
+    kind: str # score, monte_carlo, sensitivity, goal_seek, optimize, pareto, sweep
+    params: Dict[str, Any] = {} # request body of the matching endpoint; score: {"scenarios": [...]}
+    priority: int = 0 # higher runs first
+
+class ScoreJobRequest(BaseModel):
+    scenarios: List[SmeInputs]
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    state: str # queued, running, succeeded, failed, cancelled
+    priority: int
+    progress: float # 0-1
+    completed: int # scenarios scored so far (score) or steps
+    total: int
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class JobResults(BaseModel):
+    id: str
+    state: str
+    offset: int
+    available: int # results ready so far; grows while a score job runs
+    results: List[Any] # SmeOutputs per scenario (score) or the analysis outputs
+
+# Period Projection Models
+
+class PeriodRequest(BaseModel):
+    inputs: SmeInputs = SmeInputs()
+    granularity: str = "monthly" # annual, quarterly, monthly
+    horizon_years: Optional[int] = None # default: inputs.forecast_horizon; up to PERIOD_MAX_YEARS
+    seasonality: Optional[List[float]] = None # revenue weight per period of the year (12 or 4), normalized to mean 1
+
+class PeriodOutputs(BaseModel):
+    granularity: str
+    periods_per_year: int
+    periods: Dict[str, List[float]] # columnar: period, year and each YearlyProjection field per period
+    yearly: List[YearlyProjection] # annual roll-up: flows summed, cumulative_investment at year end
+    npv: float
+    irr_percent: float # annualized
+    payback_years: float
+    discounted_payback_years: float
+    financial_viability: float
@@ -0,0 +1,158 @@
+from typing import Dict, List, Optional
+import numpy as np
+from .models import Distribution, Histogram, MonteCarloOutputs, MonteCarloRequest, YearlyProjection
+from .sme_batch import BatchInputs, INT_FIELDS, NUMERIC_FIELDS, PROJECTION_FIELDS, SCORE_FIELDS, DETAIL_FIELDS, SmeBatchEngine
+
+MAX_DRAWS = 1_000_000
+# draws x forecast_horizon: per-year bands need every draw's projections in memory
+# (8 float32 fields, about 320 MB at the cap)
+MAX_PROJECTION_CELLS = 10_000_000
+# Draws are scored in chunks of this size to bound the engine's working memory
+CHUNK_SIZE = 100_000
+
+DISTRIBUTABLE_FIELDS = [name for name in NUMERIC_FIELDS if name not in INT_FIELDS]
+
+
+def normal_cdf(z: np.ndarray) -> np.ndarray:
+    # Abramowitz & Stegun 7.1.26 erf approximation (|error| < 1.5e-7); NumPy has no erf
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+class MonteCarloSimulator:
+    """
+    Uncertainty mode: draws SmeInputs fields from distributions (optionally
+    correlated through a Gaussian copula) and scores all draws as arrays.
+    """
+
+    def __init__(self, engine: Optional[SmeBatchEngine] = None):
+        self.engine = engine or SmeBatchEngine()
+
+    def run(self, request: MonteCarloRequest) -> MonteCarloOutputs:
+        if not 1 <= request.draws <= MAX_DRAWS:
+            raise ValueError(f"draws must be between 1 and {MAX_DRAWS}")
+        if request.draws * request.inputs.forecast_horizon > MAX_PROJECTION_CELLS:
+            raise ValueError(f"draws x forecast_horizon must not exceed {MAX_PROJECTION_CELLS}; "
+                             f"use at most {MAX_PROJECTION_CELLS // request.inputs.forecast_horizon} draws at this horizon")
+        if request.bins < 1:
+            raise ValueError("bins must be at least 1")
+        if any(not 0 <= p <= 100 for p in request.percentiles):
+            raise ValueError("percentiles must be between 0 and 100")
+
+        batch = self.sample(request, np.random.default_rng(request.seed))
+        metric_names = SCORE_FIELDS + DETAIL_FIELDS
+        metrics = {name: np.empty(request.draws) for name in metric_names}
+        horizon = request.inputs.forecast_horizon
+        # Projections only feed percentile bands, so float32 keeps 1M draws affordable
+        projections = {name: np.empty((request.draws, horizon), dtype=np.float32) for name in PROJECTION_FIELDS}
+        for start in range(0, request.draws, CHUNK_SIZE):
+            rows = slice(start, min(start + CHUNK_SIZE, request.draws))
+            result = self.engine.calculate(batch.take(rows))
+            for name in metric_names:
+                metrics[name][rows] = result.metric(name)
+            for name in PROJECTION_FIELDS:
+                projections[name][rows] = result.projections[name]
+
+        labels = [f"p{p:g}" for p in request.percentiles]
+        bands = {}
+        for name, values in metrics.items():
+            band = dict(zip(labels, np.percentile(values, request.percentiles).tolist()))
+            band['mean'] = float(values.mean())
+            bands[name] = band
+
+        per_year = {name: np.percentile(values, request.percentiles, axis=0) for name, values in projections.items()}
+        projection_bands = {
+            label: [
+                YearlyProjection(year=t + 1, **{name: float(per_year[name][k, t]) for name in PROJECTION_FIELDS})
+                for t in range(horizon)
+            ]
+            for k, label in enumerate(labels)
+        }
+
+        histograms = {}
+        for name in DETAIL_FIELDS:
+            counts, edges = np.histogram(metrics[name], bins=request.bins)
+            histograms[name] = Histogram(edges=edges.tolist(), counts=counts.tolist())
+
+        return MonteCarloOutputs(draws=request.draws, bands=bands, projection_bands=projection_bands, histograms=histograms)
+
+    def sample(self, request: MonteCarloRequest, rng: np.random.Generator) -> BatchInputs:
+        base = request.inputs
+        n = request.draws
+        fields = list(request.distributions)
+        unknown = [f for f in fields if f not in DISTRIBUTABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"cannot draw non-float or unknown fields: {', '.join(unknown)}")
+
+        columns: Dict[str, np.ndarray] = {name: np.full(n, float(getattr(base, name))) for name in NUMERIC_FIELDS}
+        if request.correlation is None:
+            for name in fields:
+                columns[name] = self._draw(request.distributions[name], getattr(base, name), rng, n)
+        else:
+            z = self._correlated_normals(request.correlation, len(fields), rng, n)
+            for k, name in enumerate(fields):
+                columns[name] = self._transform(request.distributions[name], getattr(base, name), z[:, k])
+        return BatchInputs(columns)
+
+    def _correlated_normals(self, correlation: List[List[float]], k: int, rng: np.random.Generator, n: int) -> np.ndarray:
+        corr = np.asarray(correlation, dtype=float)
+        if corr.shape != (k, k):
+            raise ValueError(f"correlation must be a {k}x{k} matrix (one row per distribution)")
+        if not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1.0):
+            raise ValueError("correlation must be symmetric with a unit diagonal")
+        try:
+            chol = np.linalg.cholesky(corr)
+        except np.linalg.LinAlgError:
+            raise ValueError("correlation matrix must be positive definite")
+        return rng.standard_normal((n, k)) @ chol.T
+
+    def _draw(self, d: Distribution, base: float, rng: np.random.Generator, n: int) -> np.ndarray:
+        self._check(d, base)
+        if d.kind == 'normal':
+            values = rng.normal(self._mean(d, base), d.std, n)
+            return np.clip(values, d.low, d.high) if d.low is not None or d.high is not None else values
+        if d.kind == 'uniform':
+            return rng.uniform(d.low, d.high, n)
+        if d.low == d.high:
+            return np.full(n, d.low)
+        return rng.triangular(d.low, self._mode(d, base), d.high, n)
+
+    def _transform(self, d: Distribution, base: float, z: np.ndarray) -> np.ndarray:
+        # Map a standard normal marginal onto the requested distribution (inverse CDF)
+        self._check(d, base)
+        if d.kind == 'normal':
+            values = self._mean(d, base) + d.std * z
+            return np.clip(values, d.low, d.high) if d.low is not None or d.high is not None else values
+        u = normal_cdf(z)
+        low, high = d.low, d.high
+        if d.kind == 'uniform':
+            return low + (high - low) * u
+        mode = self._mode(d, base)
+        width = high - low
+        split = (mode - low) / width if width > 0 else 0.0
+        return np.where(u < split,
+                        low + np.sqrt(u * width * (mode - low)),
+                        high - np.sqrt((1 - u) * width * (high - mode)))
+
+    def _check(self, d: Distribution, base: float) -> None:
+        if d.kind == 'normal':
+            if d.std is None or d.std < 0:
+                raise ValueError("normal distributions need a non-negative std")
+            if d.low is not None and d.high is not None and d.low > d.high:
+                raise ValueError("normal distributions need low <= high")
+        elif d.kind in ('uniform', 'triangular'):
+            if d.low is None or d.high is None or d.low > d.high:
+                raise ValueError(f"{d.kind} distributions need low <= high")
+            if d.kind == 'triangular' and not d.low <= self._mode(d, base) <= d.high:
+                raise ValueError("triangular mode must lie between low and high")
+        else:
+            raise ValueError(f"unknown distribution kind: {d.kind}")
+
+    def _mean(self, d: Distribution, base: float) -> float:
+        return base if d.mean is None else d.mean
+
+    def _mode(self, d: Distribution, base: float) -> float:
+        return base if d.mode is None else d.mode
@@ -0,0 +1,239 @@
+import multiprocessing
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from . import config
+from .metrics import registry
+from .models import SmeInputs, SmeOutputs
+from .sme_batch import (ALERTS, DETAIL_FIELDS, HEATMAP_CELLS, NUMERIC_FIELDS, PROJECTION_FIELDS, SCORE_FIELDS,
+                        BatchInputs, BatchResult, SmeBatchEngine)
+
+# Multi-process scoring: the input matrix is placed in shared memory once, each
+# worker scores a row range of it with SmeBatchEngine and writes its arrays into
+# a shared output block. Only segment names and row ranges cross the process
+# boundary; no SmeInputs / SmeOutputs are pickled.
+
+
+class SharedLayout:
+    """
+    Fixed-dtype arrays of a BatchResult for N rows and `width` projection years,
+    packed back to back in one buffer.
+    """
+
+    def __init__(self, n: int, width: int):
+        self.n = n
+        self.width = width
+        self.arrays: List[Tuple[str, Tuple[int, ...], Any]] = [
+            ('scores', (n, len(SCORE_FIELDS)), np.float64),
+            ('details', (n, len(DETAIL_FIELDS)), np.float64),
+            ('projections', (len(PROJECTION_FIELDS), n, width), np.float64),
+            ('heatmap_values', (n, len(HEATMAP_CELLS)), np.float64),
+            ('execution_risk', (n,), np.int8),
+            ('heatmap_colors', (n, len(HEATMAP_CELLS)), np.int8),
+            ('alerts', (n, len(ALERTS)), np.bool_),
+        ]
+        self.nbytes = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, shape, dtype in self.arrays)
+
+    def views(self, buffer: Any) -> Dict[str, np.ndarray]:
+        views = {}
+        offset = 0
+        for name, shape, dtype in self.arrays:
+            views[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return views
+
+
+def _release(*segments: SharedMemory) -> None:
+    for shm in segments:
+        shm.close()
+        shm.unlink()
+
+
+def _close(*segments: SharedMemory) -> None:
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # a view is still alive in a failing frame; the mapping goes with the process
+
+
+_worker_engine: Optional[SmeBatchEngine] = None
+
+
+def _init_worker() -> None:
+    global _worker_engine
+    _worker_engine = SmeBatchEngine()
+
+
+def _score_rows(inputs_name: str, outputs_name: str, n: int, width: int, start: int, stop: int) -> int:
+    """Worker: score rows [start, stop) of the shared input matrix into the shared output block."""
+    engine = _worker_engine or SmeBatchEngine()
+    shm_in = SharedMemory(name=inputs_name)
+    shm_out = SharedMemory(name=outputs_name)
+    try:
+        matrix = np.ndarray((n, len(NUMERIC_FIELDS)), dtype=np.float64, buffer=shm_in.buf)
+        batch = BatchInputs.from_matrix(matrix[start:stop])
+        del matrix
+        result = engine.evaluate(batch, engine.project(batch, width))
+        out = SharedLayout(n, width).views(shm_out.buf)
+        rows = slice(start, stop)
+        out['scores'][rows] = np.column_stack([result.scores[name] for name in SCORE_FIELDS])
+        out['details'][rows] = np.column_stack([result.details[name] for name in DETAIL_FIELDS])
+        for k, name in enumerate(PROJECTION_FIELDS):
+            out['projections'][k, rows] = result.projections[name]
+        out['heatmap_values'][rows] = result.heatmap_values
+        out['execution_risk'][rows] = result.execution_risk
+        out['heatmap_colors'][rows] = result.heatmap_colors
+        out['alerts'][rows] = result.alerts
+        del out
+        return stop - start
+    finally:
+        _close(shm_in, shm_out)
+
+
+class ParallelJob:
+    """
+    Handle on one sharded calculation. cancel() drops the shards not yet
+    started and waits for the running ones; the shared segments are released
+    either way.
+    """
+
+    def __init__(self, futures: List[Future], segments: Tuple[SharedMemory, SharedMemory],
+                 layout: SharedLayout, horizon: np.ndarray):
+        self.futures = futures
+        self.segments = segments
+        self.layout = layout
+        self.horizon = horizon
+        self._lock = threading.Lock()
+        self._result: Optional[BatchResult] = None
+        self._released = False
+
+    def done(self) -> bool:
+        return all(f.done() for f in self.futures)
+
+    def result(self, timeout: Optional[float] = None) -> BatchResult:
+        try:
+            for future in self.futures:
+                future.result(timeout)
+        except BaseException:
+            self.cancel()
+            raise
+        with self._lock:
+            if self._result is None:
+                if self._released:
+                    raise CancelledError()
+                try:
+                    self._result = self._collect()
+                finally:
+                    self._release()
+            return self._result
+
+    def cancel(self) -> None:
+        for future in self.futures:
+            future.cancel()
+        wait(self.futures)
+        with self._lock:
+            self._release()
+
+    def _collect(self) -> BatchResult:
+        # Copy out of the segment: it is unlinked right after
+        out = {name: view.copy() for name, view in self.layout.views(self.segments[1].buf).items()}
+        return BatchResult(
+            horizon=self.horizon,
+            projections={name: out['projections'][k] for k, name in enumerate(PROJECTION_FIELDS)},
+            scores={name: out['scores'][:, k] for k, name in enumerate(SCORE_FIELDS)},
+            details={name: out['details'][:, k] for k, name in enumerate(DETAIL_FIELDS)},
+            execution_risk=out['execution_risk'].astype(int),
+            heatmap_values=out['heatmap_values'],
+            heatmap_colors=out['heatmap_colors'].astype(int),
+            alerts=out['alerts'],
+        )
+
+    def _release(self) -> None:
+        if not self._released:
+            self._released = True
+            _release(*self.segments)
+
+
+class ParallelEngine:
+    """
+    SmeBatchEngine drop-in that shards rows across a process pool
+    (`workers` processes, `chunk_size` rows per task). Usable wherever an
+    engine is accepted (MonteCarloSimulator, ParetoExplorer, SmeSolver, ...).
+    The stage methods (project, evaluate, discounted) that ParameterSweep
+    combines itself run in this process.
+    """
+
+    def __init__(self, workers: int = 2, chunk_size: int = 10_000, start_method: str = 'spawn'):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._local = SmeBatchEngine()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(self.start_method),
+                                                 initializer=_init_worker)
+            return self._pool
+
+    def calculate(self, inputs: Union[BatchInputs, Sequence[SmeInputs], Mapping[str, Any]],
+                  materialize: bool = False) -> Union[BatchResult, List[SmeOutputs]]:
+        result = self.submit(inputs).result()
+        return result.materialize() if materialize else result
+
+    def project(self, b: BatchInputs, width: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return self._local.project(b, width)
+
+    def evaluate(self, b: BatchInputs, proj: Dict[str, np.ndarray]) -> BatchResult:
+        return self._local.evaluate(b, proj)
+
+    def discounted(self, *args: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self._local.discounted(*args)
+
+    def submit(self, inputs: Union[BatchInputs, Sequence[SmeInputs], Mapping[str, Any]]) -> ParallelJob:
+        b = BatchInputs.coerce(inputs)
+        n = len(b)
+        registry.inc('sme_batch_calls_total', engine='parallel')
+        registry.inc('sme_batch_rows_total', n, engine='parallel')
+        width = int(b['forecast_horizon'].max()) if n else 0
+        layout = SharedLayout(n, width)
+        # Zero-size segments are not allowed
+        shm_in = SharedMemory(create=True, size=max(1, n * len(NUMERIC_FIELDS) * 8))
+        shm_out = SharedMemory(create=True, size=max(1, layout.nbytes))
+        try:
+            matrix = np.ndarray((n, len(NUMERIC_FIELDS)), dtype=np.float64, buffer=shm_in.buf)
+            for k, name in enumerate(NUMERIC_FIELDS):
+                matrix[:, k] = b[name]
+            del matrix
+            futures = [
+                self.pool.submit(_score_rows, shm_in.name, shm_out.name, n, width, start, min(start + self.chunk_size, n))
+                for start in range(0, n, self.chunk_size)
+            ]
+        except BaseException:
+            _release(shm_in, shm_out)
+            raise
+        return ParallelJob(futures, (shm_in, shm_out), layout, b['forecast_horizon'].astype(int))
+
+    def shutdown(self, cancel: bool = True) -> None:
+        """Stop the pool; with cancel=True queued shards are dropped and only running ones finish."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=cancel)
+                self._pool = None
+
+
+def build_parallel_engine() -> Optional[ParallelEngine]:
+    """ParallelEngine as configured in config.py (PARALLEL_WORKERS = 0 keeps scoring in-process)."""
+    if config.PARALLEL_WORKERS <= 0:
+        return None
+    return ParallelEngine(config.PARALLEL_WORKERS, config.PARALLEL_CHUNK_SIZE, config.PARALLEL_START_METHOD)
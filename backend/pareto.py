@@ -0,0 +1,124 @@
+from typing import List, Optional
+import numpy as np
+from .models import LeverBound, ParetoOutputs, ParetoPoint, ParetoRequest, SmeScore
+from .sme_batch import ALERTS, BatchInputs, FIELD_BOUNDS, INT_FIELDS, NUMERIC_FIELDS, SCORE_FIELDS, SmeBatchEngine
+
+MAX_SAMPLES = 10_000_000
+# Samples are generated and scored in chunks of this size; only the frontier is kept
+CHUNK_SIZE = 100_000
+OBJECTIVES = ['economic', 'environmental', 'strategic']
+
+SUSTAINABILITY_LEVERS = [
+    LeverBound(field='sustainability_capex', low=0.0, high=500000.0),
+    LeverBound(field='reinvest_pct', low=0.0, high=0.2),
+    LeverBound(field='energy_efficiency_pct', low=0.0, high=0.5),
+    LeverBound(field='resource_efficiency_pct', low=0.0, high=0.5),
+    LeverBound(field='waste_reduction_pct', low=0.0, high=0.5),
+    LeverBound(field='circular_economy_pct', low=0.0, high=0.5),
+    LeverBound(field='carbon_reduction_potential', low=0.0, high=100.0),
+    LeverBound(field='scope_1_reduction', low=0.0, high=100.0),
+    LeverBound(field='scope_2_reduction', low=0.0, high=100.0),
+    LeverBound(field='scope_3_reduction', low=0.0, high=100.0),
+]
+
+
+def non_dominated(points: np.ndarray, block: int = 1024) -> np.ndarray:
+    """Indices of the rows of `points` (maximized) not dominated by another row; duplicates keep the first."""
+    _, first = np.unique(points, axis=0, return_index=True)
+    first.sort()
+    unique = points[first]
+    keep = np.ones(len(unique), dtype=bool)
+    for start in range(0, len(unique), block):
+        p = unique[start:start + block, None, :]
+        dominated = (np.all(unique[None, :, :] >= p, axis=2) & np.any(unique[None, :, :] > p, axis=2)).any(axis=1)
+        keep[start:start + block] = ~dominated
+    return first[keep]
+
+
+class ParetoExplorer:
+    """
+    Samples the lever space (Latin hypercube or full grid), scores it chunk by
+    chunk and keeps a streaming archive of the non-dominated scenarios.
+    """
+
+    def __init__(self, engine: Optional[SmeBatchEngine] = None):
+        self.engine = engine or SmeBatchEngine()
+
+    def run(self, request: ParetoRequest) -> ParetoOutputs:
+        levers = request.levers if request.levers is not None else SUSTAINABILITY_LEVERS
+        if not levers:
+            raise ValueError("at least one lever is required")
+        for lever in levers:
+            if lever.field not in NUMERIC_FIELDS:
+                raise ValueError(f"unknown numeric input field: {lever.field}")
+            if not lever.low <= lever.high:
+                raise ValueError(f"{lever.field}: low must not exceed high")
+            low, high = FIELD_BOUNDS.get(lever.field, (None, None))
+            if (low is not None and lever.low < low) or (high is not None and lever.high > high):
+                raise ValueError(f"{lever.field}: bounds must lie within [{low}, {high}]")
+        if request.sampling == 'lhs':
+            total = request.samples
+        elif request.sampling == 'grid':
+            if request.grid_points < 1:
+                raise ValueError("grid_points must be at least 1")
+            total = request.grid_points ** len(levers)
+        else:
+            raise ValueError(f"unknown sampling: {request.sampling}")
+        if not 1 <= total <= MAX_SAMPLES:
+            raise ValueError(f"sample count must be between 1 and {MAX_SAMPLES} (got {total})")
+
+        rng = np.random.default_rng(request.seed)
+        low = np.array([lever.low for lever in levers])
+        width = np.array([lever.high - lever.low for lever in levers])
+        base = {name: float(getattr(request.inputs, name)) for name in NUMERIC_FIELDS}
+        archive_levers = np.empty((0, len(levers)))
+        archive_scores = np.empty((0, len(SCORE_FIELDS)))
+        archive_alerts = np.empty((0, len(ALERTS)), dtype=bool)
+        for start in range(0, total, CHUNK_SIZE):
+            n = min(CHUNK_SIZE, total - start)
+            if request.sampling == 'lhs':
+                unit = self._latin_hypercube(rng, n, len(levers))
+            else:
+                unit = self._grid(request.grid_points, len(levers), start, n)
+            values = low + unit * width
+            for j, lever in enumerate(levers):
+                if lever.field in INT_FIELDS:
+                    values[:, j] = np.rint(values[:, j])
+
+            columns = {name: np.full(n, value) for name, value in base.items()}
+            columns.update({lever.field: values[:, j] for j, lever in enumerate(levers)})
+            result = self.engine.calculate(BatchInputs(columns))
+            scores = np.column_stack([result.scores[name] for name in SCORE_FIELDS])
+
+            # The archive goes first so earlier scenarios win score ties
+            local = non_dominated(scores[:, :len(OBJECTIVES)])
+            merged = np.vstack([archive_scores, scores[local]])
+            keep = non_dominated(merged[:, :len(OBJECTIVES)])
+            archive_levers = np.vstack([archive_levers, values[local]])[keep]
+            archive_alerts = np.vstack([archive_alerts, result.alerts[local]])[keep]
+            archive_scores = merged[keep]
+
+        # Highest economic score first
+        order = np.lexsort([-archive_scores[:, j] for j in reversed(range(len(OBJECTIVES)))])
+        return ParetoOutputs(samples=total, frontier=[self._point(request, levers, archive_levers[k],
+                                                                  archive_scores[k], archive_alerts[k])
+                                                      for k in order])
+
+    def _latin_hypercube(self, rng: np.random.Generator, n: int, k: int) -> np.ndarray:
+        # Each chunk is its own Latin hypercube: memory stays constant in the total sample count
+        strata = np.argsort(rng.random((n, k)), axis=0)
+        return (strata + rng.random((n, k))) / n
+
+    def _grid(self, points: int, k: int, start: int, n: int) -> np.ndarray:
+        axis = np.linspace(0.0, 1.0, points) if points > 1 else np.zeros(1)
+        index = np.unravel_index(np.arange(start, start + n), (points,) * k)
+        return np.column_stack([axis[i] for i in index])
+
+    def _point(self, request: ParetoRequest, levers: List[LeverBound], values: np.ndarray,
+               scores: np.ndarray, alerts: np.ndarray) -> ParetoPoint:
+        update = {lever.field: int(v) if lever.field in INT_FIELDS else float(v) for lever, v in zip(levers, values)}
+        return ParetoPoint(
+            scores=SmeScore(**{name: float(s) for name, s in zip(SCORE_FIELDS, scores)}),
+            inputs=request.inputs.model_copy(update=update),
+            alerts=[ALERTS[a] for a in np.flatnonzero(alerts)],
+        )
@@ -0,0 +1,176 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from . import cashflow, config
+from .models import PeriodOutputs, PeriodRequest, YearlyProjection
+from .sme_batch import PROJECTION_FIELDS, BatchInputs, clamp, round_like_python
+
+# Sub-annual projections (quarterly / monthly steps) over long horizons, for
+# cash-flow views such as debt service. Annual rates are converted to the
+# equivalent per-period rate, (1 + r)^(1/p) - 1, so p periods compound to one
+# year at the annual rate; fixed costs, depreciation and reinvestment are
+# spread evenly over the periods of a year. Every column is a closed form in
+# the period index (or one cumsum), so the cost per scenario is a handful of
+# array operations whatever the number of periods.
+#
+# This is a separate view of the model: SmeSimulator and its annual outputs
+# are unchanged. Tax is charged per period on positive profit. With annual
+# granularity the periods are the simulator's years, and the indicators are
+# computed from the same whole-number flows, so they match its details.
+
+PERIODS_PER_YEAR = {'annual': 1, 'quarterly': 4, 'monthly': 12}
+# Fields summed over a year in the annual roll-up; cumulative_investment takes its year-end value
+FLOW_FIELDS = [name for name in PROJECTION_FIELDS if name != 'cumulative_investment']
+
+
+def period_rate(annual_rate: np.ndarray, periods_per_year: int) -> np.ndarray:
+    """Per-period rate compounding to `annual_rate` over a year."""
+    return np.expm1(np.log1p(annual_rate) / periods_per_year)
+
+
+class PeriodProjection:
+    """
+    Per-period projections of N scenarios, (N x years * periods_per_year),
+    unrounded, with the same fields as YearlyProjection.
+    """
+    __slots__ = ('periods_per_year', 'years', 'columns')
+
+    def __init__(self, periods_per_year: int, years: int, columns: Dict[str, np.ndarray]):
+        self.periods_per_year = periods_per_year
+        self.years = years
+        self.columns = columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def incremental_cash_flows(self) -> np.ndarray:
+        # Gain per period of Scenario B over Scenario A
+        return (self['profit_b'] + self['savings']) - self['profit_a']
+
+    def annual(self) -> Dict[str, np.ndarray]:
+        """(N x years) roll-up, rounded to whole numbers like YearlyProjection."""
+        shape = (-1, self.years, self.periods_per_year)
+        rollup = {name: self[name].reshape(shape).sum(axis=2) for name in FLOW_FIELDS}
+        rollup['cumulative_investment'] = self['cumulative_investment'].reshape(shape)[:, :, -1]
+        return {name: round_like_python(rollup[name]) for name in PROJECTION_FIELDS}
+
+    def to_yearly(self, k: int) -> List[YearlyProjection]:
+        rollup = self.annual()
+        return [YearlyProjection(year=t + 1, **{name: float(rollup[name][k, t]) for name in PROJECTION_FIELDS})
+                for t in range(self.years)]
+
+
+class PeriodEngine:
+    """
+    Quarterly or monthly projections and the cash-flow indicators derived from
+    them (NPV, annualized IRR, payback in years) for N scenarios at once.
+    """
+
+    def project(self, b: BatchInputs, granularity: str = 'monthly', years: Optional[int] = None,
+                seasonality: Optional[Sequence[float]] = None) -> PeriodProjection:
+        if granularity not in PERIODS_PER_YEAR:
+            raise ValueError(f"unknown granularity: {granularity}; use one of {', '.join(PERIODS_PER_YEAR)}")
+        p = PERIODS_PER_YEAR[granularity]
+        if years is None:
+            horizons = set(b['forecast_horizon'].astype(int).tolist())
+            if len(horizons) > 1:
+                raise ValueError("scenarios have different forecast horizons; pass years")
+            years = horizons.pop() if horizons else 0
+        if not 1 <= years <= config.PERIOD_MAX_YEARS:
+            raise ValueError(f"horizon must be between 1 and {config.PERIOD_MAX_YEARS} years")
+        weights = self._seasonality(seasonality, p)
+
+        growth_a = b['revenue_growth_rate'] + b['inflation_rate'] + 0.01
+        growth_b = b['revenue_growth_rate'] + b['reputation_uplift_pct'] + b['green_market_access_pct']
+        if (growth_a <= -1).any() or (growth_b <= -1).any():
+            raise ValueError("revenue growth must be above -100% per year")
+        t = np.arange(1, years * p + 1, dtype=float)
+        season = np.tile(weights, years)[None, :]
+        base = (b['initial_revenue'] / p)[:, None]
+        rev_a = base * np.float_power(1 + period_rate(growth_a, p)[:, None], t) * season
+        rev_b = base * np.float_power(1 + period_rate(growth_b, p)[:, None], t) * season
+
+        vc = b['variable_costs_pct'][:, None]
+        fixed = (b['fixed_costs'] / p)[:, None]
+        opex_a = rev_a * vc + fixed
+        opex_b = rev_b * vc + fixed
+        total_saving_pct = (b['energy_efficiency_pct'] + b['resource_efficiency_pct'] +
+                            b['waste_reduction_pct'] + b['circular_economy_pct'])
+        savings = total_saving_pct[:, None] * opex_b
+        cumulative = (b['initial_capex'] + b['sustainability_capex'])[:, None] + np.cumsum(rev_b * b['reinvest_pct'][:, None], axis=1)
+
+        tax = b['tax_rate'][:, None]
+        ebit_a = rev_a - opex_a
+        profit_a = ebit_a - np.maximum(0, ebit_a * tax)
+        dep_periods = b['depreciation_years'] * p
+        depreciation = np.where(dep_periods > 0, b['sustainability_capex'] / np.where(dep_periods > 0, dep_periods, 1), 0.0)
+        ebit_b = rev_b - opex_b + savings - np.where(t[None, :] <= dep_periods[:, None], depreciation[:, None], 0.0)
+        profit_b = ebit_b - np.maximum(0, ebit_b * tax)
+
+        return PeriodProjection(p, years, dict(
+            revenue_a=rev_a, revenue_b=rev_b, opex_a=opex_a, opex_b=opex_b, profit_a=profit_a,
+            profit_b=profit_b, savings=savings, cumulative_investment=cumulative))
+
+    def finance(self, b: BatchInputs, proj: PeriodProjection) -> Dict[str, np.ndarray]:
+        """NPV at the per-period discount rate, annualized IRR, and paybacks in years to the period (horizon + 1 if never)."""
+        p = proj.periods_per_year
+        if (b['discount_rate'] <= -1).any():
+            raise ValueError("discount_rate must be above -100%")
+        capex = b['sustainability_capex']
+        if p == 1:
+            # Annual steps are the simulator's years: use its whole-number flows so the indicators match it
+            rollup = proj.annual()
+            gain = (rollup['profit_b'] + rollup['savings']) - rollup['profit_a']
+        else:
+            gain = proj.incremental_cash_flows()
+        rate = period_rate(b['discount_rate'], p)
+        t = np.arange(1, gain.shape[1] + 1, dtype=float)
+        npv = -capex + (gain / np.float_power(1 + rate[:, None], t)).sum(axis=1)
+
+        irr, status = cashflow.irr(np.column_stack([-capex, gain]), long_horizon=p > 1)
+        # Annual steps need no conversion; the round trip through log1p would move large IRRs by a rounding step
+        annualized = irr if p == 1 else np.expm1(np.log1p(irr) * p)
+        irr_annual = cashflow.irr_percent(annualized, status)
+        never = proj.years + 1.0
+        payback = cashflow.payback_period(capex, gain)
+        discounted = cashflow.discounted_payback(capex, gain, rate)
+        capex_or_one = np.where(capex != 0, capex, 1.0)
+        return dict(
+            npv=npv,
+            irr_percent=irr_annual,
+            payback_years=np.where(np.isnan(payback), never, payback / p),
+            discounted_payback_years=np.where(np.isnan(discounted), never, discounted / p),
+            financial_viability=clamp(50 + (npv / capex_or_one) * 50),
+        )
+
+    def _seasonality(self, seasonality: Optional[Sequence[float]], p: int) -> np.ndarray:
+        # Revenue weight per period of the year, normalized to mean 1 so yearly revenue is unchanged
+        if seasonality is None:
+            return np.ones(p)
+        weights = np.asarray(seasonality, dtype=float)
+        if weights.shape != (p,):
+            raise ValueError(f"seasonality needs {p} weights for this granularity")
+        if not np.isfinite(weights).all() or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("seasonality weights must be non-negative and not all zero")
+        return weights / weights.mean()
+
+
+def run_periods(request: PeriodRequest, engine: Optional[PeriodEngine] = None) -> PeriodOutputs:
+    engine = engine or PeriodEngine()
+    b = BatchInputs.from_inputs([request.inputs])
+    years = request.horizon_years if request.horizon_years is not None else request.inputs.forecast_horizon
+    proj = engine.project(b, request.granularity, years, request.seasonality)
+    finance = engine.finance(b, proj)
+    n = years * proj.periods_per_year
+    periods = {'period': list(range(1, n + 1)), 'year': (np.arange(n) // proj.periods_per_year + 1).tolist()}
+    periods.update({name: round_like_python(proj[name][0], 2).tolist() for name in PROJECTION_FIELDS})
+    return PeriodOutputs(
+        granularity=request.granularity,
+        periods_per_year=proj.periods_per_year,
+        periods=periods,
+        yearly=proj.to_yearly(0),
+        npv=round(float(finance['npv'][0]), 2),
+        irr_percent=round(float(finance['irr_percent'][0]), 1),
+        payback_years=round(float(finance['payback_years'][0]), 2),
+        discounted_payback_years=round(float(finance['discounted_payback_years'][0]), 2),
+        financial_viability=round(float(finance['financial_viability'][0])),
+    )
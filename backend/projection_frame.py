@@ -0,0 +1,47 @@
+from typing import Any, Dict, List
+import numpy as np
+from .models import YearlyProjection
+from .sme_batch import PROJECTION_FIELDS
+
+
+class ProjectionFrame:
+    """
+    Yearly projections of one scenario as one (fields x years) float64 block,
+    already rounded to whole numbers like YearlyProjection, with each field
+    exposed as a row view. Scoring, indicator and cashflow code read the
+    columns directly. YearlyProjection models are built only for the
+    response: from the to_rows() dicts when SmeOutputs validates them, or by
+    to_projections() directly.
+    """
+    __slots__ = ('values',) + tuple(PROJECTION_FIELDS)
+
+    def __init__(self, values: np.ndarray):
+        # Rows follow PROJECTION_FIELDS
+        self.values = values
+        for k, name in enumerate(PROJECTION_FIELDS):
+            setattr(self, name, values[k])
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> 'ProjectionFrame':
+        return cls(np.vstack([columns[name] for name in PROJECTION_FIELDS]))
+
+    def __len__(self) -> int:
+        return len(self.revenue_a)
+
+    def totals(self) -> Dict[str, float]:
+        """Sum of each field over the horizon; whole numbers, so exact in any order."""
+        return dict(zip(PROJECTION_FIELDS, self.values.sum(axis=1).tolist()))
+
+    def last(self, name: str) -> float:
+        return float(getattr(self, name)[-1])
+
+    def incremental_cash_flows(self) -> np.ndarray:
+        # Gain per year of Scenario B over Scenario A
+        return (self.profit_b + self.savings) - self.profit_a
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Same dicts as [p.model_dump() for p in to_projections()], without the models."""
+        return [{'year': t + 1, **dict(zip(PROJECTION_FIELDS, year))} for t, year in enumerate(self.values.T.tolist())]
+
+    def to_projections(self) -> List[YearlyProjection]:
+        return [YearlyProjection(year=t + 1, **dict(zip(PROJECTION_FIELDS, year))) for t, year in enumerate(self.values.T.tolist())]
@@ -0,0 +1,223 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from . import config
+from .cache import canonical_key
+from .models import ScenarioQuery, SmeInputs, SmeOutputs, StoredScenario
+from .sme_batch import SCORE_FIELDS, SmeBatchEngine
+from .sme_simulator import SmeSimulator
+
+# Persistent scenario store: SmeInputs and their SmeOutputs in a local SQLite
+# file, keyed like the result cache (hash of the normalized inputs + formula
+# version). Segment fields and key metrics are real columns so "top N by
+# metric within industry/region" is answered from an index without touching
+# the outputs. WAL lets API workers read while a batch job writes.
+
+# Metric columns, stored for every scenario and usable in ScenarioQuery.metric
+METRIC_COLUMNS = SCORE_FIELDS + ['esg_score', 'roi_percent', 'irr_percent', 'payback_years', 'financial_viability',
+                                 'carbon_reduction_tons', 'resilience_index']
+# Metrics with a (formula_version, industry, region, metric) index for segment top-N queries
+INDEXED_METRICS = ['overall', 'economic', 'environmental', 'strategic', 'esg_score']
+SEGMENT_FIELDS = ['industry', 'company_size', 'region']
+
+# Keys per "IN (...)" lookup, under SQLite's host-parameter limit
+LOOKUP_CHUNK = 500
+
+
+class ConnectionPool:
+    """
+    Up to `size` SQLite connections shared between threads; callers block
+    while all of them are checked out.
+    """
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        self._slots.acquire()
+        try:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                db = self._connect()
+            try:
+                yield db
+            finally:
+                self._idle.put(db)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+
+class ScenarioStore:
+    """
+    Saved scenarios with result reuse: calculate_many() only computes the
+    inputs not stored yet for the current formula version. The file is created
+    on first use.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, version: str = SmeSimulator.FORMULA_VERSION):
+        self.path = path
+        self.version = version
+        self.pool = ConnectionPool(path, pool_size)
+        self._ready = False
+        self._schema_lock = threading.Lock()
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        with self.pool.connection() as db:
+            if not self._ready:
+                with self._schema_lock:
+                    if not self._ready:
+                        self._create_schema(db)
+                        self._ready = True
+            yield db
+
+    def _create_schema(self, db: sqlite3.Connection) -> None:
+        metrics = ', '.join(f"{name} REAL NOT NULL" for name in METRIC_COLUMNS)
+        db.execute("CREATE TABLE IF NOT EXISTS scenarios (key TEXT PRIMARY KEY, formula_version TEXT NOT NULL, "
+                   "industry TEXT NOT NULL, company_size TEXT NOT NULL, region TEXT NOT NULL, "
+                   f"forecast_horizon INTEGER NOT NULL, {metrics}, "
+                   "inputs TEXT NOT NULL, outputs BLOB NOT NULL, created_at REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS scenarios_segment ON scenarios "
+                   "(formula_version, industry, region, company_size)")
+        for name in INDEXED_METRICS:
+            db.execute(f"CREATE INDEX IF NOT EXISTS scenarios_{name} ON scenarios "
+                       f"(formula_version, industry, region, {name})")
+
+    def key(self, inputs: SmeInputs) -> str:
+        return canonical_key(inputs, self.version)
+
+    def save(self, inputs: SmeInputs, outputs: SmeOutputs) -> str:
+        return self.save_many([(inputs, outputs)])[0]
+
+    def save_many(self, scenarios: Sequence[Tuple[SmeInputs, SmeOutputs]]) -> List[str]:
+        """Insert in one transaction; scenarios already stored are left as they are."""
+        rows = []
+        for inputs, outputs in scenarios:
+            metrics = [getattr(outputs.scores, name) for name in SCORE_FIELDS]
+            metrics += [getattr(outputs.details, name) for name in METRIC_COLUMNS[len(SCORE_FIELDS):]]
+            rows.append(self._row(inputs, metrics, outputs.model_dump_json().encode()))
+        self._insert(rows)
+        return [row[0] for row in rows]
+
+    def calculate_many(self, inputs: Sequence[SmeInputs]) -> Tuple[List[str], int]:
+        """
+        Store results for every scenario, scoring only those missing from the
+        store (as one vectorized batch). Returns the keys, in input order, and
+        how many results were reused.
+        """
+        keys = [self.key(i) for i in inputs]
+        stored = self._existing(keys)
+        missing: Dict[str, SmeInputs] = {}
+        for key, i in zip(keys, inputs):
+            if key not in stored:
+                missing.setdefault(key, i)
+        if missing:
+            todo = list(missing.values())
+            result = SmeBatchEngine().calculate(todo)
+            columns = [result.metric(name) for name in METRIC_COLUMNS]
+            rows = [self._row(i, [float(c[k]) for c in columns], result.to_outputs(k).model_dump_json().encode())
+                    for k, i in enumerate(todo)]
+            self._insert(rows)
+        return keys, len(keys) - len(missing)
+
+    def get(self, key: str) -> Optional[StoredScenario]:
+        with self._db() as db:
+            row = db.execute(f"SELECT {self._select(True)} FROM scenarios WHERE key = ?", (key,)).fetchone()
+        return self._scenario(row, True) if row is not None else None
+
+    def outputs(self, inputs: SmeInputs) -> Optional[SmeOutputs]:
+        with self._db() as db:
+            row = db.execute("SELECT outputs FROM scenarios WHERE key = ?", (self.key(inputs),)).fetchone()
+        return SmeOutputs.model_validate_json(row[0]) if row is not None else None
+
+    def query(self, q: ScenarioQuery) -> List[StoredScenario]:
+        """Top `limit` scenarios of the current formula version by `metric`, optionally within a segment."""
+        if q.metric not in METRIC_COLUMNS:
+            raise ValueError(f"unknown metric: {q.metric}; stored metrics are {', '.join(METRIC_COLUMNS)}")
+        if q.limit < 1:
+            raise ValueError("limit must be at least 1")
+        where = ["formula_version = ?"]
+        params: List[Any] = [self.version]
+        for name in SEGMENT_FIELDS:
+            value = getattr(q, name)
+            if value is not None:
+                where.append(f"{name} = ?")
+                params.append(value)
+        order = 'ASC' if q.ascending else 'DESC'
+        sql = (f"SELECT {self._select(q.include_outputs)} FROM scenarios WHERE {' AND '.join(where)} "
+               f"ORDER BY {q.metric} {order}, key LIMIT ?")
+        with self._db() as db:
+            rows = db.execute(sql, params + [q.limit]).fetchall()
+        return [self._scenario(row, q.include_outputs) for row in rows]
+
+    def count(self) -> int:
+        with self._db() as db:
+            return db.execute("SELECT COUNT(*) FROM scenarios WHERE formula_version = ?", (self.version,)).fetchone()[0]
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _row(self, inputs: SmeInputs, metrics: List[float], outputs: bytes) -> Tuple[Any, ...]:
+        return (self.key(inputs), self.version, inputs.industry, inputs.company_size, inputs.region,
+                inputs.forecast_horizon, *metrics, inputs.model_dump_json(), outputs, time.time())
+
+    def _insert(self, rows: List[Tuple[Any, ...]]) -> None:
+        if not rows:
+            return
+        placeholders = ', '.join('?' * len(rows[0]))
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.executemany(f"INSERT OR IGNORE INTO scenarios VALUES ({placeholders})", rows)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _existing(self, keys: List[str]) -> set:
+        found = set()
+        unique = list(dict.fromkeys(keys))
+        with self._db() as db:
+            for start in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[start:start + LOOKUP_CHUNK]
+                marks = ', '.join('?' * len(chunk))
+                found.update(k for (k,) in db.execute(f"SELECT key FROM scenarios WHERE key IN ({marks})", chunk))
+        return found
+
+    def _select(self, include_outputs: bool) -> str:
+        columns = ['key', 'industry', 'company_size', 'region', 'forecast_horizon'] + METRIC_COLUMNS + ['inputs']
+        return ', '.join(columns + (['outputs'] if include_outputs else []))
+
+    def _scenario(self, row: Tuple[Any, ...], include_outputs: bool) -> StoredScenario:
+        n = len(METRIC_COLUMNS)
+        return StoredScenario(
+            key=row[0], industry=row[1], company_size=row[2], region=row[3], forecast_horizon=row[4],
+            metrics=dict(zip(METRIC_COLUMNS, row[5:5 + n])),
+            inputs=SmeInputs.model_validate_json(row[5 + n]),
+            outputs=SmeOutputs.model_validate_json(row[6 + n]) if include_outputs else None,
+        )
+
+
+def build_scenario_store() -> ScenarioStore:
+    return ScenarioStore(config.SCENARIO_STORE_PATH, config.SCENARIO_STORE_POOL_SIZE)
@@ -0,0 +1,68 @@
+from typing import Optional, Tuple
+import numpy as np
+from .models import SensitivityOutputs, SensitivityRequest, SmeInputs, TornadoBar
+from .sme_batch import BatchInputs, FIELD_BOUNDS, INT_FIELDS, NUMERIC_FIELDS, SCORE_FIELDS, DETAIL_FIELDS, SmeBatchEngine
+
+# Smallest admissible value per integer field when perturbing downwards
+INT_FIELD_MINIMUM = {'forecast_horizon': 1, 'num_employees': 0, 'depreciation_years': 0}
+
+
+class SensitivityAnalyzer:
+    """
+    One-at-a-time +/- delta perturbation of every numeric lever, evaluated as a
+    single (1 + 2 x levers)-row batch.
+    """
+
+    def __init__(self, engine: Optional[SmeBatchEngine] = None):
+        self.engine = engine or SmeBatchEngine()
+
+    def run(self, request: SensitivityRequest) -> SensitivityOutputs:
+        fields = request.fields if request.fields is not None else NUMERIC_FIELDS
+        unknown = [f for f in fields if f not in NUMERIC_FIELDS]
+        if unknown:
+            raise ValueError(f"unknown numeric input fields: {', '.join(unknown)}")
+        bad = [m for m in request.indicators if m not in DETAIL_FIELDS]
+        if bad:
+            raise ValueError(f"unknown indicators: {', '.join(bad)}")
+        if request.delta <= 0:
+            raise ValueError("delta must be positive")
+
+        base = BatchInputs.from_inputs([request.inputs])
+        rows = 1 + 2 * len(fields)
+        columns = {name: np.repeat(base[name], rows) for name in NUMERIC_FIELDS}
+        steps = []
+        for k, name in enumerate(fields):
+            low, high = self._perturb(name, getattr(request.inputs, name), request.delta)
+            columns[name][1 + 2 * k] = low
+            columns[name][2 + 2 * k] = high
+            steps.append((low, high))
+        result = self.engine.calculate(BatchInputs(columns))
+
+        metrics = SCORE_FIELDS + [m for m in request.indicators if m not in SCORE_FIELDS]
+        base_values = {m: float(result.metric(m)[0]) for m in metrics}
+        tornado = {}
+        for m in metrics:
+            values = result.metric(m)
+            bars = []
+            for k, name in enumerate(fields):
+                x0 = float(getattr(request.inputs, name))
+                (x_lo, x_hi), y_lo, y_hi = steps[k], float(values[1 + 2 * k]), float(values[2 + 2 * k])
+                y0 = base_values[m]
+                # Undefined around a zero base or a lever that could not move: None, not a misleading 0
+                elasticity = ((y_hi - y_lo) / y0) / ((x_hi - x_lo) / x0) if y0 != 0 and x0 != 0 and x_hi != x_lo else None
+                bars.append(TornadoBar(field=name, input_low=x_lo, input_high=x_hi, output_low=y_lo, output_high=y_hi,
+                                       swing=abs(y_hi - y_lo), elasticity=elasticity))
+            bars.sort(key=lambda b: b.swing, reverse=True)
+            tornado[m] = bars
+        return SensitivityOutputs(base=base_values, tornado=tornado)
+
+    def _perturb(self, name: str, value: float, delta: float) -> Tuple[float, float]:
+        # A zero lever is moved by delta times its default scale instead of not at all
+        scale = abs(value) or abs(SmeInputs.model_fields[name].default) or 1.0
+        step = delta * scale
+        if name in INT_FIELDS:
+            step = max(1, round(step))
+            high = FIELD_BOUNDS.get(name, (None, None))[1]
+            return (float(max(INT_FIELD_MINIMUM.get(name, 0), value - step)),
+                    float(value + step if high is None else min(high, value + step)))
+        return value - step, value + step
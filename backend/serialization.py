@@ -0,0 +1,97 @@
+import json
+from typing import Any, Dict, List, Optional
+from .metrics import timed
+from .models import SmeOutputs, YearlyProjection
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: application/msgpack is then not offered
+    msgpack = None
+
+# Response encodings for SmeOutputs. The route returns encoded bytes itself, so
+# FastAPI neither re-validates the (already trusted) outputs through
+# response_model nor runs them through jsonable_encoder + json.dumps.
+#
+#   application/json                     the SmeOutputs shape (default)
+#   application/vnd.sme.columnar+json    projections as parallel arrays, one per field
+#   application/msgpack                  the columnar document as MessagePack
+
+JSON = 'application/json'
+COLUMNAR_JSON = 'application/vnd.sme.columnar+json'
+MSGPACK = 'application/msgpack'
+
+PROJECTION_COLUMNS = list(YearlyProjection.model_fields)
+
+
+def available_media_types() -> List[str]:
+    return [JSON, COLUMNAR_JSON] + ([MSGPACK] if msgpack is not None else [])
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    Media type to answer an Accept header with: the supported type of highest
+    q (ties go to the client's order). JSON is the answer for a missing header,
+    wildcards, or a header naming only unsupported types; None only when JSON
+    itself is excluded with q=0 and nothing else supported is acceptable.
+    """
+    if not accept:
+        return JSON
+    supported = available_media_types()
+    best, best_q = None, 0.0
+    excluded = set()
+    for part in accept.split(','):
+        media_type, _, params = part.strip().partition(';')
+        media_type = media_type.strip().lower()
+        q: Optional[float] = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None  # malformed weight: the entry neither selects nor excludes
+        if q is None:
+            continue
+        if media_type == 'application/x-msgpack':
+            media_type = MSGPACK
+        if media_type in ('*/*', 'application/*'):
+            media_type = JSON
+        if q <= 0:
+            excluded.add(media_type)
+        elif media_type in supported and q > best_q:
+            best, best_q = media_type, q
+    if best is None and JSON not in excluded:
+        # Clients sending browser-style or unrelated Accept headers keep getting JSON
+        return JSON
+    return best
+
+
+def dumps(document: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(document)
+    return json.dumps(document, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def columnar(outputs: SmeOutputs) -> Dict[str, Any]:
+    """SmeOutputs as a dict whose projections are {field: [value per year]}."""
+    document = outputs.model_dump(exclude={'projections'})
+    rows = [p.model_dump() for p in outputs.projections]
+    document['projections'] = {name: [row[name] for row in rows] for name in PROJECTION_COLUMNS}
+    return document
+
+
+@timed('encode')
+def encode_outputs(outputs: SmeOutputs, media_type: str = JSON) -> bytes:
+    if media_type == JSON:
+        # pydantic-core's serializer: same bytes FastAPI would produce, without the detour through dicts
+        return outputs.model_dump_json().encode()
+    if media_type == COLUMNAR_JSON:
+        return dumps(columnar(outputs))
+    if media_type == MSGPACK and msgpack is not None:
+        return msgpack.packb(columnar(outputs), use_bin_type=True)
+    raise ValueError(f"unsupported media type: {media_type}")
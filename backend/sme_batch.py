@@ -0,0 +1,425 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from . import cashflow
+from .metrics import registry
+from .models import SmeInputs, SmeOutputs, Alert, SmeScore, HeatmapCell, SmeDeepIndicators, YearlyProjection
+
+# Columnar batch engine: the SmeSimulator.calculate math over N scenarios at once,
+# as (N,) and (N x horizon) float64 arrays. Every operation mirrors the scalar
+# path step by step (same order of additions, libm pow, per-year round()) so that
+# a materialized batch row is identical to SmeSimulator().calculate(inputs).
+
+NUMERIC_FIELDS = [name for name, f in SmeInputs.model_fields.items() if f.annotation in (int, float)]
+INT_FIELDS = [name for name, f in SmeInputs.model_fields.items() if f.annotation is int]
+# Inclusive (low, high) of the fields SmeInputs constrains; arrays built without
+# SmeInputs validation (levers, sweeps) are checked against these
+FIELD_BOUNDS = {
+    name: (next((m.ge for m in f.metadata if hasattr(m, 'ge')), None), next((m.le for m in f.metadata if hasattr(m, 'le')), None))
+    for name, f in SmeInputs.model_fields.items() if f.metadata
+}
+
+PROJECTION_FIELDS = ['revenue_a', 'revenue_b', 'opex_a', 'opex_b', 'profit_a', 'profit_b', 'savings', 'cumulative_investment']
+SCORE_FIELDS = ['economic', 'environmental', 'strategic', 'overall']
+DETAIL_FIELDS = [name for name in SmeDeepIndicators.model_fields if name != 'execution_risk_factor']
+
+HEATMAP_CELLS = [
+    ('Economic', 'Upside'), ('Economic', 'Risk'), ('Economic', 'Feasibility'),
+    ('Environmental', 'Upside'), ('Environmental', 'Risk'), ('Environmental', 'Feasibility'),
+    ('Strategic', 'Upside'), ('Strategic', 'Risk'), ('Strategic', 'Feasibility'),
+]
+HEATMAP_INVERTED = np.array([col == 'Risk' for _, col in HEATMAP_CELLS])
+COLORS = ['red', 'yellow', 'green']
+
+ALERTS = [
+    Alert(message="Greenwashing Risk: High economic projection with low environmental impact scores.", severity="high"),
+    Alert(message="Financial Risk: Strong environmental results but weak economic sustainability.", severity="high"),
+    Alert(message="Strategic Risk: High economic growth without corresponding environmental transformation.", severity="medium"),
+    Alert(message="Execution Risk: High complexity and investment relative to current revenue.", severity="medium"),
+    Alert(message="Long-term Profitability Alert: Scenario B annual profit remains below Scenario A.", severity="medium"),
+]
+
+EXECUTION_RISK_LEVELS = ['Low', 'Medium', 'High']
+
+
+def round_like_python(values: Any, ndigits: Optional[int] = None) -> np.ndarray:
+    """Vectorized round() that agrees bit-for-bit with the builtin (half-to-even)."""
+    values = np.asarray(values, dtype=float)
+    if ndigits is None:
+        return np.rint(values) + 0.0  # + 0.0 folds -0.0 into 0.0 like float(round(x))
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    out = np.rint(scaled) / scale
+    # When the rounded product lands exactly on a .5 tie, builtin round() decides on
+    # the exact product instead; recover the product's rounding error (Dekker) to see
+    # which side of the tie it really is on.
+    lower = np.floor(scaled)
+    tie = scaled - lower == 0.5
+    if tie.any():
+        x = values[tie]
+        err = _product_error(x, scale, scaled[tie])
+        up = (err > 0) | ((err == 0) & (lower[tie] % 2 == 1))
+        out[tie] = np.copysign((lower[tie] + up) / scale, x)
+    return out
+
+
+def _product_error(a: np.ndarray, b: float, product: np.ndarray) -> np.ndarray:
+    # a * b - fl(a * b), exactly, via Veltkamp splitting
+    def split(v):
+        c = 134217729.0 * v
+        hi = c - (c - v)
+        return hi, v - hi
+    a_hi, a_lo = split(a)
+    b_hi, b_lo = split(np.float64(b))
+    return ((a_hi * b_hi - product) + a_hi * b_lo + a_lo * b_hi) + a_lo * b_lo
+
+
+def clamp(values: Any) -> np.ndarray:
+    return np.clip(values, 0.0, 100.0)
+
+
+def color_codes(values: np.ndarray, invert: Any = False) -> np.ndarray:
+    # 0 = red, 1 = yellow, 2 = green (indices into COLORS)
+    band = np.where(values < 33, 0, np.where(values < 66, 1, 2))
+    return np.where(invert, 2 - band, band)
+
+
+class BatchInputs:
+    """
+    Columnar view of N SmeInputs: one float64 array per numeric field.
+    Non-numeric fields (industry, region, ...) do not enter the math and are not kept.
+    """
+    __slots__ = ('columns', 'size')
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        missing = [name for name in NUMERIC_FIELDS if name not in columns]
+        if missing:
+            raise ValueError(f"missing input columns: {', '.join(missing)}")
+        self.columns = {name: np.ascontiguousarray(columns[name], dtype=float) for name in NUMERIC_FIELDS}
+        sizes = {len(col) for col in self.columns.values()}
+        if len(sizes) != 1:
+            raise ValueError("input columns must all have the same length")
+        self.size = sizes.pop()
+
+    @classmethod
+    def from_inputs(cls, inputs: Sequence[SmeInputs]) -> 'BatchInputs':
+        rows = [[getattr(i, name) for name in NUMERIC_FIELDS] for i in inputs]
+        matrix = np.array(rows, dtype=float).reshape(len(rows), len(NUMERIC_FIELDS))
+        return cls.from_matrix(matrix)
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Any], size: Optional[int] = None) -> 'BatchInputs':
+        """Build from a partial mapping of field -> scalar or array; absent fields take SmeInputs defaults."""
+        unknown = set(columns) - set(NUMERIC_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown numeric input fields: {', '.join(sorted(unknown))}")
+        if size is None:
+            lengths = {np.size(v) for v in columns.values() if np.ndim(v) > 0}
+            if len(lengths) > 1:
+                raise ValueError("input columns must all have the same length")
+            size = lengths.pop() if lengths else 1
+        defaults = SmeInputs.model_fields
+        return cls({
+            name: np.broadcast_to(np.asarray(columns.get(name, defaults[name].default), dtype=float), (size,))
+            for name in NUMERIC_FIELDS
+        })
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> 'BatchInputs':
+        """Inverse of to_matrix(): columns follow NUMERIC_FIELDS order."""
+        return cls({name: matrix[:, k] for k, name in enumerate(NUMERIC_FIELDS)})
+
+    @classmethod
+    def coerce(cls, inputs: Union['BatchInputs', Sequence[SmeInputs], Mapping[str, Any]]) -> 'BatchInputs':
+        if isinstance(inputs, BatchInputs):
+            return inputs
+        if isinstance(inputs, Mapping):
+            return cls.from_columns(inputs)
+        return cls.from_inputs(inputs)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def to_matrix(self) -> np.ndarray:
+        return np.column_stack([self.columns[name] for name in NUMERIC_FIELDS]) if self.size else np.empty((0, len(NUMERIC_FIELDS)))
+
+    def take(self, index: Any) -> 'BatchInputs':
+        return BatchInputs({name: col[index] for name, col in self.columns.items()})
+
+    def to_inputs(self, k: int) -> SmeInputs:
+        """Rebuild row k as SmeInputs (text fields take their defaults)."""
+        return SmeInputs(**{
+            name: int(self.columns[name][k]) if name in INT_FIELDS else float(self.columns[name][k])
+            for name in NUMERIC_FIELDS
+        })
+
+
+class BatchResult:
+    """
+    Arrays for N scenarios. Projections are (N x H) with H the longest horizon in
+    the batch; `valid` masks the years beyond each row's own horizon.
+    """
+    __slots__ = ('size', 'horizon', 'years', 'valid', 'projections', 'scores', 'details',
+                 'execution_risk', 'heatmap_values', 'heatmap_colors', 'alerts')
+
+    def __init__(self, horizon: np.ndarray, projections: Dict[str, np.ndarray], scores: Dict[str, np.ndarray],
+                 details: Dict[str, np.ndarray], execution_risk: np.ndarray, heatmap_values: np.ndarray,
+                 heatmap_colors: np.ndarray, alerts: np.ndarray):
+        self.size = len(horizon)
+        self.horizon = horizon
+        width = projections['revenue_a'].shape[1]
+        self.years = np.arange(1, width + 1)
+        self.valid = self.years[None, :] <= horizon[:, None]
+        self.projections = projections
+        self.scores = scores
+        self.details = details
+        self.execution_risk = execution_risk      # index into EXECUTION_RISK_LEVELS
+        self.heatmap_values = heatmap_values      # (N x 9), HEATMAP_CELLS order
+        self.heatmap_colors = heatmap_colors      # (N x 9), index into COLORS
+        self.alerts = alerts                      # (N x 5) bool, ALERTS order
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the result arrays."""
+        arrays = [self.horizon, self.valid, self.execution_risk, self.heatmap_values, self.heatmap_colors, self.alerts,
+                  *self.projections.values(), *self.scores.values(), *self.details.values()]
+        return sum(a.nbytes for a in arrays)
+
+    @staticmethod
+    def estimate_nbytes(rows: int, width: int) -> int:
+        """Upper bound of nbytes for `rows` scenarios whose longest horizon is `width`."""
+        per_row = (len(PROJECTION_FIELDS) * width + len(SCORE_FIELDS) + len(DETAIL_FIELDS) + 2 * len(HEATMAP_CELLS) + 2) * 8
+        return rows * (per_row + width + len(ALERTS))
+
+    def metric(self, name: str) -> np.ndarray:
+        """Look up a per-scenario metric by name, e.g. 'overall', 'scores.overall' or 'details.roi_percent'."""
+        key = name.split('.', 1)[-1]
+        if key in self.scores:
+            return self.scores[key]
+        if key in self.details:
+            return self.details[key]
+        raise KeyError(f"unknown metric: {name}")
+
+    def to_outputs(self, k: int) -> SmeOutputs:
+        h = int(self.horizon[k])
+        projections = [
+            YearlyProjection(year=t + 1, **{name: float(self.projections[name][k, t]) for name in PROJECTION_FIELDS})
+            for t in range(h)
+        ]
+        details = {name: float(self.details[name][k]) for name in DETAIL_FIELDS}
+        return SmeOutputs(
+            scores=SmeScore(**{name: float(self.scores[name][k]) for name in SCORE_FIELDS}),
+            heatmap=[
+                HeatmapCell(row=row, col=col, value=float(self.heatmap_values[k, c]), color=COLORS[self.heatmap_colors[k, c]])
+                for c, (row, col) in enumerate(HEATMAP_CELLS)
+            ],
+            alerts=[ALERTS[a] for a in np.flatnonzero(self.alerts[k])],
+            details=SmeDeepIndicators(execution_risk_factor=EXECUTION_RISK_LEVELS[self.execution_risk[k]], **details),
+            projections=projections,
+        )
+
+    def materialize(self) -> List[SmeOutputs]:
+        return [self.to_outputs(k) for k in range(self.size)]
+
+
+class SmeBatchEngine:
+    """
+    Vectorized SmeSimulator: same formulas, N scenarios per call.
+    """
+
+    def calculate(self, inputs: Union[BatchInputs, Sequence[SmeInputs], Mapping[str, Any]],
+                  materialize: bool = False) -> Union[BatchResult, List[SmeOutputs]]:
+        b = BatchInputs.coerce(inputs)
+        registry.inc('sme_batch_calls_total', engine='inprocess')
+        registry.inc('sme_batch_rows_total', len(b), engine='inprocess')
+        result = self.evaluate(b, self.project(b))
+        return result.materialize() if materialize else result
+
+    def project(self, b: BatchInputs, width: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Rounded yearly projections, (N x width); width defaults to the longest horizon."""
+        n = len(b)
+        if width is None:
+            width = int(b['forecast_horizon'].max()) if n else 0
+        years = np.arange(1, width + 1, dtype=float)
+
+        growth_a = b['revenue_growth_rate'] + b['inflation_rate'] + 0.01
+        growth_b = b['revenue_growth_rate'] + b['reputation_uplift_pct'] + b['green_market_access_pct']
+        rev_a = self._compound(b['initial_revenue'], 1 + growth_a, width)
+        rev_b = self._compound(b['initial_revenue'], 1 + growth_b, width)
+
+        vc = b['variable_costs_pct'][:, None]
+        opex_a = rev_a * vc + b['fixed_costs'][:, None]
+        opex_b = rev_b * vc + b['fixed_costs'][:, None]
+
+        total_saving_pct = (b['energy_efficiency_pct'] + b['resource_efficiency_pct'] +
+                            b['waste_reduction_pct'] + b['circular_economy_pct'])
+        savings = total_saving_pct[:, None] * opex_b
+
+        annual_reinvest = rev_b * b['reinvest_pct'][:, None]
+        cum_inv_b = self._accumulate(b['initial_capex'] + b['sustainability_capex'], annual_reinvest)
+
+        ebit_a = rev_a - opex_a
+        profit_a = ebit_a - np.maximum(0, ebit_a * b['tax_rate'][:, None])
+
+        dep_years = b['depreciation_years']
+        depreciation = np.where(dep_years > 0, b['sustainability_capex'] / np.where(dep_years > 0, dep_years, 1), 0.0)
+        ebitda_b = rev_b - opex_b + savings
+        ebit_b = ebitda_b - np.where(years[None, :] <= dep_years[:, None], depreciation[:, None], 0.0)
+        profit_b = ebit_b - np.maximum(0, ebit_b * b['tax_rate'][:, None])
+
+        raw = dict(revenue_a=rev_a, revenue_b=rev_b, opex_a=opex_a, opex_b=opex_b, profit_a=profit_a,
+                   profit_b=profit_b, savings=savings, cumulative_investment=cum_inv_b)
+        return {name: round_like_python(raw[name]) for name in PROJECTION_FIELDS}
+
+    def evaluate(self, b: BatchInputs, proj: Dict[str, np.ndarray]) -> BatchResult:
+        horizon = b['forecast_horizon'].astype(int)
+        width = proj['revenue_a'].shape[1]
+        years = np.arange(1, width + 1)
+        valid = years[None, :] <= horizon[:, None]
+        last = np.maximum(horizon - 1, 0)[:, None]
+
+        def total(name: str) -> np.ndarray:
+            # Projections are whole numbers, so the sum is exact in any order
+            return np.where(valid, proj[name], 0.0).sum(axis=1)
+
+        capex = b['sustainability_capex']
+        rev0 = b['initial_revenue']
+        total_revenue_b = total('revenue_b')
+        total_profit_b = total('profit_b')
+        total_savings = total('savings')
+        total_opex_b = total('opex_b')
+        cum_reinvest = total_revenue_b * b['reinvest_pct']
+        total_inv = b['initial_capex'] + capex + cum_reinvest
+        has_inv = total_inv > 0
+        safe_inv = np.where(has_inv, total_inv, 1.0)
+        roi = np.where(has_inv, (total_profit_b + total_savings) / safe_inv, 0.0)
+        roi_pct = np.where(has_inv, (total_profit_b + total_savings) / safe_inv * 100, 0.0)
+
+        gain = np.where(valid, (proj['profit_b'] + proj['savings']) - proj['profit_a'], 0.0)
+        financial_viability, discounted_payback = self.discounted(capex, gain, valid, horizon, b['discount_rate'])
+
+        econ = clamp(round_like_python(50 + (roi * 20)))
+        efficiency_contrib = (b['energy_efficiency_pct'] + b['resource_efficiency_pct'] + b['waste_reduction_pct'] + b['circular_economy_pct']) * 25
+        scope_contrib = (b['scope_1_reduction'] + b['scope_2_reduction'] + b['scope_3_reduction']) / 3
+        env = clamp(round_like_python(efficiency_contrib * 0.2 + scope_contrib * 0.4 + b['carbon_reduction_potential'] * 0.4))
+        strat = clamp(round_like_python(
+            (b['reputation_uplift_pct'] * 3 +
+             b['productivity_gain_pct'] * 3 +
+             b['turnover_reduction_pct'] * 2 +
+             b['green_market_access_pct'] * 2 +
+             (b['disruption_impact'] / 100)) * 10))
+        overall = round_like_python(econ * 0.4 + env * 0.3 + strat * 0.3)
+
+        carbon_reduction = (total_savings * 0.05) + (b['carbon_reduction_potential'] * 10)
+        tco = b['initial_capex'] + capex + total_opex_b + cum_reinvest
+        rev_or_one = np.where(rev0 != 0, rev0, 1.0)
+        exec_risk_pct = clamp((capex / rev_or_one) * 100)
+        social_score = (b['reputation_uplift_pct'] * 0.5 + b['productivity_gain_pct'] * 0.3 + b['turnover_reduction_pct'] * 0.2) * 100
+        esg_score = env * 0.4 + social_score * 0.3 + (100 - exec_risk_pct) * 0.3
+        employee_engagement = (b['productivity_gain_pct'] * 0.4 + b['turnover_reduction_pct'] * 0.3 + b['reputation_uplift_pct'] * 0.3) * 100
+        waste_diversion = np.minimum(100.0, (b['waste_reduction_pct'] * 100) + (b['circular_economy_pct'] * 30))
+        res_eff_index = (b['energy_efficiency_pct'] * 0.30 + b['resource_efficiency_pct'] * 0.30 + b['waste_reduction_pct'] * 0.20 + b['circular_economy_pct'] * 0.20) * 100
+        energy_savings_mwh = (total_opex_b * b['energy_efficiency_pct'] * 0.20) / 0.15 / 1000.0
+        water_savings_kl = total_revenue_b * b['resource_efficiency_pct'] / 1000.0
+
+        has_carbon = carbon_reduction > 0
+        has_revenue = total_revenue_b > 0
+        details = dict(
+            roi_percent=round_like_python(roi_pct, 1),
+            irr_percent=round_like_python(self._irr(capex, gain), 1),
+            payback_years=round_like_python(self._payback(capex, gain, horizon), 1),
+            discounted_payback_years=discounted_payback,
+            break_even_year=round_like_python(self._first_year(proj['profit_b'] > proj['profit_a'], valid, horizon), 1),
+            financial_viability=financial_viability,
+            tco_k=round_like_python(tco / 1000.0, 1),
+            carbon_reduction_tons=round_like_python(carbon_reduction, 1),
+            cost_per_ton_co2=np.where(has_carbon, round_like_python(capex / np.where(has_carbon, carbon_reduction, 1.0), 0), 0.0),
+            carbon_intensity_index=np.where(has_revenue, round_like_python((carbon_reduction / np.where(has_revenue, total_revenue_b, 1.0)) * 1000, 1), 0.0),
+            net_zero_progress=round_like_python(env, 1),
+            energy_savings_mwh=round_like_python(energy_savings_mwh, 2),
+            water_savings_kl=round_like_python(water_savings_kl, 1),
+            waste_diversion_index=round_like_python(waste_diversion, 1),
+            resource_efficiency_index=round_like_python(res_eff_index, 1),
+            esg_score=round_like_python(clamp(esg_score), 1),
+            resilience_index=round_like_python(strat, 1),
+            employee_engagement=round_like_python(clamp(employee_engagement), 1),
+        )
+        execution_risk = np.where(exec_risk_pct >= 50, 2, np.where(exec_risk_pct >= 20, 1, 0))
+
+        heatmap_raw = np.column_stack([
+            econ, capex / 10000, 75 - b['disruption_impact'] / 4,
+            env, 100 - b['carbon_reduction_potential'], 80 - b['scope_3_reduction'] / 5,
+            strat, b['disruption_impact'], 90 - (capex / rev_or_one) * 50,
+        ]) if len(b) else np.empty((0, len(HEATMAP_CELLS)))
+
+        profit_a_last = np.take_along_axis(proj['profit_a'], last, axis=1)[:, 0] if width else np.zeros(len(b))
+        profit_b_last = np.take_along_axis(proj['profit_b'], last, axis=1)[:, 0] if width else np.zeros(len(b))
+        greenwashing = (econ > 70) & (env < 40)
+        alerts = np.column_stack([
+            greenwashing,
+            (env > 70) & (econ < 40),
+            greenwashing,
+            (econ > 70) & (capex > rev0 * 0.5),
+            profit_b_last < profit_a_last,
+        ]) if len(b) else np.empty((0, len(ALERTS)), dtype=bool)
+
+        return BatchResult(
+            horizon=horizon,
+            projections=proj,
+            scores=dict(economic=econ, environmental=env, strategic=strat, overall=overall),
+            details=details,
+            execution_risk=execution_risk,
+            heatmap_values=round_like_python(heatmap_raw),
+            heatmap_colors=color_codes(heatmap_raw, HEATMAP_INVERTED[None, :]),
+            alerts=alerts,
+        )
+
+    def discounted(self, capex: np.ndarray, gain: np.ndarray, valid: np.ndarray, horizon: np.ndarray,
+                   rate: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        financial_viability and discounted_payback_years, the only outputs that read
+        discount_rate, from the (N x width) incremental cash flows `gain` (zero
+        outside `valid`). Lets callers re-discount evaluated rows at other rates.
+        """
+        years = np.arange(1, gain.shape[1] + 1, dtype=float)
+        disc = np.float_power((1 + rate)[:, None], years[None, :])
+        dcf = gain / disc
+        npv = -capex
+        for t in range(gain.shape[1]):
+            npv = np.where(valid[:, t], npv + dcf[:, t], npv)
+        capex_or_one = np.where(capex != 0, capex, 1.0)
+        return (clamp(round_like_python(50 + (npv / capex_or_one) * 50)),
+                round_like_python(self._payback(capex, dcf, horizon), 1))
+
+    def _compound(self, start: np.ndarray, factor: np.ndarray, width: int) -> np.ndarray:
+        # x_t = x_{t-1} * factor, multiplied in the same order as the scalar loop
+        steps = np.empty((len(start), width + 1))
+        steps[:, 0] = start
+        steps[:, 1:] = factor[:, None]
+        return np.multiply.accumulate(steps, axis=1)[:, 1:]
+
+    def _accumulate(self, start: np.ndarray, increments: np.ndarray) -> np.ndarray:
+        steps = np.empty((len(start), increments.shape[1] + 1))
+        steps[:, 0] = start
+        steps[:, 1:] = increments
+        return np.add.accumulate(steps, axis=1)[:, 1:]
+
+    def _first_year(self, hit: np.ndarray, valid: np.ndarray, horizon: np.ndarray) -> np.ndarray:
+        # First year (1-based) where `hit` holds, horizon + 1 when it never does
+        hit = hit & valid
+        found = hit.any(axis=1)
+        return np.where(found, hit.argmax(axis=1) + 1, horizon + 1).astype(float)
+
+    def _payback(self, inv: np.ndarray, flows: np.ndarray, horizon: np.ndarray) -> np.ndarray:
+        # Flows past a row's horizon are zero, so they can never complete a payback
+        period = cashflow.payback_period(inv, flows)
+        return np.where(np.isnan(period), horizon + 1.0, period)
+
+    def _irr(self, inv: np.ndarray, flows: np.ndarray) -> np.ndarray:
+        rate, status = cashflow.irr(np.column_stack([-inv, flows]))
+        return cashflow.irr_percent(rate, status)
@@ -1,6 +1,11 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Mapping, Sequence, Tuple, Union
+import math
 import numpy as np
-from .models import SmeInputs, SmeOutputs, Alert, SmeScore, HeatmapCell, SmeDeepIndicators, YearlyProjection
+from . import cashflow
+from .metrics import timed
+from .models import SmeInputs, SmeOutputs, Alert, SmeScore, HeatmapCell, SmeDeepIndicators
+from .projection_frame import ProjectionFrame
+from .sme_batch import PROJECTION_FIELDS, BatchInputs, BatchResult, SmeBatchEngine, round_like_python
 
 class SmeSimulator:
     """
@@ -8,27 +13,48 @@ class SmeSimulator:
     Implements Scenario A (Traditional) vs Scenario B (Sustainable)
     """
 
+    # Bump whenever a formula changes: cached results are keyed on it
+    FORMULA_VERSION = "2.2"
+
+    @timed('calculate')
     def calculate(self, i: SmeInputs) -> SmeOutputs:
-        projections = self._calculate_projections(i)
-        
+        return self._evaluate(i, self._calculate_projections(i))
+
+    @timed('evaluate')
+    def _evaluate(self, i: SmeInputs, frame: ProjectionFrame) -> SmeOutputs:
+        # One method per output group, so delta sessions can re-run only the groups a change reaches
+        scores = self._scores(i, frame)
+        econ_score, env_score, strat_score = scores.economic, scores.environmental, scores.strategic
+
+        heatmap = self._calculate_heatmap(i, econ_score, env_score, strat_score)
+        alerts = self._generate_alerts(i, frame, econ_score, env_score, strat_score)
+
+        incremental_cfs = frame.incremental_cash_flows().tolist()
+        details = SmeDeepIndicators(
+            **self._discounted_indicators(i, incremental_cfs),
+            **self._cash_flow_indicators(i, frame, incremental_cfs),
+            **self._indicators(i, frame, env_score, strat_score),
+        )
+
+        return SmeOutputs(
+            scores=scores,
+            heatmap=heatmap,
+            alerts=alerts,
+            details=details,
+            projections=frame.to_rows()
+        )
+
+    def _scores(self, i: SmeInputs, frame: ProjectionFrame) -> SmeScore:
         # Calculate scores based on the final year or cumulative metrics
-        # Final Year Metrics
-        last = projections[-1]
-        
         # Economic Score: Based on Cumulative ROI and NPV
-        total_inv = i.initial_capex + i.sustainability_capex + (sum(p.revenue_b for p in projections) * i.reinvest_pct)
-        total_profit_b = sum(p.profit_b for p in projections)
-        total_savings = sum(p.savings for p in projections)
+        totals = frame.totals()
+        total_revenue_b = totals['revenue_b']
+        total_inv = i.initial_capex + i.sustainability_capex + (total_revenue_b * i.reinvest_pct)
+        total_profit_b = totals['profit_b']
+        total_savings = totals['savings']
         
         # ROI = (Cumulative Net Profit + Cumulative Savings) / Cumulative Investment
         roi = (total_profit_b + total_savings) / total_inv if total_inv > 0 else 0
-        
-        # NPV Calculation (Simplified)
-        npv = -i.sustainability_capex
-        for t, p in enumerate(projections):
-            # Cash flow B - Cash flow A (Incremental profit)
-            incremental_cf = (p.profit_b + p.savings) - p.profit_a
-            npv += incremental_cf / ((1 + i.discount_rate) ** (t + 1))
 
         econ_score = self._clamp(round(50 + (roi * 20)))
         
@@ -52,17 +78,45 @@ class SmeSimulator:
         
         overall_score = round(econ_score * 0.4 + env_score * 0.3 + strat_score * 0.3)
 
-        heatmap = self._calculate_heatmap(i, projections, econ_score, env_score, strat_score)
-        alerts = self._generate_alerts(i, projections, econ_score, env_score, strat_score)
+        return SmeScore(
+            economic=float(econ_score),
+            environmental=float(env_score),
+            strategic=float(strat_score),
+            overall=float(overall_score)
+        )
+
+    def _discounted_indicators(self, i: SmeInputs, incremental_cfs: List[float]) -> Dict[str, Any]:
+        # The only outputs that read discount_rate
+        # NPV Calculation (Simplified)
+        # Cash flow B - Cash flow A (Incremental profit)
+        npv = -i.sustainability_capex
+        for t, incremental_cf in enumerate(incremental_cfs):
+            npv += incremental_cf / ((1 + i.discount_rate) ** (t + 1))
+        return dict(
+            discounted_payback_years=round(self._calculate_discounted_payback(i, incremental_cfs), 1),
+            financial_viability=self._clamp(round(50 + (npv / (i.sustainability_capex or 1)) * 50)),
+        )
+
+    def _cash_flow_indicators(self, i: SmeInputs, frame: ProjectionFrame, incremental_cfs: List[float]) -> Dict[str, Any]:
+        return dict(
+            irr_percent=round(self._calculate_irr(i, incremental_cfs), 1),
+            payback_years=round(self._calculate_payback(i, incremental_cfs), 1),
+            break_even_year=round(self._calculate_break_even(frame), 1),
+        )
+
+    def _indicators(self, i: SmeInputs, frame: ProjectionFrame, env_score: float, strat_score: float) -> Dict[str, Any]:
+        totals = frame.totals()
+        total_revenue_b = totals['revenue_b']
+        total_profit_b = totals['profit_b']
+        total_savings = totals['savings']
 
         # Total investment = Initial CAPEX + Sustainability CAPEX + Cumulative Reinvestments (METRICS_DOC)
-        total_inv = i.initial_capex + i.sustainability_capex + sum(p.revenue_b for p in projections) * i.reinvest_pct
+        total_inv = i.initial_capex + i.sustainability_capex + total_revenue_b * i.reinvest_pct
         roi_pct = (total_profit_b + total_savings) / total_inv * 100 if total_inv > 0 else 0
 
         carbon_reduction = (total_savings * 0.05) + (i.carbon_reduction_potential * 10)
-        total_revenue_b = sum(p.revenue_b for p in projections)
-        total_opex_b = sum(p.opex_b for p in projections)
-        cum_reinvest = sum(p.revenue_b for p in projections) * i.reinvest_pct
+        total_opex_b = totals['opex_b']
+        cum_reinvest = total_revenue_b * i.reinvest_pct
         tco = i.initial_capex + i.sustainability_capex + total_opex_b + cum_reinvest
 
         exec_risk_pct = self._clamp((i.sustainability_capex / (i.initial_revenue or 1)) * 100)
@@ -78,13 +132,8 @@ class SmeSimulator:
         water_savings_l = total_revenue_b * i.resource_efficiency_pct
         water_savings_kl = water_savings_l / 1000.0
 
-        details = SmeDeepIndicators(
+        return dict(
             roi_percent=round(roi_pct, 1),
-            irr_percent=round(self._calculate_irr(i, projections), 1),
-            payback_years=round(self._calculate_payback(i, projections), 1),
-            discounted_payback_years=round(self._calculate_discounted_payback(i, projections), 1),
-            break_even_year=round(self._calculate_break_even(projections), 1),
-            financial_viability=self._clamp(round(50 + (npv / (i.sustainability_capex or 1)) * 50)),
             tco_k=round(tco / 1000.0, 1),
             carbon_reduction_tons=round(carbon_reduction, 1),
             cost_per_ton_co2=round(i.sustainability_capex / carbon_reduction, 0) if carbon_reduction > 0 else 0.0,
@@ -100,118 +149,91 @@ class SmeSimulator:
             execution_risk_factor="High" if exec_risk_pct >= 50 else ("Medium" if exec_risk_pct >= 20 else "Low"),
         )
 
-        return SmeOutputs(
-            scores=SmeScore(
-                economic=float(econ_score),
-                environmental=float(env_score),
-                strategic=float(strat_score),
-                overall=float(overall_score)
-            ),
-            heatmap=heatmap,
-            alerts=alerts,
-            details=details,
-            projections=projections
-        )
+    def calculate_batch(self, inputs: Union[Sequence[SmeInputs], BatchInputs, Mapping[str, Any]],
+                        materialize: bool = False) -> Union[BatchResult, List[SmeOutputs]]:
+        """
+        Vectorized calculate() for N scenarios (a list of SmeInputs or columnar arrays).
+        Returns array-backed results; materialize=True builds the SmeOutputs list instead.
+        """
+        return SmeBatchEngine().calculate(inputs, materialize=materialize)
 
-    def _calculate_projections(self, i: SmeInputs) -> List[YearlyProjection]:
-        projections = []
-        
-        rev_a = i.initial_revenue
-        rev_b = i.initial_revenue
-        cum_inv_b = i.initial_capex + i.sustainability_capex
-        
+    @timed('projections')
+    def _calculate_projections(self, i: SmeInputs) -> ProjectionFrame:
+        rev_a, rev_b = self._revenue_paths(i)
+        return self._assemble_projections(rev_a, rev_b, self._scenario_a(i, rev_a), self._scenario_b(i, rev_b))
+
+    # The projection is split into stages so delta mode (delta.py) can recompute
+    # only those whose inputs changed; each stage reads just the fields it lists there.
+    # Columns are built with accumulate ufuncs, which run strictly in year order
+    # and so reproduce the year-by-year recurrences exactly.
+
+    def _revenue_paths(self, i: SmeInputs) -> Tuple[np.ndarray, np.ndarray]:
+        # Growth rates (METRICS_DOC: A = growth + inflation + 0.01; B = growth + reputation + green market)
+        growth_a = i.revenue_growth_rate + i.inflation_rate + 0.01
+        growth_b = i.revenue_growth_rate + i.reputation_uplift_pct + i.green_market_access_pct
+
+        steps = np.empty((2, i.forecast_horizon + 1))
+        steps[:, 0] = i.initial_revenue
+        steps[0, 1:] = 1 + growth_a
+        steps[1, 1:] = 1 + growth_b
+        rev_a, rev_b = np.multiply.accumulate(steps, axis=1)[:, 1:]
+        return rev_a, rev_b
+
+    def _scenario_a(self, i: SmeInputs, rev_a: np.ndarray) -> Dict[str, np.ndarray]:
+        opex_a = rev_a * i.variable_costs_pct + i.fixed_costs
+        ebit_a = rev_a - opex_a
+        tax_a = np.maximum(0, ebit_a * i.tax_rate)
+        return {'opex_a': opex_a, 'profit_a': ebit_a - tax_a}
+
+    def _scenario_b(self, i: SmeInputs, rev_b: np.ndarray) -> Dict[str, np.ndarray]:
         depreciation = i.sustainability_capex / i.depreciation_years if i.depreciation_years > 0 else 0
-        
-        for t in range(1, i.forecast_horizon + 1):
-            # Growth rates (METRICS_DOC: A = growth + inflation + 0.01; B = growth + reputation + green market)
-            growth_a = i.revenue_growth_rate + i.inflation_rate + 0.01
-            growth_b = i.revenue_growth_rate + i.reputation_uplift_pct + i.green_market_access_pct
-            
-            rev_a = rev_a * (1 + growth_a)
-            rev_b = rev_b * (1 + growth_b)
-            
-            # OPEX
-            opex_a = rev_a * i.variable_costs_pct + i.fixed_costs
-            opex_b = rev_b * i.variable_costs_pct + i.fixed_costs
-            
-            # Savings (Scenario B)
-            total_saving_pct = (i.energy_efficiency_pct + i.resource_efficiency_pct + 
-                                i.waste_reduction_pct + i.circular_economy_pct)
-            savings = total_saving_pct * opex_b
-            
-            # Annual Reinvestment
-            annual_reinvest = rev_b * i.reinvest_pct
-            cum_inv_b += annual_reinvest
-            
-            # Profit A
-            ebit_a = rev_a - opex_a
-            tax_a = max(0, ebit_a * i.tax_rate)
-            profit_a = ebit_a - tax_a
-            
-            # Profit B
-            ebitda_b = rev_b - opex_b + savings
-            ebit_b = ebitda_b - (depreciation if t <= i.depreciation_years else 0)
-            tax_b = max(0, ebit_b * i.tax_rate)
-            profit_b = ebit_b - tax_b
-            
-            projections.append(YearlyProjection(
-                year=t,
-                revenue_a=round(rev_a),
-                revenue_b=round(rev_b),
-                opex_a=round(opex_a),
-                opex_b=round(opex_b),
-                profit_a=round(profit_a),
-                profit_b=round(profit_b),
-                savings=round(savings),
-                cumulative_investment=round(cum_inv_b)
-            ))
-            
-        return projections
-
-    def _calculate_payback(self, i: SmeInputs, projections: List[YearlyProjection]) -> float:
-        cum_gain = 0
-        total_inv = i.sustainability_capex
-        for p in projections:
-            gain = (p.profit_b + p.savings) - p.profit_a
-            cum_gain += gain
-            if cum_gain >= total_inv:
-                return float(p.year)
-        return float(i.forecast_horizon + 1)
-
-    def _calculate_discounted_payback(self, i: SmeInputs, projections: List[YearlyProjection]) -> float:
-        cum_dcf = 0.0
-        inv = i.sustainability_capex
-        for t, p in enumerate(projections):
-            dcf = ((p.profit_b + p.savings) - p.profit_a) / ((1 + i.discount_rate) ** (t + 1))
-            cum_dcf += dcf
-            if cum_dcf >= inv:
-                return float(p.year)
-        return float(i.forecast_horizon + 1)
-
-    def _calculate_break_even(self, projections: List[YearlyProjection]) -> float:
-        for p in projections:
-            if p.profit_b > p.profit_a:
-                return float(p.year)
-        return float(projections[-1].year + 1) if projections else 0.0
-
-    def _calculate_irr(self, i: SmeInputs, projections: List[YearlyProjection]) -> float:
-        inv = i.sustainability_capex
-        def npv(r: float) -> float:
-            s = 0.0
-            for t, p in enumerate(projections):
-                cf = (p.profit_b + p.savings) - p.profit_a
-                s += cf / ((1 + r) ** (t + 1))
-            return -inv + s
-        low, high = 0.0, 2.0
-        for _ in range(50):
-            mid = (low + high) / 2
-            if npv(mid) >= 0:
-                low = mid
-            else:
-                high = mid
-        return (low + high) / 2 * 100
-
-    def _calculate_heatmap(self, i: SmeInputs, projections: List[YearlyProjection], econ: float, env: float, strat: float) -> List[HeatmapCell]:
+        total_saving_pct = (i.energy_efficiency_pct + i.resource_efficiency_pct +
+                            i.waste_reduction_pct + i.circular_economy_pct)
+
+        # OPEX and Savings (Scenario B)
+        opex_b = rev_b * i.variable_costs_pct + i.fixed_costs
+        savings = total_saving_pct * opex_b
+
+        # Cumulative investment: initial CAPEX plus each year's reinvestment
+        steps = np.empty(len(rev_b) + 1)
+        steps[0] = i.initial_capex + i.sustainability_capex
+        steps[1:] = rev_b * i.reinvest_pct
+        cumulative = np.add.accumulate(steps)[1:]
+
+        # Profit B
+        years = np.arange(1, len(rev_b) + 1)
+        ebitda_b = rev_b - opex_b + savings
+        ebit_b = ebitda_b - np.where(years <= i.depreciation_years, depreciation, 0.0)
+        tax_b = np.maximum(0, ebit_b * i.tax_rate)
+        return {'opex_b': opex_b, 'savings': savings, 'profit_b': ebit_b - tax_b, 'cumulative_investment': cumulative}
+
+    def _assemble_projections(self, rev_a: np.ndarray, rev_b: np.ndarray, a: Dict[str, np.ndarray],
+                              b: Dict[str, np.ndarray]) -> ProjectionFrame:
+        raw = dict(a, **b, revenue_a=rev_a, revenue_b=rev_b)
+        return ProjectionFrame(round_like_python(np.vstack([raw[name] for name in PROJECTION_FIELDS])))
+
+    def _calculate_payback(self, i: SmeInputs, incremental_cfs: List[float]) -> float:
+        period = cashflow.payback_period(i.sustainability_capex, incremental_cfs)
+        return float(i.forecast_horizon + 1) if math.isnan(period) else period
+
+    def _calculate_discounted_payback(self, i: SmeInputs, incremental_cfs: List[float]) -> float:
+        period = cashflow.discounted_payback(i.sustainability_capex, incremental_cfs, i.discount_rate)
+        return float(i.forecast_horizon + 1) if math.isnan(period) else period
+
+    def _calculate_break_even(self, frame: ProjectionFrame) -> float:
+        ahead = np.flatnonzero(frame.profit_b > frame.profit_a)
+        if len(ahead):
+            return float(ahead[0] + 1)
+        return float(len(frame) + 1) if len(frame) else 0.0
+
+    @timed('irr')
+    def _calculate_irr(self, i: SmeInputs, incremental_cfs: List[float]) -> float:
+        rate, status = cashflow.irr([-i.sustainability_capex] + incremental_cfs)
+        # No IRR (the investment is never recovered at any rate): 0%; unbounded (nothing invested): the ceiling
+        return cashflow.irr_percent(rate, status)
+
+    @timed('heatmap')
+    def _calculate_heatmap(self, i: SmeInputs, econ: float, env: float, strat: float) -> List[HeatmapCell]:
         cells = []
         # Economic
         cells.append(HeatmapCell(row='Economic', col='Upside', value=round(econ), color=self._get_color(econ)))
@@ -233,9 +255,9 @@ class SmeSimulator:
     def execution_risk(self, i: SmeInputs) -> float:
         return (i.sustainability_capex / (i.initial_revenue or 1)) * 50
 
-    def _generate_alerts(self, i: SmeInputs, projections: List[YearlyProjection], econ: float, env: float, strat: float) -> List[Alert]:
+    @timed('alerts')
+    def _generate_alerts(self, i: SmeInputs, frame: ProjectionFrame, econ: float, env: float, strat: float) -> List[Alert]:
         alerts = []
-        last = projections[-1]
         
         # trade-off alerts from instructions (1).docx
         if econ > 70 and env < 40:
@@ -251,7 +273,7 @@ class SmeSimulator:
              alerts.append(Alert(message="Execution Risk: High complexity and investment relative to current revenue.", severity="medium"))
 
         # Original alerts
-        if last.profit_b < last.profit_a:
+        if frame.last('profit_b') < frame.last('profit_a'):
             alerts.append(Alert(message="Long-term Profitability Alert: Scenario B annual profit remains below Scenario A.", severity="medium"))
             
         return alerts
@@ -0,0 +1,211 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .models import (Constraint, GoalSeekOutputs, GoalSeekRequest, LeverBound, OptimizeOutputs, OptimizeRequest,
+                     SmeInputs, SolverStep)
+from .sme_batch import BatchInputs, BatchResult, FIELD_BOUNDS, INT_FIELDS, NUMERIC_FIELDS, SCORE_FIELDS, DETAIL_FIELDS, SmeBatchEngine
+
+# Goal-seek and constrained optimization over SmeInputs levers. Both solvers
+# score a whole candidate population per iteration as one engine batch.
+
+MAX_POPULATION = 10_000
+MAX_ITERATIONS = 1_000
+OPERATORS = ('<=', '>=', '==')
+
+
+def _check_metric(name: str) -> None:
+    if name not in NUMERIC_FIELDS and name.split('.', 1)[-1] not in SCORE_FIELDS + DETAIL_FIELDS:
+        raise ValueError(f"unknown metric: {name}")
+
+
+def _check_lever(lever: LeverBound) -> None:
+    if lever.field not in NUMERIC_FIELDS:
+        raise ValueError(f"unknown numeric input field: {lever.field}")
+    if not lever.low <= lever.high:
+        raise ValueError(f"{lever.field}: low must not exceed high")
+    low, high = FIELD_BOUNDS.get(lever.field, (None, None))
+    if (low is not None and lever.low < low) or (high is not None and lever.high > high):
+        raise ValueError(f"{lever.field}: bounds must lie within [{low}, {high}]")
+
+
+def _values(batch: BatchInputs, result: BatchResult, name: str) -> np.ndarray:
+    # Constraints may refer to outputs or to the (varying) inputs themselves
+    return batch[name] if name in NUMERIC_FIELDS else result.metric(name)
+
+
+class SmeSolver:
+    """
+    Answers "which lever values reach this target" questions: 1-D goal-seek by
+    repeated grid bracketing, and a multi-lever evolutionary optimizer with
+    feasibility-first ranking of constraint violations.
+    """
+
+    def __init__(self, engine: Optional[SmeBatchEngine] = None):
+        self.engine = engine or SmeBatchEngine()
+
+    def goal_seek(self, request: GoalSeekRequest) -> GoalSeekOutputs:
+        lever = request.lever
+        _check_lever(lever)
+        _check_metric(request.metric)
+        if request.op not in OPERATORS:
+            raise ValueError(f"op must be one of {', '.join(OPERATORS)}")
+        if request.seek not in ('min', 'max'):
+            raise ValueError("seek must be 'min' or 'max'")
+        if not 3 <= request.population <= MAX_POPULATION:
+            raise ValueError(f"population must be between 3 and {MAX_POPULATION}")
+        if not 1 <= request.max_iterations <= MAX_ITERATIONS:
+            raise ValueError(f"max_iterations must be between 1 and {MAX_ITERATIONS}")
+
+        is_int = lever.field in INT_FIELDS
+        # Searching for the largest value is the same walk from the other end
+        sign = 1.0 if request.seek == 'min' else -1.0
+        start, end = (lever.low, lever.high) if sign > 0 else (lever.high, lever.low)
+        span = abs(end - start)
+        reference = None
+        best = None
+        best_metric = None
+        evaluations = 0
+        trace = []
+        for iteration in range(1, request.max_iterations + 1):
+            xs = np.linspace(start, end, request.population)
+            if is_int:
+                xs = np.unique(np.rint(xs))[::int(sign)]
+            batch = self._batch(request.inputs, {lever.field: xs})
+            metric = _values(batch, self.engine.calculate(batch), request.metric)
+            evaluations += len(xs)
+
+            if request.op == '<=':
+                hit = metric <= request.target
+            elif request.op == '>=':
+                hit = metric >= request.target
+            else:
+                # A crossing is any point on the other side of the target from the start
+                if reference is None:
+                    reference = np.sign(metric[0] - request.target)
+                hit = (metric == request.target) | (np.sign(metric - request.target) != reference)
+
+            found = np.flatnonzero(hit)
+            if not len(found):
+                # Only possible on the first pass: later brackets end on a hit
+                trace.append(SolverStep(iteration=iteration, evaluations=evaluations, best=None, width=span))
+                break
+            k = found[0]
+            best, best_metric = float(xs[k]), float(metric[k])
+            if k == 0:
+                start = end = xs[0]
+            else:
+                start, end = xs[k - 1], xs[k]
+            width = float(abs(end - start))
+            trace.append(SolverStep(iteration=iteration, evaluations=evaluations, best=best, width=width))
+            if width <= (1.0 if is_int else request.tolerance * span):
+                break
+
+        if best is None:
+            return GoalSeekOutputs(found=False, evaluations=evaluations, trace=trace)
+        return GoalSeekOutputs(
+            found=True,
+            value=best,
+            metric_value=best_metric,
+            inputs=self._inputs(request.inputs, {lever.field: best}),
+            evaluations=evaluations,
+            trace=trace,
+        )
+
+    def optimize(self, request: OptimizeRequest) -> OptimizeOutputs:
+        if not request.levers:
+            raise ValueError("at least one lever is required")
+        for lever in request.levers:
+            _check_lever(lever)
+        _check_metric(request.objective)
+        for c in request.constraints:
+            _check_metric(c.metric)
+            if c.op not in OPERATORS:
+                raise ValueError(f"constraint op must be one of {', '.join(OPERATORS)}")
+            if c.relative_to is not None and c.relative_to not in NUMERIC_FIELDS:
+                raise ValueError(f"unknown numeric input field: {c.relative_to}")
+        if not 4 <= request.population <= MAX_POPULATION:
+            raise ValueError(f"population must be between 4 and {MAX_POPULATION}")
+        if not 1 <= request.generations <= MAX_ITERATIONS:
+            raise ValueError(f"generations must be between 1 and {MAX_ITERATIONS}")
+
+        rng = np.random.default_rng(request.seed)
+        low = np.array([lever.low for lever in request.levers])
+        high = np.array([lever.high for lever in request.levers])
+        width = high - low
+        n, k = request.population, len(request.levers)
+        parents = max(2, n // 4)
+        # (mu + lambda) evolution in the unit cube; the first candidate is the base scenario
+        population = rng.random((n, k))
+        base = np.array([float(getattr(request.inputs, lever.field)) for lever in request.levers])
+        population[0] = np.clip(np.divide(base - low, width, out=np.zeros(k), where=width > 0), 0.0, 1.0)
+        sigma = 0.2
+        elite = np.empty((0, k))
+        elite_score = np.empty(0)
+        elite_violation = np.empty(0)
+        evaluations = 0
+        trace = []
+        for generation in range(1, request.generations + 1):
+            score, violation = self._fitness(request, self._decode(request.levers, low, width, population))
+            evaluations += n
+            candidates = np.vstack([elite, population])
+            scores = np.concatenate([elite_score, score])
+            violations = np.concatenate([elite_violation, violation])
+            # Feasible before infeasible, then by objective; elites win ties
+            order = np.lexsort((scores, violations))[:parents]
+            improved = not len(elite_score) or (violations[order[0]], scores[order[0]]) < (elite_violation[0], elite_score[0])
+            elite, elite_score, elite_violation = candidates[order], scores[order], violations[order]
+
+            sigma = min(sigma * 1.2, 0.5) if improved else sigma * 0.7
+            objective = -elite_score[0] if request.maximize else elite_score[0]
+            trace.append(SolverStep(iteration=generation, evaluations=evaluations, best=float(objective), width=sigma))
+            if sigma < request.tolerance:
+                break
+            picks = elite[rng.integers(len(elite), size=n)]
+            population = np.clip(picks + sigma * rng.standard_normal((n, k)), 0.0, 1.0)
+
+        best = self._decode(request.levers, low, width, elite[:1])
+        return OptimizeOutputs(
+            feasible=bool(elite_violation[0] == 0),
+            objective=float(-elite_score[0] if request.maximize else elite_score[0]),
+            inputs=self._inputs(request.inputs, {name: float(values[0]) for name, values in best.items()}),
+            violation=float(elite_violation[0]),
+            evaluations=evaluations,
+            trace=trace,
+        )
+
+    def _fitness(self, request: OptimizeRequest, levers: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Objective to minimize and total relative constraint violation per candidate."""
+        batch = self._batch(request.inputs, levers)
+        result = self.engine.calculate(batch)
+        objective = _values(batch, result, request.objective)
+        violation = np.zeros(len(batch))
+        for c in request.constraints:
+            violation += self._violation(c, batch, result)
+        return (-objective if request.maximize else objective), violation
+
+    def _violation(self, c: Constraint, batch: BatchInputs, result: BatchResult) -> np.ndarray:
+        values = _values(batch, result, c.metric)
+        limit = c.value * batch[c.relative_to] if c.relative_to is not None else np.full(len(batch), c.value)
+        if c.op == '<=':
+            excess = values - limit
+        elif c.op == '>=':
+            excess = limit - values
+        else:
+            excess = np.abs(values - limit)
+        # Relative to the limit so constraints in different units weigh alike
+        return np.maximum(excess, 0.0) / np.maximum(np.abs(limit), 1.0)
+
+    def _decode(self, levers: List[LeverBound], low: np.ndarray, width: np.ndarray, unit: np.ndarray) -> Dict[str, np.ndarray]:
+        values = low + unit * width
+        return {
+            lever.field: np.rint(values[:, j]) if lever.field in INT_FIELDS else values[:, j]
+            for j, lever in enumerate(levers)
+        }
+
+    def _batch(self, base: SmeInputs, levers: Dict[str, np.ndarray]) -> BatchInputs:
+        n = len(next(iter(levers.values())))
+        columns = {name: np.full(n, float(getattr(base, name))) for name in NUMERIC_FIELDS}
+        columns.update(levers)
+        return BatchInputs(columns)
+
+    def _inputs(self, base: SmeInputs, levers: Dict[str, float]) -> SmeInputs:
+        return base.model_copy(update={name: int(v) if name in INT_FIELDS else v for name, v in levers.items()})
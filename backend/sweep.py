@@ -0,0 +1,155 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from . import config
+from .delta import PROJECTION_STAGES, STAGES
+from .models import SmeInputs, SweepOutputs, SweepRequest
+from .sme_batch import BatchInputs, DETAIL_FIELDS, FIELD_BOUNDS, INT_FIELDS, NUMERIC_FIELDS, PROJECTION_FIELDS, SCORE_FIELDS, SmeBatchEngine
+
+# Parameter-grid sweeps: every combination of the axis values, returned as one
+# N-dimensional array per metric. Work is shared along the axes a stage does
+# not read:
+#
+#   projections     one path per combination of the projection inputs (the
+#                   revenue / scenario A / scenario B fields of delta.STAGES),
+#                   computed once at the longest swept horizon; shorter
+#                   horizons use its first years
+#   evaluation      once per combination of every axis but discount_rate
+#   discounting     discount_rate only moves financial_viability and
+#                   discounted_payback_years; those two are recomputed per
+#                   rate and everything else is broadcast along that axis
+
+PROJECTION_INPUTS = frozenset().union(*(fields for name, fields, _ in STAGES if name in PROJECTION_STAGES)) - {'forecast_horizon'}
+DISCOUNTED_METRICS = ('financial_viability', 'discounted_payback_years')
+METRICS = SCORE_FIELDS + DETAIL_FIELDS
+# Evaluation rows per chunk; bounds memory for large grids
+CHUNK_ROWS = 50_000
+
+
+class SweepResult:
+    """
+    Metric cubes of a sweep: `cubes[metric]` has one dimension per axis, in
+    axis order. Cubes of metrics that do not depend on an axis are read-only
+    broadcast views along it.
+    """
+
+    def __init__(self, axes: List[Tuple[str, np.ndarray]], cubes: Dict[str, np.ndarray], paths: int):
+        self.axes = axes
+        self.cubes = cubes
+        self.paths = paths  # distinct projection paths computed
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(values) for _, values in self.axes)
+
+
+class ParameterSweep:
+    """
+    Full-factorial sweep over SmeInputs fields around `base`; cell values are
+    identical to scoring each combination with SmeSimulator.calculate.
+    """
+
+    def __init__(self, engine: Optional[SmeBatchEngine] = None, chunk_rows: int = CHUNK_ROWS):
+        self.engine = engine or SmeBatchEngine()
+        self.chunk_rows = chunk_rows
+
+    def run(self, base: SmeInputs, axes: Sequence[Tuple[str, Sequence[float]]],
+            metrics: Sequence[str] = SCORE_FIELDS) -> SweepResult:
+        fields, values = self._validate(axes)
+        metrics = [m.split('.', 1)[-1] for m in metrics]
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            raise ValueError(f"unknown metrics: {', '.join(unknown)}")
+        shape = [len(v) for v in values]
+        if math.prod(shape) > config.SWEEP_MAX_CELLS:
+            raise ValueError(f"grid of {math.prod(shape)} cells exceeds SWEEP_MAX_CELLS ({config.SWEEP_MAX_CELLS})")
+
+        fixed = {name: getattr(base, name) for name in NUMERIC_FIELDS}
+        horizons = values[fields.index('forecast_horizon')] if 'forecast_horizon' in fields else [base.forecast_horizon]
+        rate_axis = fields.index('discount_rate') if 'discount_rate' in fields else None
+
+        # Projection paths: one per combination of the projection axes
+        path_axes = [k for k, name in enumerate(fields) if name in PROJECTION_INPUTS]
+        path_shape = [shape[k] for k in path_axes]
+        grid = np.unravel_index(np.arange(math.prod(path_shape)), path_shape) if path_axes else ()
+        path_inputs = BatchInputs.from_columns(
+            {**fixed, **{fields[k]: values[k][g] for k, g in zip(path_axes, grid)}}, size=math.prod(path_shape))
+        paths = self.engine.project(path_inputs, int(max(horizons)))
+
+        # Evaluation: every axis but the discount rate, which is swept separately
+        eval_axes = [k for k in range(len(fields)) if k != rate_axis]
+        eval_shape = [shape[k] for k in eval_axes]
+        rows = math.prod(eval_shape)
+        flat = {m: np.empty(rows) for m in metrics}
+        discounted = [m for m in metrics if m in DISCOUNTED_METRICS] if rate_axis is not None else []
+        rates = values[rate_axis] if rate_axis is not None else None
+        for m in discounted:
+            flat[m] = np.empty((rows, len(rates)))
+        for start in range(0, rows, self.chunk_rows):
+            index = np.arange(start, min(rows, start + self.chunk_rows))
+            # No axis left besides the rate (a rate-only sweep): one row of fixed inputs
+            coords = dict(zip(eval_axes, np.unravel_index(index, eval_shape))) if eval_axes else {}
+            b = BatchInputs.from_columns({**fixed, **{fields[k]: values[k][c] for k, c in coords.items()}}, size=len(index))
+            path = np.ravel_multi_index([coords[k] for k in path_axes], path_shape) if path_axes else np.zeros(len(index), dtype=np.int64)
+            proj = {name: paths[name][path] for name in PROJECTION_FIELDS}
+            result = self.engine.evaluate(b, proj)
+            for m in metrics:
+                if m not in discounted:
+                    flat[m][index] = result.metric(m)
+            if discounted:
+                for m, cube in zip(DISCOUNTED_METRICS, self._discounted(b, proj, result.valid, rates)):
+                    if m in discounted:
+                        flat[m][index] = cube
+
+        cubes = {}
+        for m in metrics:
+            if m in discounted:
+                cubes[m] = np.moveaxis(flat[m].reshape(eval_shape + [len(rates)]), -1, rate_axis)
+            elif rate_axis is not None:
+                cubes[m] = np.broadcast_to(np.expand_dims(flat[m].reshape(eval_shape), rate_axis), tuple(shape))
+            else:
+                cubes[m] = flat[m].reshape(shape)
+        return SweepResult(list(zip(fields, values)), cubes, len(path_inputs))
+
+    def _discounted(self, b: BatchInputs, proj: Dict[str, np.ndarray], valid: np.ndarray,
+                    rates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Rows repeated once per rate: (rows x rates) for each discounted metric
+        n, k = len(b), len(rates)
+        gain = np.where(valid, (proj['profit_b'] + proj['savings']) - proj['profit_a'], 0.0)
+        viability, payback = self.engine.discounted(
+            np.repeat(b['sustainability_capex'], k), np.repeat(gain, k, axis=0), np.repeat(valid, k, axis=0),
+            np.repeat(b['forecast_horizon'].astype(int), k), np.tile(rates, n))
+        return viability.reshape(n, k), payback.reshape(n, k)
+
+    def _validate(self, axes: Sequence[Tuple[str, Sequence[float]]]) -> Tuple[List[str], List[np.ndarray]]:
+        if not axes:
+            raise ValueError("at least one axis is required")
+        fields, values = [], []
+        for name, axis in axes:
+            if name not in NUMERIC_FIELDS:
+                raise ValueError(f"unknown numeric input field: {name}")
+            if name in fields:
+                raise ValueError(f"field swept twice: {name}")
+            axis = np.asarray(axis, dtype=float)
+            if axis.ndim != 1 or not len(axis):
+                raise ValueError(f"{name}: at least one value is required")
+            if not np.isfinite(axis).all():
+                raise ValueError(f"{name}: values must be finite")
+            if name in INT_FIELDS and (axis != np.round(axis)).any():
+                raise ValueError(f"{name}: values must be whole numbers")
+            low, high = FIELD_BOUNDS.get(name, (None, None))
+            if (low is not None and (axis < low).any()) or (high is not None and (axis > high).any()):
+                raise ValueError(f"{name}: values must lie within [{low}, {high}]")
+            fields.append(name)
+            values.append(axis)
+        return fields, values
+
+
+def run_sweep(request: SweepRequest, engine: Optional[SmeBatchEngine] = None) -> SweepOutputs:
+    result = ParameterSweep(engine).run(request.inputs, [(a.field, a.values) for a in request.axes], request.metrics)
+    return SweepOutputs(
+        shape=list(result.shape),
+        axes=request.axes,
+        metrics={m: cube.tolist() for m, cube in result.cubes.items()},
+        projection_paths=result.paths,
+    )
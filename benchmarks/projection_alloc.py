@@ -0,0 +1,50 @@
+"""
+Per-call time and memory of the scalar SmeSimulator pipeline.
+
+    python -m benchmarks.projection_alloc
+
+Reports, per forecast horizon, the best-of-N wall time and the tracemalloc
+peak (bytes allocated above the baseline while one call runs) for building
+the projections alone and for a full calculate().
+"""
+import timeit
+import tracemalloc
+from backend.models import SmeInputs
+from backend.sme_simulator import SmeSimulator
+
+HORIZONS = [7, 30, 120]
+NUMBER = 500
+REPEAT = 5
+
+
+def peak_bytes(fn) -> int:
+    fn()  # warm caches outside the measurement
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def best_us(fn) -> float:
+    return min(timeit.repeat(fn, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main() -> None:
+    simulator = SmeSimulator()
+    print(f"{'horizon':>7}  {'stage':<12} {'time_us':>9} {'peak_kib':>9}")
+    for horizon in HORIZONS:
+        inputs = SmeInputs(forecast_horizon=horizon)
+        stages = {
+            'projections': lambda: simulator._calculate_projections(inputs),
+            'calculate': lambda: simulator.calculate(inputs),
+        }
+        for name, fn in stages.items():
+            print(f"{horizon:>7}  {name:<12} {best_us(fn):>9.1f} {peak_bytes(fn) / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
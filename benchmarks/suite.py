@@ -0,0 +1,297 @@
+"""
+Benchmark suite for the SME engine, with JSON baselines and regression checks.
+
+    python -m benchmarks.suite run [--quick] [--only latency,stages,...] [--repeat 5] [--output results.json]
+    python -m benchmarks.suite compare benchmarks/baselines/reference.json results.json [--threshold 0.2]
+    python -m benchmarks.suite run --repeat 3 --compare benchmarks/baselines/reference.json
+
+Groups:
+    latency  single SmeSimulator.calculate, p50 / p99
+    stages   validation, projections, IRR, heatmap, alerts, scoring, response encoding
+    batch    SmeBatchEngine throughput at 1k / 100k / 1M scenarios (1M is scored in 100k chunks)
+    memory   tracemalloc peaks for one calculate and one 100k batch, process max RSS
+    http     POST /api/sme/calculate through the in-process FastAPI TestClient
+
+With --repeat N every group runs N times: each metric records the median and
+its `noise`, the max - min spread over the runs relative to the median.
+
+`compare` exits with status 1 when any metric is worse than the baseline by
+more than the threshold (a fraction: 0.2 = 20%) plus that metric's baseline
+noise. The threshold defaults to the one stored in the baseline. Single-run
+tail latencies are noisy, so gate on a repeated run as above. Timings are
+machine specific: compare against a baseline recorded on the same host, e.g.
+
+    python -m benchmarks.suite run --repeat 5 --output benchmarks/baselines/reference.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from backend.models import SmeInputs
+from backend.sme_batch import BatchInputs, SmeBatchEngine
+from backend.sme_simulator import SmeSimulator
+
+GROUPS = ['latency', 'stages', 'batch', 'memory', 'http']
+BATCH_SIZES = [1_000, 100_000, 1_000_000]
+BATCH_CHUNK = 100_000
+DEFAULT_THRESHOLD = 0.2
+
+Metrics = Dict[str, Dict[str, Any]]
+
+
+def metric(value: float, unit: str, better: str = 'lower') -> Dict[str, Any]:
+    return {'value': round(float(value), 3), 'unit': unit, 'better': better}
+
+
+def sample_us(fn: Callable[[], Any], samples: int, warmup: int = 50) -> np.ndarray:
+    """Per-call wall time in microseconds."""
+    for _ in range(warmup):
+        fn()
+    times = np.empty(samples)
+    clock = time.perf_counter_ns
+    for k in range(samples):
+        start = clock()
+        fn()
+        times[k] = clock() - start
+    return times / 1000.0
+
+
+def random_batch(n: int, seed: int = 0) -> BatchInputs:
+    """Scenarios scattered around the SmeInputs defaults, horizons 3..15."""
+    rng = np.random.default_rng(seed)
+    defaults = SmeInputs()
+    columns = {}
+    for name in ('initial_revenue', 'fixed_costs', 'initial_capex', 'sustainability_capex', 'gov_subsidies'):
+        columns[name] = getattr(defaults, name) * rng.uniform(0.5, 1.5, n)
+    for name in ('energy_efficiency_pct', 'resource_efficiency_pct', 'waste_reduction_pct', 'circular_economy_pct',
+                 'reinvest_pct', 'revenue_growth_rate', 'reputation_uplift_pct', 'green_market_access_pct'):
+        columns[name] = getattr(defaults, name) * rng.uniform(0.0, 2.0, n)
+    columns['forecast_horizon'] = rng.integers(3, 16, n)
+    columns['carbon_reduction_potential'] = rng.uniform(0, 100, n)
+    return BatchInputs.from_columns(columns, size=n)
+
+
+def bench_latency(quick: bool) -> Metrics:
+    simulator = SmeSimulator()
+    inputs = SmeInputs()
+    times = sample_us(lambda: simulator.calculate(inputs), 500 if quick else 5000)
+    return {
+        'calculate_p50_us': metric(np.percentile(times, 50), 'us'),
+        'calculate_p99_us': metric(np.percentile(times, 99), 'us'),
+    }
+
+
+def bench_stages(quick: bool) -> Metrics:
+    simulator = SmeSimulator()
+    payload = SmeInputs().model_dump()
+    inputs = SmeInputs(**payload)
+    frame = simulator._calculate_projections(inputs)
+    flows = frame.incremental_cash_flows().tolist()
+    outputs = simulator.calculate(inputs)
+    stages = {
+        'validate_inputs': lambda: SmeInputs(**payload),
+        'projections': lambda: simulator._calculate_projections(inputs),
+        'irr': lambda: simulator._calculate_irr(inputs, flows),
+        'heatmap': lambda: simulator._calculate_heatmap(inputs, 60.0, 50.0, 40.0),
+        'alerts': lambda: simulator._generate_alerts(inputs, frame, 60.0, 50.0, 40.0),
+        'evaluate': lambda: simulator._evaluate(inputs, frame),
+        'encode_response': lambda: outputs.model_dump_json(),
+    }
+    samples = 500 if quick else 5000
+    return {f"stage_{name}_p50_us": metric(np.percentile(sample_us(fn, samples), 50), 'us') for name, fn in stages.items()}
+
+
+def bench_batch(quick: bool) -> Metrics:
+    engine = SmeBatchEngine()
+    results = {}
+    for n in BATCH_SIZES[:2] if quick else BATCH_SIZES:
+        batch = random_batch(n)
+        chunks = [batch.take(slice(start, start + BATCH_CHUNK)) for start in range(0, n, BATCH_CHUNK)]
+        best = float('inf')
+        # Best of several runs up to one chunk; the 1M batch already averages over ten chunks
+        for _ in range(1 if n > BATCH_CHUNK else 5):
+            start = time.perf_counter()
+            for chunk in chunks:
+                engine.calculate(chunk)
+            best = min(best, time.perf_counter() - start)
+        results[f"batch_{n}_per_s"] = metric(n / best, 'scenarios/s', better='higher')
+    return results
+
+
+def peak_kib(fn: Callable[[], Any]) -> float:
+    fn()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        return (tracemalloc.get_traced_memory()[1] - base) / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(quick: bool) -> Metrics:
+    simulator = SmeSimulator()
+    engine = SmeBatchEngine()
+    inputs = SmeInputs()
+    batch = random_batch(BATCH_CHUNK)
+    results = {
+        'memory_calculate_peak_kib': metric(peak_kib(lambda: simulator.calculate(inputs)), 'KiB'),
+        'memory_batch_100k_peak_mib': metric(peak_kib(lambda: engine.calculate(batch)) / 1024, 'MiB'),
+    }
+    try:
+        import resource
+    except ImportError:  # not on Windows
+        return results
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    results['process_max_rss_mib'] = metric(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / scale / 1024, 'MiB')
+    return results
+
+
+def bench_http(quick: bool) -> Metrics:
+    from fastapi.testclient import TestClient
+    from backend import api
+    from backend.main import app
+
+    client = TestClient(app)
+    payload = SmeInputs().model_dump()
+    samples = 200 if quick else 1000
+    results = {}
+    cache = api.result_cache
+    try:
+        # Uncached: every request runs the simulator
+        api.result_cache = None
+        times = sample_us(lambda: client.post('/api/sme/calculate', json=payload), samples, warmup=20)
+        results['http_calculate_p50_us'] = metric(np.percentile(times, 50), 'us')
+        results['http_calculate_p99_us'] = metric(np.percentile(times, 99), 'us')
+    finally:
+        api.result_cache = cache
+    if cache is not None:
+        times = sample_us(lambda: client.post('/api/sme/calculate', json=payload), samples, warmup=20)
+        results['http_calculate_cached_p50_us'] = metric(np.percentile(times, 50), 'us')
+    return results
+
+
+BENCHMARKS = {
+    'latency': bench_latency,
+    'stages': bench_stages,
+    'batch': bench_batch,
+    'memory': bench_memory,
+    'http': bench_http,
+}
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One metric over repeated runs: the median, and the relative spread as `noise`."""
+    values = [m['value'] for m in runs]
+    median = float(np.median(values))
+    result = {**runs[0], 'value': round(median, 3)}
+    if len(runs) > 1:
+        result['noise'] = round((max(values) - min(values)) / median, 3) if median else 0.0
+    return result
+
+
+def run(groups: List[str], quick: bool = False, repeat: int = 1,
+        threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Any]:
+    runs: Dict[str, List[Dict[str, Any]]] = {}
+    for _ in range(repeat):
+        for group in groups:
+            started = time.perf_counter()
+            for name, value in BENCHMARKS[group](quick).items():
+                runs.setdefault(name, []).append(value)
+            print(f"[{group}] {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return {
+        'meta': {
+            'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'formula_version': SmeSimulator.FORMULA_VERSION,
+            'quick': quick,
+            'repeat': repeat,
+            'threshold': threshold,
+        },
+        'metrics': {name: summarize(values) for name, values in runs.items()},
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: Optional[float] = None) -> List[str]:
+    """
+    Print a comparison table; return the names of metrics that regressed beyond
+    `threshold` (default: the baseline's own) plus their baseline noise.
+    """
+    if threshold is None:
+        threshold = baseline['meta'].get('threshold', DEFAULT_THRESHOLD)
+    regressions = []
+    print(f"{'metric':<34} {'baseline':>14} {'current':>14} {'change':>8} {'limit':>8}")
+    for name, base in baseline['metrics'].items():
+        cur = current['metrics'].get(name)
+        if cur is None:
+            continue
+        b, c = base['value'], cur['value']
+        change = (c - b) / b if b else 0.0
+        # Positive `worse` means the metric moved in the bad direction
+        worse = change if base.get('better', 'lower') == 'lower' else -change
+        limit = threshold + base.get('noise', 0.0)
+        flag = '  REGRESSION' if worse > limit else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:<34} {b:>14.3f} {c:>14.3f} {change:>+8.1%} {limit:>8.0%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description=__doc__.split('\n\n')[0].strip())
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run benchmarks and write JSON results')
+    run_parser.add_argument('--quick', action='store_true', help='fewer samples, no 1M batch')
+    run_parser.add_argument('--only', default=','.join(GROUPS), help=f"comma-separated groups ({', '.join(GROUPS)})")
+    run_parser.add_argument('--repeat', type=int, default=1, help='runs per group; metrics record the median and noise')
+    run_parser.add_argument('--output', help='write results to this file (default: stdout)')
+    run_parser.add_argument('--compare', metavar='BASELINE', help='compare against a baseline file afterwards')
+    run_parser.add_argument('--threshold', type=float,
+                            help=f"recorded with the results; compare: default the baseline's, else {DEFAULT_THRESHOLD}")
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, help=f"default: the baseline's, else {DEFAULT_THRESHOLD}")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        groups = [g.strip() for g in args.only.split(',') if g.strip()]
+        unknown = [g for g in groups if g not in BENCHMARKS]
+        if unknown:
+            parser.error(f"unknown groups: {', '.join(unknown)}")
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+        results = run(groups, quick=args.quick, repeat=args.repeat,
+                      threshold=DEFAULT_THRESHOLD if args.threshold is None else args.threshold)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+        if not args.compare:
+            return 0
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(baseline, results, args.threshold) else 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return 1 if compare(baseline, current, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import random
+import pytest
+from backend.models import SmeInputs
+
+
+def random_inputs(rng: random.Random) -> SmeInputs:
+    r = rng.random
+    return SmeInputs(
+        forecast_horizon=rng.choice([1, 3, 5, 7, 10, 15]), initial_revenue=rng.choice([0.0, r() * 5e6]),
+        fixed_costs=r() * 1e6, variable_costs_pct=r(), initial_capex=r() * 2e5, revenue_growth_rate=r() * 0.4 - 0.2,
+        sustainability_capex=rng.choice([0.0, r() * 1e6, r() * 5e4]), reinvest_pct=r() * 0.1,
+        energy_efficiency_pct=r() * 0.5, resource_efficiency_pct=r() * 0.3, waste_reduction_pct=r() * 0.3,
+        circular_economy_pct=r() * 0.3, reputation_uplift_pct=r() * 0.1, green_market_access_pct=r() * 0.1,
+        turnover_reduction_pct=r(), productivity_gain_pct=r() * 0.3, disruption_impact=r() * 100,
+        carbon_reduction_potential=r() * 100, scope_1_reduction=r() * 100, scope_2_reduction=r() * 100,
+        scope_3_reduction=r() * 100, tax_rate=r() * 0.4, discount_rate=r() * 0.2, inflation_rate=r() * 0.05,
+        depreciation_years=rng.choice([0, 3, 5, 10]),
+    )
+
+
+@pytest.fixture
+def scenarios():
+    """A reproducible spread of scenarios, including zero revenue and zero capex."""
+    rng = random.Random(1)
+    return [random_inputs(rng) for _ in range(500)]
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from backend import config
+from backend.batch_stream import iter_items, iter_json_array
+from backend.main import app
+from backend.models import SmeInputs
+from backend.sme_simulator import SmeSimulator
+
+
+async def _chunks(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def _collect(parser, body: bytes, size: int = 7):
+    async def run():
+        return [pair async for pair in parser(_chunks(body, size))]
+    return asyncio.run(run())
+
+
+def test_json_array_in_small_chunks():
+    items = [{'initial_revenue': 1e6 + k, 'name': 'é' * k} for k in range(20)] + [1.5, None]
+    body = json.dumps(items).encode()
+    for size in (1, 3, 64):
+        assert _collect(iter_json_array, body, size) == [(item, None) for item in items]
+
+
+def test_json_array_fails_at_malformed_element():
+    body = b'[{"a": 1}, {"a": tru, "b": 2}, ' + b', '.join(b'{"a": %d}' % k for k in range(1000)) + b']'
+    reads = 0
+
+    async def counted():
+        nonlocal reads
+        async for chunk in _chunks(body, 16):
+            reads += 1
+            yield chunk
+
+    async def run():
+        return [pair async for pair in iter_json_array(counted())]
+
+    result = asyncio.run(run())
+    assert result[0] == ({'a': 1}, None)
+    assert len(result) == 2 and result[1][0] is None and 'invalid JSON' in result[1][1]
+    # Stopped at the bad element instead of buffering the rest of the body
+    assert reads < 5
+
+
+def test_json_array_truncated():
+    assert _collect(iter_json_array, b'[{"a": 1}, {"a": 2}')[-1] == (None, "invalid JSON: unterminated array")
+    assert _collect(iter_json_array, b'[{"a": 1}, {"a"')[-1][1].startswith('invalid JSON')
+
+
+def test_ndjson_bad_line_does_not_stop_stream():
+    result = _collect(iter_items, b'{"a": 1}\nnot json\n{"a": 2}\n')
+    assert result[0] == ({'a': 1}, None)
+    assert result[1][0] is None
+    assert result[2] == ({'a': 2}, None)
+
+
+def test_endpoint_rejects_bad_horizons_per_item():
+    body = [{'scenario_id': 'ok', 'forecast_horizon': 10}, {'scenario_id': 'neg', 'forecast_horizon': -1},
+            {'scenario_id': 'huge', 'forecast_horizon': 10 ** 8}, {'forecast_horizon': config.MAX_FORECAST_HORIZON}]
+    response = TestClient(app).post('/api/sme/calculate-batch', json=body)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['index'] for line in lines] == [0, 1, 2, 3]
+    assert 'result' in lines[0] and len(lines[0]['result']['projections']) == 10
+    assert lines[1]['error'][0]['loc'] == ['forecast_horizon'] and 'error' in lines[2]
+    assert len(lines[3]['result']['projections']) == config.MAX_FORECAST_HORIZON
+
+
+def test_engine_failure_only_fails_its_rows(monkeypatch):
+    calculate_batch = SmeSimulator.calculate_batch
+
+    def failing(self, inputs, **kwargs):
+        if any(i.initial_revenue == 13 for i in inputs):
+            raise FloatingPointError('boom')
+        return calculate_batch(self, inputs, **kwargs)
+
+    monkeypatch.setattr(SmeSimulator, 'calculate_batch', failing)
+    body = [{'scenario_id': 'a'}, {'scenario_id': 'bad', 'initial_revenue': 13}, {'scenario_id': 'c'}]
+    response = TestClient(app).post('/api/sme/calculate-batch', json=body)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['scenario_id'] for line in lines] == ['a', 'bad', 'c']
+    assert lines[0]['result'] == lines[2]['result'] == json.loads(SmeSimulator().calculate(SmeInputs()).model_dump_json())
+    assert lines[1]['error'] == 'calculation failed for these inputs'
@@ -0,0 +1,63 @@
+import time
+from backend.cache import MemoryCacheBackend, ResultCache, SqliteCacheBackend, canonical_key
+from backend.models import SmeInputs, SmeOutputs
+from backend.sme_simulator import SmeSimulator
+
+
+def test_key_ignores_signed_zero():
+    assert canonical_key(SmeInputs(inflation_rate=-0.0)) == canonical_key(SmeInputs(inflation_rate=0.0))
+
+
+def test_key_depends_on_inputs_and_version():
+    base = SmeInputs()
+    assert canonical_key(base) != canonical_key(SmeInputs(discount_rate=base.discount_rate + 0.01))
+    assert canonical_key(base, '1.0') != canonical_key(base, SmeSimulator.FORMULA_VERSION)
+
+
+def test_formula_version_change_misses():
+    backend = MemoryCacheBackend()
+    inputs = SmeInputs()
+    ResultCache(backend).calculate(inputs)
+    cache = ResultCache(backend, version='next')
+    assert cache.get(inputs) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_sqlite_backend_drops_other_versions(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    ResultCache(SqliteCacheBackend(path, version='old'), version='old').calculate(SmeInputs())
+    assert SqliteCacheBackend(path, version='old').size()[0] == 1
+    assert SqliteCacheBackend(path, version='new').size() == (0, 0)
+
+
+def test_hit_returns_stored_bytes_and_counts():
+    cache = ResultCache()
+    inputs = SmeInputs()
+    payload = cache.calculate_json(inputs)
+    assert cache.calculate_json(SmeInputs(**inputs.model_dump())) is payload
+    assert cache.calculate(inputs) == SmeOutputs.model_validate_json(payload)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+    assert SmeOutputs.model_validate_json(payload) == SmeSimulator().calculate(inputs)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2, max_bytes=10)
+    backend.set('a', b'1234')
+    backend.set('b', b'1234')
+    backend.get('a')
+    backend.set('c', b'1234')
+    assert backend.get('b') is None and backend.get('a') == b'1234'
+    backend.set('d', b'123456')
+    assert backend.get('c') is None and backend.size() == (2, 10) and backend.evictions == 2
+    backend.set('e', b'x' * 11)  # larger than max_bytes: never stored
+    assert backend.get('e') is None and backend.get('d') == b'123456'
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryCacheBackend()
+    backend.set('a', b'1', ttl=0.01)
+    backend.set('b', b'2')
+    time.sleep(0.02)
+    assert backend.get('a') is None and backend.get('b') == b'2'
+    assert backend.expirations == 1 and backend.size() == (1, 1)
@@ -0,0 +1,76 @@
+import math
+import numpy as np
+import pytest
+from backend import cashflow
+from backend.models import SmeInputs
+from backend.sme_batch import SmeBatchEngine
+from backend.sme_simulator import SmeSimulator
+
+
+def _both(flows):
+    """irr() of one flow vector through the 1-D kernel, checked against the matrix kernel."""
+    rate, status = cashflow.irr(flows)
+    rates, statuses = cashflow.irr(np.array([flows], dtype=float))
+    assert statuses[0] == status
+    assert rates[0] == rate or (math.isnan(rate) and math.isnan(rates[0]))
+    return rate, status
+
+
+def test_conventional_flows():
+    rate, status = _both([-100.0, 110.0])
+    assert status == cashflow.IRR_OK and rate == pytest.approx(0.10)
+    rate, status = _both([-1000.0, 100.0, 100.0, 100.0])
+    assert status == cashflow.IRR_OK and rate < 0
+
+
+def test_never_recovered_has_no_root():
+    rate, status = _both([-100.0, -5.0, 0.0])
+    assert status == cashflow.IRR_NO_ROOT and math.isnan(rate)
+    assert _both([0.0, 0.0])[1] == cashflow.IRR_NO_ROOT
+    assert cashflow.irr_percent(rate, status) == 0.0
+
+
+def test_nothing_invested_is_unbounded():
+    rate, status = _both([0.0, 5.0, 7.0])
+    assert status == cashflow.IRR_UNBOUNDED and rate == math.inf
+    assert cashflow.irr_percent(rate, status) == cashflow.IRR_MAX_PERCENT
+
+
+def test_two_roots_close_together():
+    # NPV = -(x - 1.05)(x - 1.1): both roots lie between x = 1 and x = 2 and NPV is negative at both
+    rate, status = _both([-1.155, 2.15, -1.0])
+    assert status == cashflow.IRR_MULTIPLE_ROOTS
+    assert rate == pytest.approx(1 / 1.05 - 1)
+
+
+def test_multiple_roots_match_numpy():
+    rng = np.random.default_rng(0)
+    flows = rng.normal(size=(500, 12)) * rng.choice([1.0, 1e3, 1e6], size=(500, 1))
+    flows[::3, 8:] = 0.0  # shorter horizons, zero-padded as in the batch engine
+    rates, statuses = cashflow.irr(flows)
+    for row, rate, status in zip(flows, rates, statuses):
+        assert _both(row.tolist())[0] == rate or math.isnan(rate)
+        p = np.trim_zeros(row, 'b')[::-1]
+        crossings = [1 / z.real - 1 for z in np.roots(p)
+                     if abs(z.imag) <= 1e-9 * abs(z) and z.real > 0
+                     and np.sign(np.polyval(p, z.real * (1 - 1e-6))) != np.sign(np.polyval(p, z.real * (1 + 1e-6)))]
+        if crossings:
+            assert status in (cashflow.IRR_OK, cashflow.IRR_MULTIPLE_ROOTS)
+            assert rate == pytest.approx(min(crossings, key=abs), rel=1e-6, abs=1e-9)
+        else:
+            assert status in (cashflow.IRR_NO_ROOT, cashflow.IRR_UNBOUNDED)
+
+
+def test_zero_capex_scenario_reports_the_ceiling():
+    inputs = SmeInputs(sustainability_capex=0.0)
+    details = SmeSimulator().calculate(inputs).details
+    assert details.irr_percent == cashflow.IRR_MAX_PERCENT
+    assert SmeBatchEngine().calculate([inputs]).to_outputs(0).details == details
+
+
+def test_payback():
+    assert cashflow.payback_period(100.0, [30.0, 30.0, 50.0]) == 3.0
+    assert cashflow.payback_period(100.0, [30.0, 30.0, 50.0], fractional=True) == pytest.approx(2.8)
+    assert math.isnan(cashflow.payback_period(100.0, [30.0, 30.0]))
+    matrix = cashflow.payback_period(np.array([100.0, 100.0]), np.array([[30.0, 30.0, 50.0], [30.0, 30.0, 0.0]]))
+    assert matrix[0] == 3.0 and math.isnan(matrix[1])
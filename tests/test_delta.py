@@ -0,0 +1,74 @@
+import copy
+import random
+import pytest
+from backend.delta import DeltaCalculator, STAGES, stages_to_recompute
+from backend.models import DeltaRequest, SmeInputs
+from backend.sme_batch import NUMERIC_FIELDS
+from backend.sme_simulator import SmeSimulator
+from tests.conftest import random_inputs
+
+
+def _apply(document, patch):
+    """Minimal RFC 6902 apply for the add / remove / replace operations DeltaSession emits."""
+    for op in patch:
+        op = op.model_dump()
+        if op['path'] == '':
+            document = copy.deepcopy(op['value'])
+            continue
+        *parents, last = [part.replace('~1', '/').replace('~0', '~') for part in op['path'].split('/')[1:]]
+        target = document
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        key = int(last) if isinstance(target, list) else last
+        if op['op'] == 'remove':
+            del target[key]
+        else:
+            target[key] = copy.deepcopy(op['value'])
+    return document
+
+
+def _expected(inputs):
+    return SmeSimulator().calculate(inputs).model_dump()
+
+
+def test_patches_match_full_recompute():
+    rng = random.Random(7)
+    calculator = DeltaCalculator()
+    start = random_inputs(rng)
+    response = calculator.apply(DeltaRequest(inputs=start))
+    document = _apply(None, response.patch)
+    assert document == _expected(start)
+    current = start
+    for _ in range(300):
+        other = random_inputs(rng)
+        # One to three fields at a time, so every stage is reached alone and together
+        changes = {name: getattr(other, name) for name in rng.sample(NUMERIC_FIELDS, rng.randint(1, 3))}
+        response = calculator.apply(DeltaRequest(session_id=response.session_id, changes=changes))
+        current = current.model_copy(update=changes)
+        document = _apply(document, response.patch)
+        assert document == _expected(current), (changes, response.recomputed)
+
+
+def test_discount_rate_only_reruns_discounting():
+    calculator = DeltaCalculator()
+    first = calculator.apply(DeltaRequest(inputs=SmeInputs()))
+    response = calculator.apply(DeltaRequest(session_id=first.session_id, changes={'discount_rate': 0.12}))
+    assert response.recomputed == ['discounting']
+    assert {op.path for op in response.patch} <= {'/details/financial_viability', '/details/discounted_payback_years'}
+
+
+def test_unread_fields_recompute_nothing():
+    calculator = DeltaCalculator()
+    first = calculator.apply(DeltaRequest(inputs=SmeInputs()))
+    response = calculator.apply(DeltaRequest(session_id=first.session_id, changes={'industry': 'Retail'}))
+    assert response.recomputed == [] and response.patch == []
+
+
+def test_stage_order():
+    assert stages_to_recompute(None) == [name for name, _, _ in STAGES]
+    assert stages_to_recompute({'disruption_impact'}) == ['scores', 'indicators', 'heatmap', 'alerts']
+
+
+def test_unknown_field_rejected():
+    with pytest.raises(ValueError):
+        DeltaCalculator().apply(DeltaRequest(changes={'nope': 1}))
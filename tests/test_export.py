@@ -0,0 +1,69 @@
+import csv
+import pytest
+from backend.export import TEXT_FIELDS, LabeledBatch, ScenarioExporter
+from backend.sme_batch import BatchInputs
+from backend.sme_simulator import SmeSimulator
+
+
+def test_csv_export_matches_simulator(tmp_path, scenarios):
+    path = tmp_path / 'scenarios.csv'
+    summary = ScenarioExporter(row_group_size=64).export(scenarios[:200], str(path))
+    assert summary['scenarios'] == 200 and summary['row_groups'] == 4
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    simulator = SmeSimulator()
+    for row, inputs in zip(rows, scenarios):
+        assert float(row['scores.overall']) == simulator.calculate(inputs).scores.overall
+
+
+def test_parquet_round_trip(tmp_path, scenarios):
+    pq = pytest.importorskip('pyarrow.parquet')
+    scenarios_path, projections_path = tmp_path / 'scenarios.parquet', tmp_path / 'projections.parquet'
+    summary = ScenarioExporter(row_group_size=64).export(scenarios[:200], str(scenarios_path), str(projections_path))
+    table = pq.read_table(scenarios_path).to_pydict()
+    projections = pq.read_table(projections_path).to_pydict()
+    assert pq.ParquetFile(scenarios_path).num_row_groups == summary['row_groups']
+    assert len(projections['year']) == summary['projection_rows']
+    simulator = SmeSimulator()
+    for k, inputs in enumerate(scenarios[:200]):
+        outputs = simulator.calculate(inputs)
+        assert table['scenario'][k] == k
+        assert table['forecast_horizon'][k] == inputs.forecast_horizon
+        assert table['scores.overall'][k] == outputs.scores.overall
+        assert table['details.irr_percent'][k] == outputs.details.irr_percent
+        assert table['details.execution_risk_factor'][k] == outputs.details.execution_risk_factor
+    first = [r for r, s in enumerate(projections['scenario']) if s == 0]
+    assert [projections['revenue_b'][r] for r in first] == [p.revenue_b for p in simulator.calculate(scenarios[0]).projections]
+
+
+def _mixed_chunks(scenarios):
+    # Unlabeled first, then all-None ids, then string ids: the columns must not change between chunks
+    def labeled(rows, ids):
+        return LabeledBatch(BatchInputs.from_inputs(rows), {name: [getattr(i, name) for i in rows] for name in TEXT_FIELDS}, ids)
+    return [scenarios[0:3], labeled(scenarios[3:5], None), labeled(scenarios[5:7], [None, None]),
+            labeled(scenarios[7:10], ['a', None, 'c'])]
+
+
+def test_csv_scenario_id_column_is_stable(tmp_path, scenarios):
+    path = tmp_path / 'scenarios.csv'
+    ScenarioExporter().export(_mixed_chunks(scenarios), str(path))
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:2] == ['scenario', 'scenario_id']
+    assert all(len(row) == len(rows[0]) for row in rows)
+    assert [row[1] for row in rows[1:]] == [''] * 7 + ['a', '', 'c']
+    assert [row[rows[0].index('industry')] for row in rows[1:]] == [i.industry for i in scenarios[:10]]
+
+
+@pytest.mark.parametrize('suffix', ['parquet', 'arrow'])
+def test_arrow_scenario_id_column_is_stable(tmp_path, scenarios, suffix):
+    pa = pytest.importorskip('pyarrow')
+    path = tmp_path / f'scenarios.{suffix}'
+    summary = ScenarioExporter().export(_mixed_chunks(scenarios), str(path))
+    assert summary == {'scenarios': 10, 'row_groups': 4, 'projection_rows': 0}
+    if suffix == 'parquet':
+        table = pytest.importorskip('pyarrow.parquet').read_table(path)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    assert table.schema.field('scenario_id').type == pa.string()
+    assert table.column('scenario_id').to_pylist() == [None] * 7 + ['a', None, 'c']
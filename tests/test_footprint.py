@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from backend import config
+from backend.footprint import FootprintTotals, footprint, footprint_csv
+from backend.main import app
+
+LOG = {
+    'entity': ['a', 'a', 'a', 'b', 'b', 'b', 'a', 'b', 'a'],
+    'category': ['transportation', 'energy', 'food', 'transportation', 'energy', 'transportation', 'energy', 'food', 'waste'],
+    'subtype': ['car_petrol', 'electricity', 'beef', 'train', 'natural_gas', 'car_electric', 'nuclear', 'rice', 'landfill'],
+    'quantity': [100.0, 1000.0, 2.0, 10.0, 100.0, 50.0, 5.0, -1.0, float('nan')],
+}
+# By hand from config.EMISSION_FACTORS / EMISSION_SCOPES; the last three records are skipped
+EXPECTED = {
+    'a': [100 * 0.192, 1000 * 0.475, 2 * 27.0],
+    'b': [100 * 0.203, 50 * 0.053, 10 * 0.041],
+}
+# NaN is not JSON: over the API the NaN record is a known activity with a negative quantity instead
+JSON_LOG = {**LOG, 'quantity': LOG['quantity'][:-1] + [-5.0]}
+
+
+def test_scope_totals_by_hand():
+    totals = footprint(LOG['entity'], LOG['category'], LOG['subtype'], LOG['quantity'])
+    assert totals.entities == ['a', 'b']
+    np.testing.assert_allclose(totals.scopes, [EXPECTED['a'], EXPECTED['b']])
+    np.testing.assert_allclose(totals.total, [sum(EXPECTED['a']), sum(EXPECTED['b'])])
+
+
+def test_unknown_and_skipped_counts():
+    body = TestClient(app).post('/api/sme/footprint', json={'activities': JSON_LOG, 'days': 10}).json()
+    assert body['records'] == 9 and body['skipped'] == 3
+    assert body['unknown_activities'] == {'energy/nuclear': 1}
+    a = next(e for e in body['entities'] if e['entity'] == 'a')
+    assert a['scope_1'] == round(EXPECTED['a'][0], 3) and a['total'] == round(sum(EXPECTED['a']), 3)
+    assert a['daily_kg'] == round(sum(EXPECTED['a']) / 10, 3) and a['band'] == 'high' and a['inputs'] is None
+
+
+def test_csv_streaming_matches_in_memory(tmp_path):
+    path = tmp_path / 'activities.csv'
+    rows = ['Entity,Category,Subtype,Quantity']
+    rows += [f"{e},{c},{s},{q}" for e, c, s, q in zip(*LOG.values())]
+    rows += ['b,energy,solar,12', '', 'a,food,milk,not-a-number', 'c,waste,recycled,7.5']
+    path.write_text('\n'.join(rows) + '\n')
+    expected = footprint(LOG['entity'] + ['b', 'a', 'c'], LOG['category'] + ['energy', 'food', 'waste'],
+                         LOG['subtype'] + ['solar', 'milk', 'recycled'], LOG['quantity'] + [12.0, float('nan'), 7.5])
+    for chunk_rows in (1, 2, 5, 1000):
+        streamed = footprint_csv(str(path), chunk_rows=chunk_rows)
+        assert streamed.records == 12 and streamed.skipped == 4
+        assert streamed.unknown == {'energy/nuclear': 1}
+        result = streamed.result()
+        assert result.entities == expected.entities
+        np.testing.assert_allclose(result.scopes, expected.scopes)
+
+
+def test_csv_requires_header(tmp_path):
+    path = tmp_path / 'bad.csv'
+    path.write_text('entity,category,quantity\na,food,1\n')
+    with pytest.raises(ValueError, match='header'):
+        footprint_csv(str(path))
+
+
+def test_reductions_against_baseline():
+    baseline = FootprintTotals(['a', 'b'], np.array([[100.0, 50.0, 0.0], [10.0, 10.0, 10.0]]))
+    current = FootprintTotals(['b', 'new', 'a'], np.array([[5.0, 20.0, 10.0], [1.0, 1.0, 1.0], [25.0, 50.0, 4.0]]))
+    np.testing.assert_allclose(current.reductions(baseline), [
+        [50.0, 0.0, 0.0, 0.0],  # more than the baseline clips to 0
+        [0.0, 0.0, 0.0, 0.0],  # not in the baseline
+        [75.0, 0.0, 0.0, (150 - 79) / 150 * 100],  # no baseline Scope 3: 0
+    ])
+
+
+def test_endpoint_baseline_fills_inputs():
+    activities = {'entity': ['a'], 'category': ['energy'], 'subtype': ['electricity'], 'quantity': [500.0]}
+    baseline = {'entity': ['a', 'b'], 'category': ['energy'] * 2, 'subtype': ['electricity'] * 2, 'quantity': [1000.0, 1.0]}
+    body = TestClient(app).post('/api/sme/footprint', json={'activities': activities, 'baseline': baseline}).json()
+    assert body['entities'][0]['inputs'] == {'scope_1_reduction': 0.0, 'scope_2_reduction': 50.0,
+                                             'scope_3_reduction': 0.0, 'carbon_reduction_potential': 50.0}
+
+
+@pytest.mark.parametrize('changes, message', [
+    ({'days': 0}, 'days'),
+    ({'benchmark': 'mars'}, 'unknown benchmark'),
+    ({'activities': {**JSON_LOG, 'subtype': LOG['subtype'][:-1]}}, 'same length'),
+    ({'baseline': {'category': ['food'], 'subtype': ['beef'], 'quantity': [1.0, 2.0]}}, 'same length'),
+])
+def test_endpoint_rejects_bad_requests(changes, message):
+    response = TestClient(app).post('/api/sme/footprint', json={'activities': JSON_LOG, **changes})
+    assert response.status_code == 400 and message in response.json()['detail']
+
+
+def test_endpoint_record_limit(monkeypatch):
+    monkeypatch.setattr(config, 'FOOTPRINT_MAX_RECORDS', 2)
+    log = {'category': ['food'] * 3, 'subtype': ['beef'] * 3, 'quantity': [1.0] * 3}
+    response = TestClient(app).post('/api/sme/footprint', json={'activities': log})
+    assert response.status_code == 400 and 'at most 2' in response.json()['detail']
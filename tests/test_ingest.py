@@ -0,0 +1,32 @@
+import csv
+import json
+from backend import ingest
+
+
+def _portfolio(path, rows, bad=()):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['initial_revenue', 'fixed_costs'])
+        for k in range(rows):
+            writer.writerow(['oops' if k in bad else 1e6 + k, 2e5])
+
+
+def test_cli_scores_every_accepted_row(tmp_path, capsys):
+    path = tmp_path / 'portfolio.csv'
+    _portfolio(path, 100, bad={5})
+    assert ingest.main([str(path), '--chunk-size', '10']) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary['accepted'] == 99
+    assert summary['rejected'] == 1
+    assert summary['scenarios'] == 99
+
+
+def test_cli_export_matches_count(tmp_path, capsys):
+    path = tmp_path / 'portfolio.csv'
+    _portfolio(path, 100, bad={5})
+    rejects = tmp_path / 'rejects.csv'
+    assert ingest.main([str(path), '--chunk-size', '10', '--output', str(tmp_path / 'out.csv'),
+                        '--rejects', str(rejects)]) == 0
+    assert json.loads(capsys.readouterr().out)['scenarios'] == 99
+    with open(rejects) as f:
+        assert len(list(csv.reader(f))) == 2  # header + the bad row
@@ -0,0 +1,170 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from backend import api, jobs
+from backend.main import app
+from backend.models import SweepRequest
+from backend.sme_batch import BatchResult
+
+SWEEP = {'axes': [{'field': 'discount_rate', 'values': [0.05, 0.1]}]}
+
+
+def _install(monkeypatch, manager):
+    monkeypatch.setattr(api, 'job_manager', manager)
+    return manager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = _install(monkeypatch, jobs.JobManager(jobs.LocalJobBackend(workers=1, max_queued=1)))
+    yield manager
+    manager.backend.close()
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Sweep jobs block until the gate is set, so tests can hold a job in the running state."""
+    gate, started = threading.Event(), threading.Event()
+
+    def handler(job, request, engine):
+        started.set()
+        gate.wait(5)
+        job.result = None
+
+    monkeypatch.setitem(jobs.JOB_KINDS, 'sweep', (SweepRequest, handler))
+    yield gate, started
+    gate.set()
+
+
+def _wait(client, job_id, states=jobs.FINISHED):
+    for _ in range(500):
+        status = client.get(f'/api/sme/jobs/{job_id}').json()
+        if status['state'] in states:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job still {status['state']}")
+
+
+def test_score_job_runs_to_completion(manager):
+    client = TestClient(app)
+    response = client.post('/api/sme/jobs', json={'kind': 'score', 'params': {'scenarios': [{}, {'forecast_horizon': 3}]}})
+    assert response.status_code == 202
+    status = _wait(client, response.json()['id'])
+    assert status['state'] == jobs.SUCCEEDED
+    results = client.get(f"/api/sme/jobs/{status['id']}/results").json()
+    assert results['available'] == 2
+    assert len(results['results'][1]['projections']) == 3
+
+
+def test_full_queue_returns_429(manager, gate):
+    client = TestClient(app)
+    running = client.post('/api/sme/jobs', json={'kind': 'sweep', 'params': SWEEP}).json()
+    assert gate[1].wait(5)
+    queued = client.post('/api/sme/jobs', json={'kind': 'sweep', 'params': SWEEP})
+    assert queued.status_code == 202
+    response = client.post('/api/sme/jobs', json={'kind': 'sweep', 'params': SWEEP})
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+    # A queued job is dropped at once
+    cancelled = client.delete(f"/api/sme/jobs/{queued.json()['id']}").json()
+    assert cancelled['state'] == jobs.CANCELLED
+    gate[0].set()
+    assert _wait(client, running['id'])['state'] == jobs.SUCCEEDED
+
+
+def test_running_single_job_cannot_be_cancelled(manager, gate):
+    client = TestClient(app)
+    job = client.post('/api/sme/jobs', json={'kind': 'sweep', 'params': SWEEP}).json()
+    assert gate[1].wait(5)
+    assert client.delete(f"/api/sme/jobs/{job['id']}").status_code == 409
+    gate[0].set()
+    assert _wait(client, job['id'])['state'] == jobs.SUCCEEDED
+
+
+def test_running_score_job_stops_between_chunks(manager, monkeypatch):
+    monkeypatch.setattr(jobs.config, 'JOBS_CHUNK_SIZE', 1)
+    gate, started = threading.Event(), threading.Event()
+    engine = manager.engine
+
+    class SlowEngine:
+        def calculate(self, chunk):
+            started.set()
+            gate.wait(5)
+            return engine.calculate(chunk)
+
+    manager.engine = SlowEngine()
+    client = TestClient(app)
+    job = client.post('/api/sme/jobs', json={'kind': 'score', 'params': {'scenarios': [{}] * 5}}).json()
+    assert started.wait(5)
+    assert client.delete(f"/api/sme/jobs/{job['id']}").status_code == 200
+    gate.set()
+    status = _wait(client, job['id'])
+    assert status['state'] == jobs.CANCELLED
+    assert status['completed'] == 1
+
+
+def test_unknown_job_is_404(manager):
+    client = TestClient(app)
+    assert client.get('/api/sme/jobs/missing').status_code == 404
+    assert client.delete('/api/sme/jobs/missing').status_code == 404
+
+
+def test_expire_drops_old_finished_jobs():
+    manager = jobs.JobManager(jobs.LocalJobBackend(), ttl=0.01)
+    job = jobs.Job('sweep', SweepRequest(**SWEEP))
+    manager._jobs[job.id] = job
+    manager._finish(job, jobs.SUCCEEDED)
+    time.sleep(0.02)
+    with pytest.raises(KeyError):
+        manager.get(job.id)
+
+
+def _score(client, n):
+    return client.post('/api/sme/jobs', json={'kind': 'score', 'params': {'scenarios': [{}] * n}})
+
+
+def test_queue_admits_by_waiting_scenarios(monkeypatch, gate):
+    manager = _install(monkeypatch, jobs.JobManager(jobs.LocalJobBackend(workers=1, max_queued=10, max_queued_rows=3)))
+    try:
+        client = TestClient(app)
+        running = client.post('/api/sme/jobs', json={'kind': 'sweep', 'params': SWEEP}).json()
+        assert gate[1].wait(5)
+        assert _score(client, 2).status_code == 202
+        response = _score(client, 2)
+        assert response.status_code == 429 and '2 scenarios waiting' in response.json()['detail']
+        assert client.post('/api/sme/jobs', json={'kind': 'sweep', 'params': SWEEP}).status_code == 202
+        assert manager.stats()['queued_rows'] == 3
+        gate[0].set()
+        assert _wait(client, running['id'])['state'] == jobs.SUCCEEDED
+    finally:
+        manager.backend.close()
+
+
+def test_job_whose_results_cannot_fit_is_refused(monkeypatch):
+    budget = BatchResult.estimate_nbytes(3, 7)
+    manager = _install(monkeypatch, jobs.JobManager(jobs.LocalJobBackend(), max_result_bytes=budget))
+    try:
+        client = TestClient(app)
+        response = _score(client, 4)
+        assert response.status_code == 400 and 'split it' in response.json()['detail']
+        assert _score(client, 3).status_code == 202
+    finally:
+        manager.backend.close()
+
+
+def test_finished_jobs_evicted_by_result_bytes(monkeypatch):
+    manager = _install(monkeypatch, jobs.JobManager(jobs.LocalJobBackend(), max_result_bytes=BatchResult.estimate_nbytes(5, 7)))
+    try:
+        client = TestClient(app)
+        first = _score(client, 3).json()
+        assert _wait(client, first['id'])['state'] == jobs.SUCCEEDED
+        job = manager.get(first['id'])
+        assert job.nbytes == BatchResult.estimate_nbytes(3, 7) and job.request is None
+        second = _score(client, 3).json()
+        _wait(client, second['id'])
+        # 6 scenarios of results do not fit in a 5-scenario budget: the older job goes
+        assert client.get(f"/api/sme/jobs/{first['id']}").status_code == 404
+        assert client.get(f"/api/sme/jobs/{second['id']}/results").json()['available'] == 3
+    finally:
+        manager.backend.close()
@@ -0,0 +1,36 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from backend import live
+from backend.main import app
+from backend.sme_simulator import SmeSimulator
+
+
+def test_frames_are_answered_in_order():
+    with TestClient(app).websocket_connect('/api/sme/live') as ws:
+        ws.send_text(json.dumps({'id': 'a', 'inputs': {'forecast_horizon': 3}}))
+        frame = json.loads(ws.receive_text())
+        assert frame['id'] == 'a' and frame['seq'] == 1
+        expected = SmeSimulator().calculate(live.SmeInputs(forecast_horizon=3))
+        assert frame['result'] == json.loads(expected.model_dump_json())
+        ws.send_text('not json')
+        assert 'invalid JSON' in json.loads(ws.receive_text())['error']
+
+
+def test_compute_failure_closes_the_socket(monkeypatch):
+    inputs = live.SmeInputs
+
+    def broken(**fields):
+        # The connection's initial inputs still build; merging a client frame fails
+        if fields:
+            raise RuntimeError("boom")
+        return inputs()
+
+    monkeypatch.setattr(live, 'SmeInputs', broken)
+    with TestClient(app).websocket_connect('/api/sme/live') as ws:
+        ws.send_text(json.dumps({'inputs': {'forecast_horizon': 3}}))
+        assert 'failed' in json.loads(ws.receive_text())['error']
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_text()
+        assert closed.value.code == 1011
@@ -0,0 +1,92 @@
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend import config, metrics
+from backend.main import app as main_app
+from backend.metrics import MetricsMiddleware, MetricsRegistry, instrumented
+from backend.models import SmeInputs
+
+
+def test_render_counters_histograms_and_collectors():
+    registry = MetricsRegistry(enabled=True)
+    registry.describe('calls_total', 'Calls')
+    registry.inc('calls_total', route='a')
+    registry.inc('calls_total', 2, route='a')
+    registry.inc('calls_total', route='b"\n')
+    registry.observe('latency_seconds', 0.001)
+    registry.observe('latency_seconds', 0.3)
+    registry.add_collector(lambda: [('cache_entries', 'gauge', 'Entries', {}, 7)])
+    lines = registry.render().splitlines()
+    assert lines[:4] == ['# HELP calls_total Calls', '# TYPE calls_total counter',
+                         'calls_total{route="a"} 3', 'calls_total{route="b\\"\\n"} 1']
+    assert 'latency_seconds_bucket{le="0.001"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.25"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.5"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert 'latency_seconds_count 2' in lines
+    assert lines[-3:] == ['# HELP cache_entries Entries', '# TYPE cache_entries gauge', 'cache_entries 7']
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    registry.inc('calls_total')
+    registry.observe('latency_seconds', 1.0)
+    assert registry.render() == '\n'
+
+
+def test_metrics_endpoint():
+    response = TestClient(main_app).get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'sme_cache_hits_total' in response.text
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    registry = MetricsRegistry(enabled=True)
+    monkeypatch.setattr(metrics, 'registry', registry)
+    return registry
+
+
+def _app(profile: str) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, profile=profile)
+
+    @app.post('/score')
+    @instrumented('score')
+    def score(inputs: SmeInputs):
+        return {'horizon': inputs.forecast_horizon}
+
+    return app
+
+
+def test_request_phases_and_counters(enabled):
+    client = TestClient(_app('off'))
+    assert client.post('/score', json={'forecast_horizon': 5}).json() == {'horizon': 5}
+    assert client.post('/score', json={'forecast_horizon': 0}).status_code == 422
+    phases = enabled.histograms['sme_request_phase_seconds']
+    assert {dict(k)['phase'] for k in phases} == {'validate', 'encode'}
+    assert phases[(('phase', 'encode'), ('route', 'score'))].count == 1
+    counts = enabled.counters['sme_http_requests_total']
+    assert counts[(('method', 'POST'), ('route', '/score'), ('status', '200'))] == 1
+    assert counts[(('method', 'POST'), ('route', '/score'), ('status', '422'))] == 1
+    assert enabled.histograms['sme_handler_seconds'][(('route', 'score'),)].count == 1
+
+
+def test_profile_dump_on_header(enabled, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'PROFILE_DIR', str(tmp_path))
+    client = TestClient(_app('header'))
+    assert 'x-profile-path' not in client.post('/score', json={}).headers
+    response = client.post('/score', json={}, headers={'X-Profile': '1'})
+    path = response.headers['x-profile-path']
+    assert os.path.dirname(path) == str(tmp_path) and os.path.getsize(path) > 0
+
+
+def test_profile_dump_failure_keeps_response(enabled, monkeypatch, tmp_path):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    monkeypatch.setattr(config, 'PROFILE_DIR', str(blocker))
+    response = TestClient(_app('all')).post('/score', json={'forecast_horizon': 3})
+    assert response.status_code == 200 and response.json() == {'horizon': 3}
+    assert 'x-profile-path' not in response.headers
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from backend.models import Distribution, MonteCarloRequest, SmeInputs
+from backend.monte_carlo import MAX_PROJECTION_CELLS, MonteCarloSimulator
+
+DISTRIBUTIONS = {
+    'revenue_growth_rate': Distribution(kind='normal', mean=0.05, std=0.03, low=0.0, high=0.1),
+    'energy_efficiency_pct': Distribution(kind='uniform', low=0.05, high=0.25),
+    'discount_rate': Distribution(kind='triangular', low=0.04, mode=0.08, high=0.14),
+}
+
+
+def _request(**kwargs) -> MonteCarloRequest:
+    return MonteCarloRequest(**{'distributions': DISTRIBUTIONS, 'draws': 500, 'seed': 7, **kwargs})
+
+
+def test_seeded_runs_are_reproducible():
+    first = MonteCarloSimulator().run(_request())
+    assert MonteCarloSimulator().run(_request()) == first
+    assert MonteCarloSimulator().run(_request(seed=8)).bands != first.bands
+    assert len(first.projection_bands['p50']) == SmeInputs().forecast_horizon
+
+
+def test_draws_respect_bounds():
+    for correlation in (None, [[1.0, 0.5, 0.2], [0.5, 1.0, 0.0], [0.2, 0.0, 1.0]]):
+        batch = MonteCarloSimulator().sample(_request(draws=20_000, correlation=correlation), np.random.default_rng(1))
+        growth = batch['revenue_growth_rate']
+        assert growth.min() == 0.0 and growth.max() == 0.1  # normal: censored at the bounds
+        assert 0.05 <= batch['energy_efficiency_pct'].min() and batch['energy_efficiency_pct'].max() <= 0.25
+        assert 0.04 <= batch['discount_rate'].min() and batch['discount_rate'].max() <= 0.14
+        assert (batch['wacc'] == SmeInputs().wacc).all()
+
+
+def test_correlation_is_applied():
+    distributions = {
+        'revenue_growth_rate': Distribution(kind='normal', mean=0.05, std=0.02),
+        'inflation_rate': Distribution(kind='normal', mean=0.02, std=0.01),
+        'energy_efficiency_pct': Distribution(kind='uniform', low=0.0, high=0.3),
+    }
+    correlation = [[1.0, 0.8, -0.5], [0.8, 1.0, -0.4], [-0.5, -0.4, 1.0]]
+    request = MonteCarloRequest(distributions=distributions, correlation=correlation, draws=50_000)
+    batch = MonteCarloSimulator().sample(request, np.random.default_rng(3))
+    r = np.corrcoef([batch[name] for name in distributions])
+    assert r[0, 1] == pytest.approx(0.8, abs=0.02)
+    # Uniform marginal through the copula: Pearson of the normal scores is close, not equal, to the target
+    assert r[0, 2] == pytest.approx(-0.5, abs=0.05)
+    independent = MonteCarloSimulator().sample(request.model_copy(update={'correlation': None}), np.random.default_rng(3))
+    assert abs(np.corrcoef(independent['revenue_growth_rate'], independent['inflation_rate'])[0, 1]) < 0.02
+
+
+@pytest.mark.parametrize('changes, message', [
+    ({'draws': 0}, 'draws'),
+    ({'draws': MAX_PROJECTION_CELLS // 30 + 1, 'inputs': SmeInputs(forecast_horizon=30)}, 'forecast_horizon'),
+    ({'bins': 0}, 'bins'),
+    ({'percentiles': [101.0]}, 'percentiles'),
+    ({'distributions': {'forecast_horizon': Distribution(kind='normal', std=1.0)}}, 'forecast_horizon'),
+    ({'distributions': {'wacc': Distribution(kind='normal', std=0.01, low=0.1, high=0.05)}}, 'low <= high'),
+    ({'distributions': {'wacc': Distribution(kind='uniform', low=0.1)}}, 'low <= high'),
+    ({'distributions': {'wacc': Distribution(kind='triangular', low=0.0, high=0.1, mode=0.2)}}, 'mode'),
+    ({'correlation': [[1.0, 0.0], [0.0, 1.0]]}, '3x3'),
+    ({'correlation': [[1.0, 0.9, 0.9], [0.9, 1.0, -0.9], [0.9, -0.9, 1.0]]}, 'positive definite'),
+])
+def test_invalid_requests(changes, message):
+    with pytest.raises(ValueError, match=message):
+        MonteCarloSimulator().run(_request(**changes))
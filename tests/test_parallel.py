@@ -0,0 +1,88 @@
+from concurrent.futures import CancelledError
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pytest
+from backend import parallel
+from backend.parallel import ParallelEngine
+from backend.sme_batch import BatchInputs, SmeBatchEngine
+from backend.sme_simulator import SmeSimulator
+
+
+def _unlinked(job) -> bool:
+    for shm in job.segments:
+        try:
+            SharedMemory(name=shm.name).close()
+        except FileNotFoundError:
+            continue
+        return False
+    return True
+
+
+@pytest.fixture
+def engine():
+    # fork: workers inherit the test process, so patches made before the first submit reach them
+    engine = ParallelEngine(workers=2, chunk_size=7, start_method='fork')
+    yield engine
+    engine.shutdown()
+
+
+def test_matches_batch_engine(engine, scenarios):
+    rows = scenarios[:60]
+    expected = SmeBatchEngine().calculate(rows)
+    job = engine.submit(rows)
+    result = job.result()
+    assert len(result) == len(rows)
+    for k in range(len(rows)):
+        assert result.to_outputs(k) == expected.to_outputs(k)
+    assert _unlinked(job)
+
+
+def test_spawned_workers(scenarios):
+    # Workers only import backend.parallel, so the default start method works too
+    engine = ParallelEngine(workers=1, chunk_size=5, start_method='spawn')
+    try:
+        outputs = engine.calculate(scenarios[:8], materialize=True)
+    finally:
+        engine.shutdown()
+    assert outputs == [SmeSimulator().calculate(inputs) for inputs in scenarios[:8]]
+
+
+def test_empty_batch(engine):
+    assert len(engine.calculate([])) == 0
+
+
+def test_cancel_releases_shared_memory(scenarios):
+    engine = ParallelEngine(workers=1, chunk_size=1, start_method='fork')
+    try:
+        job = engine.submit(BatchInputs.from_inputs(scenarios[:200]))
+        job.cancel()
+        assert job.done() and any(f.cancelled() for f in job.futures)
+        assert _unlinked(job)
+        with pytest.raises(CancelledError):
+            job.result()
+    finally:
+        engine.shutdown()
+
+
+def test_worker_failure_releases_shared_memory(engine, monkeypatch, scenarios):
+    def fail(self, *args, **kwargs):
+        raise FloatingPointError('worker failed')
+
+    monkeypatch.setattr(parallel.SmeBatchEngine, 'evaluate', fail)
+    job = engine.submit(scenarios[:20])
+    with pytest.raises(FloatingPointError, match='worker failed'):
+        job.result()
+    assert _unlinked(job)
+
+
+def test_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        ParallelEngine(workers=0)
+    with pytest.raises(ValueError):
+        ParallelEngine(chunk_size=0)
+
+
+def test_shards_cover_every_row(engine):
+    batch = BatchInputs.from_columns({'initial_revenue': np.linspace(1e5, 5e6, 23)}, size=23)
+    np.testing.assert_array_equal(engine.calculate(batch).metric('overall'),
+                                  SmeBatchEngine().calculate(batch).metric('overall'))
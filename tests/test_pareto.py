@@ -0,0 +1,86 @@
+import itertools
+import numpy as np
+import pytest
+from backend import pareto
+from backend.models import LeverBound, ParetoRequest, SmeInputs
+from backend.pareto import OBJECTIVES, ParetoExplorer, non_dominated
+from backend.sme_batch import INT_FIELDS, SmeBatchEngine
+from backend.sme_simulator import SmeSimulator
+
+LEVERS = [
+    LeverBound(field='carbon_reduction_potential', low=0.0, high=100.0),
+    LeverBound(field='energy_efficiency_pct', low=0.0, high=0.5),
+    LeverBound(field='depreciation_years', low=1, high=10),  # moves no score: every grid cell has duplicates
+]
+GRID = ParetoRequest(levers=LEVERS, sampling='grid', grid_points=5)
+
+
+class TradeOffEngine(SmeBatchEngine):
+    """Each score rises with its own levers, so the real frontier is one point; make two levers cost something."""
+
+    def evaluate(self, b, proj):
+        result = super().evaluate(b, proj)
+        result.scores['economic'] = result.scores['economic'] - 0.5 * b['carbon_reduction_potential']
+        result.scores['strategic'] = result.scores['strategic'] - 40 * b['energy_efficiency_pct']
+        return result
+
+
+def _brute_force(points: np.ndarray) -> list:
+    frontier = []
+    for i, p in enumerate(points):
+        dominated = any((q >= p).all() and (q > p).any() for q in points)
+        duplicate = any((points[j] == p).all() for j in range(i))
+        if not dominated and not duplicate:
+            frontier.append(i)
+    return frontier
+
+
+@pytest.mark.parametrize('block', [1, 3, 1024])
+def test_non_dominated_matches_brute_force(block):
+    # Small integer scores force ties and duplicates
+    points = np.random.default_rng(5).integers(0, 6, size=(200, 3)).astype(float)
+    assert list(non_dominated(points, block=block)) == _brute_force(points)
+
+
+def test_grid_frontier_matches_brute_force():
+    axes = [np.linspace(lever.low, lever.high, GRID.grid_points) for lever in LEVERS]
+    scenarios = [SmeInputs(**{lever.field: int(round(v)) if lever.field in INT_FIELDS else float(v)
+                              for lever, v in zip(LEVERS, values)}) for values in itertools.product(*axes)]
+    scores = TradeOffEngine().calculate(scenarios).scores
+    points = np.column_stack([scores[name] for name in OBJECTIVES])
+    expected = [(tuple(points[k]), scenarios[k]) for k in _brute_force(points)]
+
+    result = ParetoExplorer(TradeOffEngine()).run(GRID)
+    assert result.samples == len(scenarios) and len(expected) > 10
+    frontier = [(tuple(getattr(p.scores, name) for name in OBJECTIVES), p.inputs) for p in result.frontier]
+    # Same points, and a duplicated score triple keeps its first scenario
+    assert sorted(frontier, key=lambda f: f[0]) == sorted(expected, key=lambda f: f[0])
+
+
+def test_real_scores_match_scalar():
+    for point in ParetoExplorer().run(GRID).frontier:
+        assert SmeSimulator().calculate(point.inputs).scores == point.scores
+
+
+def test_archive_independent_of_chunk_size(monkeypatch):
+    expected = ParetoExplorer(TradeOffEngine()).run(GRID)
+    for chunk_size in (1, 7):
+        monkeypatch.setattr(pareto, 'CHUNK_SIZE', chunk_size)
+        assert ParetoExplorer(TradeOffEngine()).run(GRID) == expected
+
+
+def test_lhs_is_seeded():
+    request = ParetoRequest(levers=LEVERS, samples=300, seed=2)
+    assert ParetoExplorer().run(request) == ParetoExplorer().run(request)
+
+
+@pytest.mark.parametrize('changes, message', [
+    ({'levers': []}, 'at least one lever'),
+    ({'levers': [LeverBound(field='colour', low=0, high=1)]}, 'unknown numeric input field'),
+    ({'levers': [LeverBound(field='forecast_horizon', low=0, high=5)]}, 'bounds must lie within'),
+    ({'sampling': 'sobol'}, 'unknown sampling'),
+    ({'sampling': 'grid', 'grid_points': 1000}, 'sample count'),
+])
+def test_invalid_requests(changes, message):
+    with pytest.raises(ValueError, match=message):
+        ParetoExplorer().run(ParetoRequest(**changes))
@@ -0,0 +1,69 @@
+import random
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from backend import config
+from backend.models import Distribution, MonteCarloRequest, SmeInputs
+from backend.monte_carlo import MonteCarloSimulator
+from backend.sme_batch import BatchInputs, DETAIL_FIELDS, SCORE_FIELDS, SmeBatchEngine
+from backend.sme_simulator import SmeSimulator
+from tests.conftest import random_inputs
+
+
+def test_batch_matches_scalar(scenarios):
+    result = SmeBatchEngine().calculate(scenarios)
+    simulator = SmeSimulator()
+    for k, inputs in enumerate(scenarios):
+        assert result.to_outputs(k) == simulator.calculate(inputs)
+
+
+def test_mixed_horizons_in_one_batch():
+    rng = random.Random(2)
+    scenarios = [random_inputs(rng).model_copy(update={'forecast_horizon': h}) for h in (1, 30, 3, 12, 1)]
+    result = SmeBatchEngine().calculate(scenarios)
+    for k, inputs in enumerate(scenarios):
+        outputs = result.to_outputs(k)
+        assert len(outputs.projections) == inputs.forecast_horizon
+        assert outputs == SmeSimulator().calculate(inputs)
+
+
+@pytest.mark.parametrize('horizon', [0, -1, config.MAX_FORECAST_HORIZON + 1, 10 ** 8])
+def test_out_of_range_horizon_is_rejected(horizon):
+    with pytest.raises(ValidationError, match='forecast_horizon'):
+        SmeInputs(forecast_horizon=horizon)
+
+
+def test_calculate_batch_materializes(scenarios):
+    outputs = SmeSimulator().calculate_batch(scenarios[:20], materialize=True)
+    assert outputs == [SmeSimulator().calculate(inputs) for inputs in scenarios[:20]]
+
+
+def test_projection_frame_matches_rows(scenarios):
+    simulator = SmeSimulator()
+    for inputs in scenarios[:50]:
+        frame = simulator._calculate_projections(inputs)
+        assert [p.model_dump() for p in frame.to_projections()] == frame.to_rows()
+        assert frame.to_projections() == simulator.calculate(inputs).projections
+        assert len(frame) == inputs.forecast_horizon
+
+
+def test_monte_carlo_draws_match_scalar():
+    request = MonteCarloRequest(
+        inputs=SmeInputs(), draws=200, seed=3,
+        distributions={'revenue_growth_rate': Distribution(kind='normal', mean=0.05, std=0.03),
+                       'sustainability_capex': Distribution(kind='uniform', low=5e4, high=2e5)})
+    simulator = MonteCarloSimulator()
+    batch = simulator.sample(request, np.random.default_rng(request.seed))
+    result = SmeBatchEngine().calculate(batch)
+    scalar = SmeSimulator()
+    for k in range(len(batch)):
+        assert result.to_outputs(k) == scalar.calculate(batch.to_inputs(k))
+    outputs = simulator.run(request)
+    assert set(outputs.bands) == set(SCORE_FIELDS + DETAIL_FIELDS)
+    assert outputs.bands['overall']['mean'] == float(np.mean(result.metric('overall')))
+
+
+def test_batch_inputs_round_trip(scenarios):
+    b = BatchInputs.from_inputs(scenarios[:10])
+    assert len(b) == 10
+    assert b['initial_revenue'][3] == scenarios[3].initial_revenue
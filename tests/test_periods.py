@@ -0,0 +1,37 @@
+import pytest
+from backend.models import PeriodRequest, SmeInputs
+from backend.periods import run_periods
+from backend.sme_simulator import SmeSimulator
+
+
+def test_annual_granularity_matches_simulator(scenarios):
+    simulator = SmeSimulator()
+    for inputs in scenarios:
+        details = simulator.calculate(inputs).details
+        result = run_periods(PeriodRequest(inputs=inputs, granularity='annual'))
+        assert round(result.irr_percent, 1) == details.irr_percent
+        assert round(result.payback_years, 1) == details.payback_years
+        assert round(result.discounted_payback_years, 1) == details.discounted_payback_years
+        assert result.financial_viability == details.financial_viability
+
+
+def test_annual_rollup_matches_projections(scenarios):
+    simulator = SmeSimulator()
+    for inputs in scenarios[:100]:
+        result = run_periods(PeriodRequest(inputs=inputs, granularity='annual'))
+        assert result.yearly == simulator.calculate(inputs).projections
+
+
+@pytest.mark.parametrize('granularity, periods', [('quarterly', 4), ('monthly', 12)])
+def test_sub_annual_rollup(granularity, periods):
+    inputs = SmeInputs(forecast_horizon=3)
+    result = run_periods(PeriodRequest(inputs=inputs, granularity=granularity))
+    assert len(result.periods['period']) == 3 * periods
+    assert [y.year for y in result.yearly] == [1, 2, 3]
+    revenue = sum(result.periods['revenue_b'][:periods])
+    assert result.yearly[0].revenue_b == pytest.approx(revenue, abs=1)
+
+
+def test_rejects_unknown_granularity():
+    with pytest.raises(ValueError):
+        run_periods(PeriodRequest(granularity='weekly'))
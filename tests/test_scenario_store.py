@@ -0,0 +1,110 @@
+import threading
+import pytest
+from backend.models import ScenarioQuery
+from backend.scenario_store import ScenarioStore
+from backend.sme_simulator import SmeSimulator
+
+SEGMENTS = [('Manufacturing', 'EU'), ('Retail', 'EU'), ('Manufacturing', 'US')]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScenarioStore(str(tmp_path / 'scenarios.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def segmented(scenarios):
+    return [s.model_copy(update=dict(zip(('industry', 'region'), SEGMENTS[k % len(SEGMENTS)])))
+            for k, s in enumerate(scenarios[:120])]
+
+
+def test_calculate_many_reuses_stored_results(store, scenarios):
+    keys, reused = store.calculate_many(scenarios[:40])
+    assert reused == 0 and len(set(keys)) == 40 and store.count() == 40
+    keys, reused = store.calculate_many(scenarios[20:60])
+    assert reused == 20 and keys == [store.key(s) for s in scenarios[20:60]] and store.count() == 60
+    # A repeat within one call is scored once
+    _, reused = store.calculate_many([scenarios[60], scenarios[60]])
+    assert reused == 1 and store.count() == 61
+    for inputs in (scenarios[0], scenarios[59]):
+        assert store.outputs(inputs) == SmeSimulator().calculate(inputs)
+
+
+def test_get_round_trip(store, scenarios):
+    key = store.save(scenarios[0], SmeSimulator().calculate(scenarios[0]))
+    stored = store.get(key)
+    assert stored.inputs == scenarios[0] and stored.outputs == SmeSimulator().calculate(scenarios[0])
+    assert stored.metrics['overall'] == stored.outputs.scores.overall
+    assert store.get('missing') is None
+
+
+@pytest.mark.parametrize('metric, ascending', [('overall', False), ('esg_score', True), ('roi_percent', False)])
+def test_query_order_segment_and_limit(store, segmented, metric, ascending):
+    keys, _ = store.calculate_many(segmented)
+    rows = [(store.get(key), key) for key in keys]
+    for industry, region in [(None, None), ('Manufacturing', None), ('Retail', 'EU'), ('Retail', 'US')]:
+        q = ScenarioQuery(metric=metric, ascending=ascending, industry=industry, region=region, limit=7)
+        expected = sorted((s.metrics[metric] if ascending else -s.metrics[metric], key) for s, key in rows
+                          if (industry is None or s.industry == industry) and (region is None or s.region == region))
+        result = store.query(q)
+        assert [s.key for s in result] == [key for _, key in expected[:7]]
+        assert all(s.outputs is None for s in result)
+    assert len(store.query(ScenarioQuery(limit=1000))) == len(segmented)
+
+
+def test_query_rejects_bad_requests(store):
+    with pytest.raises(ValueError, match='unknown metric'):
+        store.query(ScenarioQuery(metric='npv'))
+    with pytest.raises(ValueError, match='limit'):
+        store.query(ScenarioQuery(limit=0))
+
+
+def test_formula_version_isolation(store, scenarios):
+    store.calculate_many(scenarios[:10])
+    other = ScenarioStore(store.path, version='other')
+    try:
+        assert other.count() == 0 and other.query(ScenarioQuery()) == []
+        assert other.outputs(scenarios[0]) is None
+        keys, reused = other.calculate_many(scenarios[:10])
+        assert reused == 0 and not set(keys) & {store.key(s) for s in scenarios[:10]}
+        assert other.count() == 10 and store.count() == 10
+    finally:
+        other.close()
+
+
+def test_readers_during_batch_insert(store, scenarios):
+    batches = [scenarios[k:k + 50] for k in range(0, 250, 50)]
+    store.count()  # schema first, so readers only race the inserts
+    done = threading.Event()
+    seen, errors = [], []
+
+    def read():
+        counts = []
+        try:
+            while True:
+                stop = done.is_set()
+                counts.append(store.count())
+                store.query(ScenarioQuery(limit=5))
+                if stop:
+                    break
+        except Exception as e:  # surfaced below
+            errors.append(e)
+        seen.append(counts)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for t in readers:
+        t.start()
+    try:
+        for batch in batches:
+            store.calculate_many(batch)
+    finally:
+        done.set()
+        for t in readers:
+            t.join()
+    assert not errors
+    # Each batch commits in one transaction: readers only ever see whole batches
+    for counts in seen:
+        assert counts and counts == sorted(counts) and set(counts) <= {0, 50, 100, 150, 200, 250}
+    assert store.count() == 250
@@ -0,0 +1,51 @@
+import pytest
+from backend.models import SensitivityRequest, SmeInputs, SmeOutputs
+from backend.sensitivity import SensitivityAnalyzer
+from backend.sme_batch import INT_FIELDS, NUMERIC_FIELDS, SCORE_FIELDS
+from backend.sme_simulator import SmeSimulator
+
+INDICATORS = ['roi_percent', 'irr_percent', 'payback_years', 'esg_score']
+
+
+def _scalar(inputs: SmeInputs, field: str, value: float) -> SmeOutputs:
+    return SmeSimulator().calculate(inputs.model_copy(update={field: int(value) if field in INT_FIELDS else value}))
+
+
+def _metric(outputs: SmeOutputs, metric: str) -> float:
+    return getattr(outputs.scores if metric in SCORE_FIELDS else outputs.details, metric)
+
+
+@pytest.mark.parametrize('index', [0, 7, 123])
+def test_tornado_matches_scalar_calculate(scenarios, index):
+    inputs = scenarios[index]
+    result = SensitivityAnalyzer().run(SensitivityRequest(inputs=inputs, indicators=INDICATORS))
+    base = SmeSimulator().calculate(inputs)
+    for metric, bars in result.tornado.items():
+        assert result.base[metric] == pytest.approx(_metric(base, metric), rel=1e-9, abs=1e-9)
+        assert {b.field for b in bars} == set(NUMERIC_FIELDS)
+        assert [b.swing for b in bars] == sorted((b.swing for b in bars), reverse=True)
+        for bar in bars:
+            low, high = _scalar(inputs, bar.field, bar.input_low), _scalar(inputs, bar.field, bar.input_high)
+            assert bar.output_low == pytest.approx(_metric(low, metric), rel=1e-9, abs=1e-9)
+            assert bar.output_high == pytest.approx(_metric(high, metric), rel=1e-9, abs=1e-9)
+
+
+def test_elasticity_undefined_at_zero_lever():
+    inputs = SmeInputs(energy_efficiency_pct=0.0)
+    result = SensitivityAnalyzer().run(SensitivityRequest(inputs=inputs, fields=['energy_efficiency_pct', 'wacc']))
+    bars = {b.field: b for b in result.tornado['overall']}
+    # The zero lever is still moved (by delta times its default) and the output responds
+    zero = bars['energy_efficiency_pct']
+    assert zero.input_low < 0.0 < zero.input_high and zero.swing > 0
+    assert zero.elasticity is None
+    assert bars['wacc'].elasticity is not None
+
+
+@pytest.mark.parametrize('changes, message', [
+    ({'fields': ['colour']}, 'unknown numeric input fields'),
+    ({'indicators': ['colour']}, 'unknown indicators'),
+    ({'delta': 0.0}, 'delta'),
+])
+def test_invalid_requests(changes, message):
+    with pytest.raises(ValueError, match=message):
+        SensitivityAnalyzer().run(SensitivityRequest(**changes))
@@ -0,0 +1,73 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.models import SmeInputs, SmeOutputs
+from backend.serialization import (COLUMNAR_JSON, JSON, MSGPACK, PROJECTION_COLUMNS, available_media_types, columnar,
+                                   encode_outputs, negotiate)
+from backend.sme_simulator import SmeSimulator
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, JSON),
+    ('', JSON),
+    ('*/*', JSON),
+    ('application/*', JSON),
+    ('text/html', JSON),
+    ('text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8', JSON),
+    (COLUMNAR_JSON, COLUMNAR_JSON),
+    (f'{JSON};q=0.5, {COLUMNAR_JSON}', COLUMNAR_JSON),
+    (f'{COLUMNAR_JSON}, {JSON}', COLUMNAR_JSON),
+    (f'{COLUMNAR_JSON};q=0.2, {JSON};q=0.9', JSON),
+    (f'{COLUMNAR_JSON};q=abc', JSON),
+    (f'{JSON};q=0', None),
+    ('*/*;q=0', None),
+    (f'{JSON};q=0, {COLUMNAR_JSON}', COLUMNAR_JSON),
+    (f'*/*;q=0, {JSON}', JSON),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
+
+
+def test_negotiate_msgpack_when_available():
+    expected = MSGPACK if MSGPACK in available_media_types() else JSON
+    assert negotiate('application/x-msgpack') == expected
+    assert negotiate(f'{MSGPACK}, {COLUMNAR_JSON};q=0.5') == (MSGPACK if expected == MSGPACK else COLUMNAR_JSON)
+
+
+@pytest.fixture(scope='module')
+def outputs():
+    return SmeSimulator().calculate(SmeInputs(forecast_horizon=4))
+
+
+def test_json_matches_model(outputs):
+    assert SmeOutputs.model_validate_json(encode_outputs(outputs)) == outputs
+
+
+def test_columnar_json(outputs):
+    document = json.loads(encode_outputs(outputs, COLUMNAR_JSON))
+    assert document == json.loads(json.dumps(columnar(outputs)))
+    assert list(document['projections']) == PROJECTION_COLUMNS
+    rows = [dict(zip(PROJECTION_COLUMNS, values)) for values in zip(*document['projections'].values())]
+    assert SmeOutputs(**{**document, 'projections': rows}) == outputs
+
+
+def test_msgpack(outputs):
+    msgpack = pytest.importorskip('msgpack')
+    document = msgpack.unpackb(encode_outputs(outputs, MSGPACK), raw=False)
+    assert document == columnar(outputs)
+
+
+def test_unsupported_media_type_raises(outputs):
+    with pytest.raises(ValueError):
+        encode_outputs(outputs, 'text/html')
+
+
+def test_calculate_route_falls_back_to_json():
+    client = TestClient(app)
+    response = client.post('/api/sme/calculate', json={}, headers={'Accept': 'text/html'})
+    assert response.status_code == 200 and response.headers['content-type'] == JSON
+    assert SmeOutputs.model_validate_json(response.content) == SmeSimulator().calculate(SmeInputs())
+    assert client.post('/api/sme/calculate', json={}, headers={'Accept': f'{JSON};q=0'}).status_code == 406
+    response = client.post('/api/sme/calculate', json={}, headers={'Accept': COLUMNAR_JSON})
+    assert response.headers['content-type'] == COLUMNAR_JSON and 'Accept' in response.headers['vary']
@@ -0,0 +1,92 @@
+import pytest
+from backend.models import Constraint, GoalSeekRequest, LeverBound, OptimizeRequest, SmeInputs
+from backend.sme_simulator import SmeSimulator
+from backend.solver import SmeSolver
+
+# roi_percent rises steadily with both levers at the default inputs
+EFFICIENCY = LeverBound(field='energy_efficiency_pct', low=0.0, high=0.5)
+HORIZON = LeverBound(field='forecast_horizon', low=1, high=30)
+
+
+def _roi(**changes) -> float:
+    return SmeSimulator().calculate(SmeInputs(**changes)).details.roi_percent
+
+
+def _seek(**kwargs):
+    return SmeSolver().goal_seek(GoalSeekRequest(**{'lever': EFFICIENCY, 'metric': 'roi_percent', **kwargs}))
+
+
+@pytest.mark.parametrize('op, target, seek, step', [
+    ('>=', 3500.0, 'min', -1e-3),  # smallest value meeting the target: a little less misses it
+    ('<=', 3000.0, 'max', 1e-3),  # largest value meeting the target: a little more misses it
+])
+def test_goal_seek_inequality(op, target, seek, step):
+    result = _seek(op=op, target=target, seek=seek)
+    assert result.found and EFFICIENCY.low <= result.value <= EFFICIENCY.high
+    roi = _roi(energy_efficiency_pct=result.value)
+    assert roi == pytest.approx(result.metric_value, abs=0.1)
+    missed = _roi(energy_efficiency_pct=result.value + step)
+    assert (roi >= target > missed) if op == '>=' else (roi <= target < missed)
+    assert result.inputs == SmeInputs(energy_efficiency_pct=result.value)
+
+
+def test_goal_seek_crossing():
+    result = _seek(op='==', target=3200.0)
+    assert result.found
+    assert result.metric_value == pytest.approx(3200.0, abs=0.1)
+    assert _roi(energy_efficiency_pct=result.value) == pytest.approx(3200.0, abs=0.1)
+    assert result.trace[-1].width <= 1e-6 * (EFFICIENCY.high - EFFICIENCY.low)
+
+
+@pytest.mark.parametrize('op, target', [('>=', 1e9), ('<=', 0.0), ('==', 1e9)])
+def test_goal_seek_unreachable(op, target):
+    result = _seek(op=op, target=target, population=16)
+    assert not result.found and result.value is None and result.inputs is None
+    assert result.evaluations == 16 and len(result.trace) == 1
+
+
+def test_goal_seek_integer_lever():
+    result = _seek(lever=HORIZON, op='>=', target=4000.0)
+    assert result.found and result.value == int(result.value)
+    horizon = int(result.value)
+    assert _roi(forecast_horizon=horizon) >= 4000.0 > _roi(forecast_horizon=horizon - 1)
+    assert result.inputs.forecast_horizon == horizon
+
+
+def test_optimize_input_constraint_binds():
+    # roi_percent only grows with the lever, so the optimum sits on the constraint
+    request = OptimizeRequest(levers=[EFFICIENCY], objective='roi_percent', seed=1,
+                              constraints=[Constraint(metric='energy_efficiency_pct', op='<=', value=0.3)])
+    result = SmeSolver().optimize(request)
+    assert result.feasible and result.violation == 0.0
+    assert result.inputs.energy_efficiency_pct == pytest.approx(0.3, abs=1e-3)
+    assert result.objective == pytest.approx(_roi(energy_efficiency_pct=result.inputs.energy_efficiency_pct), abs=0.1)
+
+
+def test_optimize_integer_lever_matches_goal_seek():
+    # Shortest horizon whose ROI reaches the target: the goal-seek answer
+    request = OptimizeRequest(levers=[HORIZON], objective='forecast_horizon', maximize=False, seed=3,
+                              constraints=[Constraint(metric='roi_percent', op='>=', value=4000.0)])
+    result = SmeSolver().optimize(request)
+    assert result.feasible
+    assert result.inputs.forecast_horizon == _seek(lever=HORIZON, op='>=', target=4000.0).value == result.objective
+
+
+def test_optimize_infeasible():
+    request = OptimizeRequest(levers=[EFFICIENCY], seed=1, generations=5,
+                              constraints=[Constraint(metric='roi_percent', op='>=', value=1e9)])
+    result = SmeSolver().optimize(request)
+    assert not result.feasible and result.violation > 0
+
+
+@pytest.mark.parametrize('changes, message', [
+    ({'lever': LeverBound(field='colour', low=0, high=1)}, 'unknown numeric input field'),
+    ({'lever': LeverBound(field='wacc', low=0.2, high=0.1)}, 'low must not exceed high'),
+    ({'metric': 'colour'}, 'unknown metric'),
+    ({'op': '<'}, 'op must be one of'),
+    ({'seek': 'middle'}, 'seek'),
+    ({'population': 2}, 'population'),
+])
+def test_goal_seek_rejects_bad_requests(changes, message):
+    with pytest.raises(ValueError, match=message):
+        _seek(**{'op': '>=', 'target': 0.0, **changes})
@@ -0,0 +1,81 @@
+import itertools
+import time
+import pytest
+from backend import config, jobs
+from backend.models import SmeInputs, SweepAxis, SweepRequest
+from backend.parallel import ParallelEngine
+from backend.sme_batch import DETAIL_FIELDS, SCORE_FIELDS, SmeBatchEngine
+from backend.sme_simulator import SmeSimulator
+from backend.sweep import ParameterSweep, run_sweep
+
+METRICS = SCORE_FIELDS + DETAIL_FIELDS
+
+
+def _assert_matches_scalar(base, axes, result):
+    simulator = SmeSimulator()
+    for index in itertools.product(*[range(len(values)) for _, values in axes]):
+        update = {}
+        for (name, values), k in zip(axes, index):
+            update[name] = int(values[k]) if name == 'forecast_horizon' else float(values[k])
+        outputs = simulator.calculate(base.model_copy(update=update))
+        for m in METRICS:
+            expected = getattr(outputs.scores, m) if m in SCORE_FIELDS else getattr(outputs.details, m)
+            assert result.cubes[m][index] == expected, (index, m)
+
+
+@pytest.mark.parametrize('axes', [
+    [('discount_rate', [0.04, 0.08, 0.12])],
+    [('forecast_horizon', [5, 7, 10])],
+    [('forecast_horizon', [5, 10]), ('discount_rate', [0.04, 0.12]), ('sustainability_capex', [5e4, 5e5])],
+])
+def test_sweep_matches_scalar(axes):
+    base = SmeInputs()
+    result = ParameterSweep().run(base, axes, METRICS)
+    assert result.shape == tuple(len(v) for _, v in axes)
+    _assert_matches_scalar(base, axes, result)
+
+
+def test_rate_only_sweep_shares_one_projection_path():
+    outputs = run_sweep(SweepRequest(axes=[SweepAxis(field='discount_rate', values=[0.02, 0.3])],
+                                     metrics=['overall', 'financial_viability']))
+    assert outputs.shape == [2]
+    assert outputs.projection_paths == 1
+
+
+def test_sweep_rejects_bad_axes():
+    with pytest.raises(ValueError):
+        ParameterSweep().run(SmeInputs(), [('industry', [1])])
+    with pytest.raises(ValueError):
+        ParameterSweep().run(SmeInputs(), [('forecast_horizon', [0])])
+    with pytest.raises(ValueError, match='forecast_horizon'):
+        ParameterSweep().run(SmeInputs(), [('forecast_horizon', [5, config.MAX_FORECAST_HORIZON + 1])])
+
+
+def test_sweep_on_parallel_engine():
+    axes = [('forecast_horizon', [3, 8]), ('discount_rate', [0.05, 0.1])]
+    engine = ParallelEngine(workers=1, start_method='fork')
+    try:
+        result = ParameterSweep(engine).run(SmeInputs(), axes, METRICS)
+    finally:
+        engine.shutdown()
+    _assert_matches_scalar(SmeInputs(), axes, result)
+
+
+def test_sweep_job_uses_the_manager_engine():
+    calls = []
+
+    class CountingEngine(SmeBatchEngine):
+        def project(self, *args, **kwargs):
+            calls.append('project')
+            return super().project(*args, **kwargs)
+
+    manager = jobs.JobManager(jobs.LocalJobBackend(), CountingEngine())
+    try:
+        job = manager.submit('sweep', {'axes': [{'field': 'discount_rate', 'values': [0.05, 0.1]}]})
+        for _ in range(500):
+            if job.status().state in jobs.FINISHED:
+                break
+            time.sleep(0.01)
+        assert job.status().state == jobs.SUCCEEDED and calls == ['project']
+    finally:
+        manager.backend.close()